@@ -1,18 +1,24 @@
 import Fastify from "fastify";
 import type { MemoryService } from "./services/memory-service.js";
 import type { ConversationService } from "./services/conversation-service.js";
+import type { CachedEmbeddingService } from "./embedding/cached.js";
+import type { BackfillService } from "./services/backfill-service.js";
 import { memoryRoutes } from "./routes/memories.js";
 import { conversationRoutes } from "./routes/conversations.js";
 import { chatMemoryRoutes } from "./routes/chat-memory.js";
+import { backfillRoutes } from "./routes/backfill.js";
+import { exportRoutes } from "./routes/export.js";
 
 export interface AppOptions {
   service: MemoryService;
   conversationService?: ConversationService;
   databaseUrl?: string;
+  embeddingCache?: CachedEmbeddingService;
+  backfill?: BackfillService;
 }
 
 export function buildApp(options: AppOptions) {
-  const { service, conversationService, databaseUrl } = options;
+  const { service, conversationService, databaseUrl, embeddingCache, backfill } = options;
   const app = Fastify({ logger: false });
 
   app.get("/health", async (_request, reply) => {
@@ -23,21 +29,38 @@ export function buildApp(options: AppOptions) {
     return { status: "ok" };
   });
 
+  if (embeddingCache) {
+    app.get("/api/embedding-cache/stats", async () => embeddingCache.stats());
+  }
+
+  if (backfill) {
+    app.register(backfillRoutes(backfill));
+  }
+
   app.register(memoryRoutes(service));
 
   if (conversationService) {
     app.register(conversationRoutes(conversationService));
   }
 
+  app.register(exportRoutes(service, conversationService));
+
   if (databaseUrl) {
     app.register(chatMemoryRoutes(databaseUrl));
   }
 
   app.addHook("onClose", async () => {
+    // Backfill jobs use the repositories' pools, so stop them first.
+    if (backfill) {
+      await backfill.close();
+    }
     await service.close();
     if (conversationService) {
       await conversationService.close();
     }
+    if (embeddingCache) {
+      await embeddingCache.close();
+    }
   });
 
   return app;
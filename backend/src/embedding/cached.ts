@@ -0,0 +1,174 @@
+import { createHash } from "node:crypto";
+import type { EmbeddingService } from "./types.js";
+import type { EmbeddingCacheStore } from "../repository/embedding-cache-types.js";
+
+export interface CachedEmbeddingOptions {
+  /** Maximum number of embeddings held in the in-process LRU tier. */
+  maxEntries?: number;
+  /** Time-to-live of in-process entries in milliseconds; 0 disables expiry. */
+  ttlMs?: number;
+  /** Optional persistent tier consulted on in-process misses. */
+  store?: EmbeddingCacheStore;
+}
+
+export interface EmbeddingCacheStats {
+  hits: number;
+  persistentHits: number;
+  misses: number;
+  evictions: number;
+  expirations: number;
+  size: number;
+  maxEntries: number;
+}
+
+interface CacheEntry {
+  // Float32 halves the footprint of a 4096-dim vector; the embedding
+  // model produces float32 values, so nothing is lost.
+  vector: Float32Array;
+  expiresAt: number;
+}
+
+const DEFAULT_MAX_ENTRIES = 2000;
+const DEFAULT_TTL_MS = 24 * 60 * 60 * 1000;
+
+function hashText(text: string): string {
+  return createHash("sha256").update(text).digest("hex");
+}
+
+/**
+ * Content-addressed cache in front of an EmbeddingService, keyed by
+ * (model, sha256(text)). Lookups go in-process LRU → persistent store →
+ * underlying service; only successful embeddings are cached.
+ */
+export class CachedEmbeddingService implements EmbeddingService {
+  private entries = new Map<string, CacheEntry>();
+  private maxEntries: number;
+  private ttlMs: number;
+  private store?: EmbeddingCacheStore;
+  private counters = { hits: 0, persistentHits: 0, misses: 0, evictions: 0, expirations: 0 };
+
+  constructor(
+    private inner: EmbeddingService,
+    private model: string,
+    options: CachedEmbeddingOptions = {},
+  ) {
+    this.maxEntries = Math.max(1, options.maxEntries ?? DEFAULT_MAX_ENTRIES);
+    this.ttlMs = options.ttlMs ?? DEFAULT_TTL_MS;
+    this.store = options.store;
+  }
+
+  async embed(text: string): Promise<number[] | null> {
+    const [vector] = await this.embedBatch([text]);
+    return vector ?? null;
+  }
+
+  async embedBatch(texts: string[]): Promise<(number[] | null)[]> {
+    const hashes = texts.map(hashText);
+    const resolved = new Map<string, number[]>();
+
+    // Tier 1: in-process LRU.
+    const pending = new Map<string, string>();
+    for (let i = 0; i < texts.length; i++) {
+      const hash = hashes[i];
+      if (resolved.has(hash) || pending.has(hash)) continue;
+
+      const cached = this.get(hash);
+      if (cached) {
+        this.counters.hits++;
+        resolved.set(hash, cached);
+      } else {
+        pending.set(hash, texts[i]);
+      }
+    }
+
+    // Tier 2: persistent store.
+    if (pending.size > 0 && this.store) {
+      try {
+        const stored = await this.store.getMany(this.model, [...pending.keys()]);
+        for (const [hash, vector] of stored) {
+          this.counters.persistentHits++;
+          this.set(hash, vector);
+          resolved.set(hash, vector);
+          pending.delete(hash);
+        }
+      } catch (err) {
+        console.warn(`Embedding cache lookup failed: ${err}`);
+      }
+    }
+
+    // Tier 3: the embedding service itself, once per distinct text.
+    if (pending.size > 0) {
+      this.counters.misses += pending.size;
+      const missHashes = [...pending.keys()];
+      const vectors = await this.inner.embedBatch([...pending.values()]);
+
+      const fresh: { hash: string; embedding: number[] }[] = [];
+      missHashes.forEach((hash, i) => {
+        const vector = vectors[i];
+        if (!vector) return;
+        this.set(hash, vector);
+        resolved.set(hash, vector);
+        fresh.push({ hash, embedding: vector });
+      });
+
+      if (fresh.length > 0 && this.store) {
+        try {
+          await this.store.putMany(this.model, fresh);
+        } catch (err) {
+          console.warn(`Embedding cache write failed: ${err}`);
+        }
+      }
+    }
+
+    return hashes.map((hash) => resolved.get(hash) ?? null);
+  }
+
+  async healthCheck(): Promise<boolean> {
+    return this.inner.healthCheck();
+  }
+
+  stats(): EmbeddingCacheStats {
+    return { ...this.counters, size: this.entries.size, maxEntries: this.maxEntries };
+  }
+
+  async close(): Promise<void> {
+    this.entries.clear();
+    await this.store?.close();
+  }
+
+  private key(hash: string): string {
+    return `${this.model}:${hash}`;
+  }
+
+  private get(hash: string): number[] | null {
+    const key = this.key(hash);
+    const entry = this.entries.get(key);
+    if (!entry) return null;
+
+    if (this.ttlMs > 0 && entry.expiresAt <= Date.now()) {
+      this.entries.delete(key);
+      this.counters.expirations++;
+      return null;
+    }
+
+    // Re-insert to mark as most recently used.
+    this.entries.delete(key);
+    this.entries.set(key, entry);
+    return Array.from(entry.vector);
+  }
+
+  private set(hash: string, vector: number[]): void {
+    const key = this.key(hash);
+    this.entries.delete(key);
+    this.entries.set(key, {
+      vector: Float32Array.from(vector),
+      expiresAt: this.ttlMs > 0 ? Date.now() + this.ttlMs : Infinity,
+    });
+
+    while (this.entries.size > this.maxEntries) {
+      const oldest = this.entries.keys().next().value as string;
+      this.entries.delete(oldest);
+      this.counters.evictions++;
+    }
+  }
+}
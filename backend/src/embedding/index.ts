@@ -1,3 +1,6 @@
 export type { EmbeddingService } from "./types.js";
 export { OllamaEmbeddingService } from "./ollama.js";
+export type { OllamaEmbeddingOptions } from "./ollama.js";
 export { NoopEmbeddingService } from "./noop.js";
+export { CachedEmbeddingService } from "./cached.js";
+export type { CachedEmbeddingOptions, EmbeddingCacheStats } from "./cached.js";
@@ -5,6 +5,10 @@ export class NoopEmbeddingService implements EmbeddingService {
     return null;
   }
 
+  async embedBatch(texts: string[]): Promise<null[]> {
+    return texts.map(() => null);
+  }
+
   async healthCheck(): Promise<boolean> {
     return true;
   }
@@ -1,44 +1,100 @@
 import type { EmbeddingService } from "./types.js";
 
+export interface OllamaEmbeddingOptions {
+  /** Maximum number of texts sent in a single /api/embed request. */
+  maxBatchSize?: number;
+  /** Maximum number of /api/embed requests in flight at once, across all callers. */
+  maxInFlight?: number;
+}
+
+const DEFAULT_MAX_BATCH_SIZE = 64;
+const DEFAULT_MAX_IN_FLIGHT = 2;
+
 export class OllamaEmbeddingService implements EmbeddingService {
   private baseUrl: string;
   private model: string;
+  private maxBatchSize: number;
+  private maxInFlight: number;
+  private inFlight = 0;
+  private waiters: (() => void)[] = [];
 
-  constructor(baseUrl: string, model: string) {
+  constructor(baseUrl: string, model: string, options: OllamaEmbeddingOptions = {}) {
     this.baseUrl = baseUrl.replace(/\/+$/, "");
     this.model = model;
+    this.maxBatchSize = Math.max(1, options.maxBatchSize ?? DEFAULT_MAX_BATCH_SIZE);
+    this.maxInFlight = Math.max(1, options.maxInFlight ?? DEFAULT_MAX_IN_FLIGHT);
   }
 
   async embed(text: string): Promise<number[] | null> {
+    const [vector] = await this.embedBatch([text]);
+    return vector ?? null;
+  }
+
+  async embedBatch(texts: string[]): Promise<(number[] | null)[]> {
+    const chunks: string[][] = [];
+    for (let i = 0; i < texts.length; i += this.maxBatchSize) {
+      chunks.push(texts.slice(i, i + this.maxBatchSize));
+    }
+
+    const results = await Promise.all(
+      chunks.map((chunk) => this.withSlot(() => this.request(chunk))),
+    );
+    return results.flat();
+  }
+
+  async healthCheck(): Promise<boolean> {
+    try {
+      const response = await fetch(`${this.baseUrl}/api/tags`, {
+        signal: AbortSignal.timeout(5_000),
+      });
+      return response.ok;
+    } catch {
+      return false;
+    }
+  }
+
+  /** Send one /api/embed request; a failed request yields null for every input. */
+  private async request(input: string[]): Promise<(number[] | null)[]> {
+    const empty = input.map(() => null);
+
     try {
       const response = await fetch(`${this.baseUrl}/api/embed`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ model: this.model, input: text }),
-        signal: AbortSignal.timeout(30_000),
+        body: JSON.stringify({ model: this.model, input }),
+        signal: AbortSignal.timeout(30_000 + 1_000 * input.length),
       });
 
       if (!response.ok) {
         console.warn(`Ollama embedding request failed: ${response.status}`);
-        return null;
+        return empty;
       }
 
       const data = (await response.json()) as { embeddings: number[][] };
-      return data.embeddings[0] ?? null;
+      return input.map((_, i) => data.embeddings[i] ?? null);
     } catch (err) {
       console.warn(`Ollama embedding error: ${err}`);
-      return null;
+      return empty;
     }
   }
 
-  async healthCheck(): Promise<boolean> {
+  /** Run `fn` once fewer than maxInFlight requests are outstanding. */
+  private async withSlot<T>(fn: () => Promise<T>): Promise<T> {
+    if (this.inFlight >= this.maxInFlight) {
+      await new Promise<void>((resolve) => this.waiters.push(resolve));
+    } else {
+      this.inFlight++;
+    }
+
     try {
-      const response = await fetch(`${this.baseUrl}/api/tags`, {
-        signal: AbortSignal.timeout(5_000),
-      });
-      return response.ok;
-    } catch {
-      return false;
+      return await fn();
+    } finally {
+      const next = this.waiters.shift();
+      if (next) {
+        next();
+      } else {
+        this.inFlight--;
+      }
     }
   }
 }
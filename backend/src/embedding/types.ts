@@ -1,4 +1,6 @@
 export interface EmbeddingService {
   embed(text: string): Promise<number[] | null>;
+  /** Embed many texts; the result is aligned with the input, null where embedding failed. */
+  embedBatch(texts: string[]): Promise<(number[] | null)[]>;
   healthCheck(): Promise<boolean>;
 }
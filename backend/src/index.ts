@@ -1,33 +1,95 @@
 import { buildApp } from "./app.js";
 import { InMemoryRepository, PostgresRepository } from "./repository/index.js";
-import { ConversationPostgresRepository } from "./repository/index.js";
-import type { MemoryRepository } from "./repository/index.js";
-import { OllamaEmbeddingService, NoopEmbeddingService } from "./embedding/index.js";
+import {
+  BackfillProgressPostgresStore,
+  ConversationPostgresRepository,
+  EmbeddingCachePostgresStore,
+  EMBEDDING_STORAGE_MODES,
+} from "./repository/index.js";
+import type {
+  MemoryRepository,
+  AnnSearchOptions,
+  BackfillJob,
+  EmbeddingStorage,
+  TextSearchOptions,
+} from "./repository/index.js";
+import {
+  OllamaEmbeddingService,
+  NoopEmbeddingService,
+  CachedEmbeddingService,
+} from "./embedding/index.js";
 import type { EmbeddingService } from "./embedding/index.js";
 import { MemoryService } from "./services/memory-service.js";
 import { ConversationService } from "./services/conversation-service.js";
+import { BackfillService } from "./services/backfill-service.js";
 
 const HOST = process.env.HOST ?? "0.0.0.0";
 const PORT = parseInt(process.env.PORT ?? "3000", 10);
 const DATABASE_URL = process.env.DATABASE_URL;
 const EMBEDDING_URL = process.env.EMBEDDING_URL;
 const EMBEDDING_MODEL = process.env.EMBEDDING_MODEL ?? "qwen3-embedding:8b-q8_0";
+const EMBEDDING_BATCH_SIZE = parseInt(process.env.EMBEDDING_BATCH_SIZE ?? "64", 10);
+const EMBEDDING_MAX_IN_FLIGHT = parseInt(process.env.EMBEDDING_MAX_IN_FLIGHT ?? "2", 10);
+const EMBEDDING_CACHE_SIZE = parseInt(process.env.EMBEDDING_CACHE_SIZE ?? "2000", 10);
+const EMBEDDING_CACHE_TTL_MS = parseInt(process.env.EMBEDDING_CACHE_TTL_MS ?? "86400000", 10);
+const EMBEDDING_STORAGE = (process.env.EMBEDDING_STORAGE ?? "vector") as EmbeddingStorage;
+const SEARCH_DEGRADED_BUDGET_MS = parseInt(process.env.SEARCH_DEGRADED_BUDGET_MS ?? "500", 10);
+const BACKFILL_WORKERS = parseInt(process.env.BACKFILL_WORKERS ?? "2", 10);
+const BACKFILL_BATCH_SIZE = parseInt(process.env.BACKFILL_BATCH_SIZE ?? "100", 10);
+
+if (!EMBEDDING_STORAGE_MODES.includes(EMBEDDING_STORAGE)) {
+  console.error(
+    `Invalid EMBEDDING_STORAGE "${EMBEDDING_STORAGE}" (expected ${EMBEDDING_STORAGE_MODES.join(", ")})`,
+  );
+  process.exit(1);
+}
+
+const annOptions: AnnSearchOptions = {
+  efSearch: parseInt(process.env.VECTOR_SEARCH_EF_SEARCH ?? "100", 10),
+  candidates: parseInt(process.env.VECTOR_SEARCH_CANDIDATES ?? "200", 10),
+  exact: process.env.VECTOR_SEARCH_EXACT === "true",
+  storage: EMBEDDING_STORAGE,
+};
+
+const textOptions: TextSearchOptions = {
+  degradedBudgetMs: SEARCH_DEGRADED_BUDGET_MS,
+};
 
 let repository: MemoryRepository;
+const backfillJobs: BackfillJob[] = [];
 
 if (DATABASE_URL) {
   console.log("Using PostgreSQL repository");
-  repository = new PostgresRepository(DATABASE_URL);
+  const postgres = new PostgresRepository(DATABASE_URL, annOptions, textOptions);
+  backfillJobs.push(...postgres.backfillJobs());
+  repository = postgres;
 } else {
   console.warn("DATABASE_URL not set — using in-memory repository (data will be lost on restart)");
   repository = new InMemoryRepository();
 }
 
 let embedding: EmbeddingService;
+let embeddingCache: CachedEmbeddingService | undefined;
 
 if (EMBEDDING_URL) {
   console.log(`Using Ollama embedding service at ${EMBEDDING_URL} (model: ${EMBEDDING_MODEL})`);
-  embedding = new OllamaEmbeddingService(EMBEDDING_URL, EMBEDDING_MODEL);
+  const ollama = new OllamaEmbeddingService(EMBEDDING_URL, EMBEDDING_MODEL, {
+    maxBatchSize: EMBEDDING_BATCH_SIZE,
+    maxInFlight: EMBEDDING_MAX_IN_FLIGHT,
+  });
+
+  let store: EmbeddingCachePostgresStore | undefined;
+  if (DATABASE_URL) {
+    store = new EmbeddingCachePostgresStore(DATABASE_URL);
+    await store.initialize();
+  }
+
+  embeddingCache = new CachedEmbeddingService(ollama, EMBEDDING_MODEL, {
+    maxEntries: EMBEDDING_CACHE_SIZE,
+    ttlMs: EMBEDDING_CACHE_TTL_MS,
+    store,
+  });
+  embedding = embeddingCache;
 } else {
   console.warn("EMBEDDING_URL not set — embeddings disabled (text search only)");
   embedding = new NoopEmbeddingService();
@@ -39,13 +101,35 @@ await service.initialize();
 let conversationService: ConversationService | undefined;
 
 if (DATABASE_URL) {
-  const conversationRepo = new ConversationPostgresRepository(DATABASE_URL);
+  const conversationRepo = new ConversationPostgresRepository(
+    DATABASE_URL,
+    annOptions,
+    textOptions,
+  );
+  backfillJobs.push(...conversationRepo.backfillJobs());
   conversationService = new ConversationService(conversationRepo, embedding);
   await conversationService.initialize();
   console.log("Conversation service initialized");
 }
 
-const app = buildApp({ service, conversationService, databaseUrl: DATABASE_URL });
+let backfill: BackfillService | undefined;
+
+if (DATABASE_URL) {
+  const progressStore = new BackfillProgressPostgresStore(DATABASE_URL);
+  await progressStore.initialize();
+  backfill = new BackfillService(progressStore, backfillJobs, {
+    workers: BACKFILL_WORKERS,
+    batchSize: BACKFILL_BATCH_SIZE,
+  });
+}
+
+const app = buildApp({
+  service,
+  conversationService,
+  databaseUrl: DATABASE_URL,
+  embeddingCache,
+  backfill,
+});
 
 try {
   await app.listen({ host: HOST, port: PORT });
@@ -54,3 +138,6 @@ try {
   app.log.error(err);
   process.exit(1);
 }
+
+// Backfills run while the server is already serving; see GET /api/backfill/status.
+void backfill?.start();
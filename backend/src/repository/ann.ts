@@ -0,0 +1,199 @@
+import type pg from "pg";
+import { createIndexConcurrently, EMBEDDING_DIMENSIONS } from "./storage.js";
+import type { EmbeddingStorage } from "./storage.js";
+import type { BackfillJob } from "./backfill-types.js";
+
+/**
+ * Approximate nearest-neighbour support shared by the Postgres repositories.
+ *
+ * pgvector cannot build HNSW indexes over 4096-dim `vector` columns, so each
+ * table with an embedding gets a quantized shadow column with an HNSW index:
+ *
+ * - `embedding_ann`: the L2-normalised first ANN_DIMENSIONS components as
+ *   halfvec. qwen3-embedding is Matryoshka-trained, so the prefix is a
+ *   usable lower-dimension embedding.
+ * - `embedding_bq`: the binary-quantized embedding (one bit per dimension),
+ *   compared by Hamming distance; used in `binary` storage mode.
+ *
+ * Searches take candidates from the index and re-rank them exactly against
+ * the full embedding column.
+ */
+export const ANN_DIMENSIONS = 1024;
+
+export interface AnnSearchOptions {
+  /** hnsw.ef_search for candidate retrieval; higher is slower but more accurate. */
+  efSearch?: number;
+  /** Minimum number of ANN candidates re-ranked exactly per search. */
+  candidates?: number;
+  /** Skip the index and scan every embedding exactly. */
+  exact?: boolean;
+  /** Embedding column types and ANN quantization; see EmbeddingStorage. */
+  storage?: EmbeddingStorage;
+}
+
+export interface AnnColumn {
+  name: string;
+  type: string;
+  opclass: string;
+  operator: string;
+  /** SQL expression projecting a full embedding onto this column. */
+  project(expr: string): string;
+}
+
+const HALFVEC_ANN: AnnColumn = {
+  name: "embedding_ann",
+  type: `halfvec(${ANN_DIMENSIONS})`,
+  opclass: "halfvec_cosine_ops",
+  operator: "<=>",
+  project: (expr) =>
+    `l2_normalize(subvector(${expr}, 1, ${ANN_DIMENSIONS}))::halfvec(${ANN_DIMENSIONS})`,
+};
+
+const BINARY_ANN: AnnColumn = {
+  name: "embedding_bq",
+  type: `bit(${EMBEDDING_DIMENSIONS})`,
+  opclass: "bit_hamming_ops",
+  operator: "<~>",
+  project: (expr) => `binary_quantize(${expr})::bit(${EMBEDDING_DIMENSIONS})`,
+};
+
+export const DEFAULT_EF_SEARCH = 100;
+export const DEFAULT_ANN_CANDIDATES = 200;
+
+// hnsw.ef_search is capped at 1000 by pgvector.
+const MAX_EF_SEARCH = 1000;
+
+export function annColumn(storage: EmbeddingStorage = "vector"): AnnColumn {
+  return storage === "binary" ? BINARY_ANN : HALFVEC_ANN;
+}
+
+/**
+ * Schema for the shadow column of `table`: the column itself and a trigger
+ * that keeps it in sync on every write path. The shadow column of the other
+ * quantization is dropped, with its index, when the storage mode changes.
+ * Existing rows are filled, and the index built, by annBackfillJob.
+ */
+export function annSchemaSql(table: string, storage?: EmbeddingStorage): string {
+  const column = annColumn(storage);
+  const other = column === BINARY_ANN ? HALFVEC_ANN : BINARY_ANN;
+
+  return `
+ALTER TABLE ${table} ADD COLUMN IF NOT EXISTS ${column.name} ${column.type};
+
+CREATE OR REPLACE FUNCTION ${table}_set_embedding_ann() RETURNS trigger AS $$
+BEGIN
+  NEW.${column.name} := CASE
+    WHEN NEW.embedding IS NULL THEN NULL
+    ELSE ${column.project("NEW.embedding")}
+  END;
+  RETURN NEW;
+END $$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_${table}_embedding_ann
+  BEFORE INSERT OR UPDATE OF embedding ON ${table}
+  FOR EACH ROW EXECUTE FUNCTION ${table}_set_embedding_ann();
+
+ALTER TABLE ${table} DROP COLUMN IF EXISTS ${other.name};
+`;
+}
+
+/**
+ * Backfill job filling the ANN column for rows written before it existed,
+ * then building its index. `onReady` is called once the index is usable;
+ * until then searches should use the exact path, since the index would
+ * miss rows that are not yet backfilled.
+ */
+export function annBackfillJob(
+  pool: pg.Pool,
+  table: string,
+  storage: EmbeddingStorage | undefined,
+  onReady: () => void,
+): BackfillJob {
+  const column = annColumn(storage);
+  const needsWork = `embedding IS NOT NULL AND ${column.name} IS NULL`;
+
+  return {
+    name: `${table}.${column.name}`,
+    async pending(after, limit) {
+      const result = await pool.query(
+        `SELECT id FROM ${table}
+         WHERE ${needsWork} AND ($1::uuid IS NULL OR id > $1::uuid)
+         ORDER BY id LIMIT $2`,
+        [after, limit],
+      );
+      return result.rows.map((r) => r.id as string);
+    },
+    async process(ids) {
+      await pool.query(
+        `UPDATE ${table} SET ${column.name} = ${column.project("embedding")}
+         WHERE id = ANY($1::uuid[]) AND ${needsWork}`,
+        [ids],
+      );
+    },
+    async count() {
+      const result = await pool.query(`SELECT COUNT(*) AS n FROM ${table} WHERE ${needsWork}`);
+      return Number(result.rows[0].n);
+    },
+    async finish() {
+      await ensureAnnIndex(pool, table, storage);
+      onReady();
+    },
+  };
+}
+
+/** Build the HNSW index without blocking writes. */
+export async function ensureAnnIndex(
+  pool: pg.Pool,
+  table: string,
+  storage?: EmbeddingStorage,
+): Promise<void> {
+  const column = annColumn(storage);
+  await createIndexConcurrently(
+    pool,
+    `idx_${table}_${column.name}`,
+    `${table} USING hnsw (${column.name} ${column.opclass})`,
+  );
+}
+
+/** Number of ANN candidates to fetch for a search returning `limit` rows. */
+export function candidateCount(options: AnnSearchOptions, limit: number, oversample: number): number {
+  return Math.min(
+    MAX_EF_SEARCH,
+    Math.max(options.candidates ?? DEFAULT_ANN_CANDIDATES, limit * oversample),
+  );
+}
+
+/**
+ * Run `fn` on a dedicated connection inside a transaction with the HNSW
+ * search parameters applied. Iterative scans (pgvector >= 0.8) keep filtered
+ * searches from returning short result sets.
+ */
+export async function withAnnSettings<T>(
+  pool: pg.Pool,
+  options: AnnSearchOptions,
+  candidates: number,
+  fn: (client: pg.PoolClient) => Promise<T>,
+): Promise<T> {
+  const efSearch = Math.min(
+    MAX_EF_SEARCH,
+    Math.max(options.efSearch ?? DEFAULT_EF_SEARCH, candidates),
+  );
+
+  const client = await pool.connect();
+  try {
+    await client.query("BEGIN");
+    await client.query(
+      `SELECT set_config('hnsw.ef_search', $1, true),
+              set_config('hnsw.iterative_scan', 'relaxed_order', true)`,
+      [String(efSearch)],
+    );
+    const result = await fn(client);
+    await client.query("COMMIT");
+    return result;
+  } catch (err) {
+    await client.query("ROLLBACK");
+    throw err;
+  } finally {
+    client.release();
+  }
+}
@@ -0,0 +1,76 @@
+import pg from "pg";
+import type { BackfillProgress, BackfillProgressStore } from "./backfill-types.js";
+
+const SCHEMA_SQL = `
+CREATE TABLE IF NOT EXISTS backfill_jobs (
+  name TEXT PRIMARY KEY,
+  status TEXT NOT NULL,
+  cursor TEXT,
+  processed BIGINT NOT NULL DEFAULT 0,
+  total BIGINT,
+  error TEXT,
+  started_at TIMESTAMPTZ,
+  finished_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+`;
+
+export class BackfillProgressPostgresStore implements BackfillProgressStore {
+  private pool: pg.Pool;
+
+  constructor(connectionString: string) {
+    this.pool = new pg.Pool({ connectionString, max: 2 });
+  }
+
+  async initialize(): Promise<void> {
+    await this.pool.query(SCHEMA_SQL);
+  }
+
+  async load(name: string): Promise<BackfillProgress | null> {
+    const result = await this.pool.query(
+      `SELECT name, status, cursor, processed, total, error, started_at, finished_at
+       FROM backfill_jobs WHERE name = $1`,
+      [name],
+    );
+    if (result.rows.length === 0) return null;
+
+    const row = result.rows[0];
+    return {
+      name: row.name,
+      status: row.status,
+      cursor: row.cursor,
+      processed: Number(row.processed),
+      total: row.total == null ? null : Number(row.total),
+      error: row.error,
+      startedAt: row.started_at ? new Date(row.started_at).toISOString() : null,
+      finishedAt: row.finished_at ? new Date(row.finished_at).toISOString() : null,
+    };
+  }
+
+  async save(progress: BackfillProgress): Promise<void> {
+    await this.pool.query(
+      `INSERT INTO backfill_jobs
+         (name, status, cursor, processed, total, error, started_at, finished_at, updated_at)
+       VALUES ($1, $2, $3, $4, $5, $6, $7, $8, now())
+       ON CONFLICT (name) DO UPDATE SET
+         status = EXCLUDED.status, cursor = EXCLUDED.cursor,
+         processed = EXCLUDED.processed, total = EXCLUDED.total, error = EXCLUDED.error,
+         started_at = EXCLUDED.started_at, finished_at = EXCLUDED.finished_at,
+         updated_at = now()`,
+      [
+        progress.name,
+        progress.status,
+        progress.cursor,
+        progress.processed,
+        progress.total,
+        progress.error,
+        progress.startedAt,
+        progress.finishedAt,
+      ],
+    );
+  }
+
+  async close(): Promise<void> {
+    await this.pool.end();
+  }
+}
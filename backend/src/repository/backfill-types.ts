@@ -0,0 +1,40 @@
+/**
+ * A resumable backfill over rows identified by ordered text keys
+ * (typically UUIDs). Keys are fetched in ascending order after a cursor, so
+ * a restarted run continues where the previous one stopped.
+ */
+export interface BackfillJob {
+  /** Unique name; progress is stored under it. */
+  name: string;
+  /** Up to `limit` keys greater than `after` (null: from the start) that still need work, ascending. */
+  pending(after: string | null, limit: number): Promise<string[]>;
+  /** Process a chunk of keys returned by pending(). Must be idempotent. */
+  process(keys: string[]): Promise<void>;
+  /** Estimated number of keys still needing work, for progress reporting. */
+  count?(): Promise<number>;
+  /** Run once every key is processed, e.g. to build an index. */
+  finish?(): Promise<void>;
+}
+
+export type BackfillStatus = "pending" | "running" | "done" | "failed";
+
+export interface BackfillProgress {
+  name: string;
+  status: BackfillStatus;
+  /** Last key of the most recently completed batch. */
+  cursor: string | null;
+  processed: number;
+  /** Estimated total number of keys for this run, if the job can count them. */
+  total: number | null;
+  error: string | null;
+  startedAt: string | null;
+  finishedAt: string | null;
+}
+
+/** Where BackfillService persists job progress between restarts. */
+export interface BackfillProgressStore {
+  initialize(): Promise<void>;
+  load(name: string): Promise<BackfillProgress | null>;
+  save(progress: BackfillProgress): Promise<void>;
+  close(): Promise<void>;
+}
@@ -1,11 +1,19 @@
 import { randomUUID } from "node:crypto";
-import type { Conversation, ConversationMessage } from "../types/conversation.js";
+import type {
+  Conversation,
+  ConversationMessage,
+  MessageSnippet,
+} from "../types/conversation.js";
 import type {
   ConversationRepository,
   StoreConversationParams,
   UpsertConversationParams,
   SearchConversationParams,
+  MessagePage,
 } from "./conversation-types.js";
+import { compareRecency } from "./pagination.js";
+import type { ExportOptions, ExportRecord } from "../types/export.js";
+import { encodeVector } from "../utils/vector-codec.js";
 import { kMeans } from "../utils/kmeans.js";
 
 export class InMemoryConversationRepository implements ConversationRepository {
@@ -124,6 +132,15 @@ export class InMemoryConversationRepository implements ConversationRepository {
     return (await this.getById(conversation.id))!;
   }
 
+  async bulkUpsert(items: UpsertConversationParams[]): Promise<Conversation[]> {
+    const results = new Map<string, Conversation>();
+    for (const item of items) {
+      const { messages: _messages, ...conversation } = await this.upsert(item);
+      results.set(item.sourceId, conversation);
+    }
+    return [...results.values()];
+  }
+
   async search(params: SearchConversationParams): Promise<Conversation[]> {
     let result = this.conversations;
 
@@ -153,16 +170,23 @@ export class InMemoryConversationRepository implements ConversationRepository {
       result = result.filter((c) => c.userId === params.userId);
     }
 
+    // Listings come newest first so that `after` pages through them.
+    result = [...result].sort(compareRecency);
+    if (params.after) {
+      const after = params.after;
+      result = result.filter((c) => compareRecency(c, after) > 0);
+    }
+
     const limit = params.limit ?? 10;
     const includeAvg = params.include?.includes("avg_embedding") ?? false;
     const includeCentroids = params.include?.includes("centroids") ?? false;
     return result.slice(0, limit).map((c) => {
-      const conv: Conversation = {
-        ...c,
-        messages: this.messages
-          .filter((m) => m.conversationId === c.id)
-          .sort((a, b) => a.position - b.position),
-      };
+      const messages = this.messages
+        .filter((m) => m.conversationId === c.id)
+        .sort((a, b) => a.position - b.position);
+      const conv: Conversation = params.view === "summary"
+        ? { ...c, messageCount: messages.length, bestMatch: this.bestMatch(messages, params.query) }
+        : { ...c, messages };
       if (!includeAvg) {
         delete conv.avgEmbedding;
       }
@@ -173,17 +197,65 @@ export class InMemoryConversationRepository implements ConversationRepository {
     });
   }
 
-  async getById(id: string): Promise<Conversation | null> {
+  private bestMatch(
+    messages: ConversationMessage[],
+    query?: string,
+  ): MessageSnippet | null | undefined {
+    if (!query) return undefined;
+    const lower = query.toLowerCase();
+    const match = messages.find((m) => m.content.toLowerCase().includes(lower));
+    return match
+      ? { position: match.position, role: match.role, snippet: match.content.slice(0, 300) }
+      : null;
+  }
+
+  async getById(id: string, page?: MessagePage): Promise<Conversation | null> {
     const conversation = this.conversations.find((c) => c.id === id);
     if (!conversation) return null;
 
-    const msgs = this.messages
+    let msgs = this.messages
       .filter((m) => m.conversationId === id)
       .sort((a, b) => a.position - b.position);
+    if (page) {
+      msgs = msgs
+        .filter((m) => m.position > (page.afterPosition ?? -1))
+        .slice(0, page.limit);
+    }
 
     return { ...conversation, messages: msgs };
   }
 
+  async getByIds(ids: string[], messageLimit?: number): Promise<Conversation[]> {
+    const page = messageLimit !== undefined ? { limit: messageLimit } : undefined;
+    const conversations: Conversation[] = [];
+    for (const id of new Set(ids)) {
+      const conversation = await this.getById(id, page);
+      if (conversation) conversations.push(conversation);
+    }
+    return conversations;
+  }
+
+  async *exportRecords(options: ExportOptions): AsyncGenerator<ExportRecord> {
+    const ordered = [...this.conversations].sort((a, b) => (a.id < b.id ? -1 : 1));
+    for (const { avgEmbedding: _avg, centroids: _centroids, ...conversation } of ordered) {
+      yield { type: "conversation", ...conversation };
+
+      const messages = this.messages
+        .filter((m) => m.conversationId === conversation.id)
+        .sort((a, b) => a.position - b.position);
+      for (const message of messages) {
+        const embedding = this.embeddings.get(message.id);
+        yield options.embeddings
+          ? {
+              type: "message",
+              ...message,
+              embedding: embedding ? encodeVector(embedding).toString("base64") : null,
+            }
+          : { type: "message", ...message };
+      }
+    }
+  }
+
   async healthCheck(): Promise<boolean> {
     return true;
   }
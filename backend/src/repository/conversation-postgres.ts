@@ -1,15 +1,138 @@
 import pg from "pg";
-import type { Conversation, ConversationMessage } from "../types/conversation.js";
+import type {
+  Conversation,
+  ConversationMessage,
+  MessageSnippet,
+} from "../types/conversation.js";
+import type { ExportOptions, ExportRecord } from "../types/export.js";
 import type {
   ConversationRepository,
   StoreConversationParams,
   UpsertConversationParams,
   SearchConversationParams,
+  MessagePage,
 } from "./conversation-types.js";
-import { kMeans } from "../utils/kmeans.js";
+import {
+  euclideanDistance,
+  kMeansAsync,
+  nearestCentroid,
+  onlineKMeansUpdate,
+} from "../utils/kmeans.js";
+import type { WeightedCentroid } from "../utils/kmeans.js";
+import { mmrSelect } from "../utils/mmr.js";
+import {
+  annBackfillJob,
+  annColumn,
+  annSchemaSql,
+  candidateCount,
+  withAnnSettings,
+} from "./ann.js";
+import type { AnnSearchOptions } from "./ann.js";
+import type { BackfillJob } from "./backfill-types.js";
+import { cursorRows, exportedEmbedding, inSnapshot } from "./export.js";
+import {
+  keysetIndexJob,
+  recencyAfter,
+  recencyIndexJob,
+  recencyOrder,
+} from "./pagination.js";
+import {
+  embeddingMigrationJob,
+  startEmbeddingMigration,
+  vectorParam,
+  vectorSend,
+  vectorType,
+  vectorTypeOid,
+} from "./storage.js";
+import type { VectorType } from "./storage.js";
+import {
+  DEFAULT_DEGRADED_BUDGET_MS,
+  reciprocalRankFusion,
+  trigramIndexJob,
+  tsQuery,
+  tsvectorBackfillJob,
+  tsvectorSchemaSql,
+  withLatencyBudget,
+} from "./text-search.js";
+import type { TextSearchOptions } from "./text-search.js";
+import { decodeVector, encodeVector, encodeVectorArray } from "../utils/vector-codec.js";
+
+// Rows per multi-row message INSERT in bulkUpsert.
+const BULK_INSERT_CHUNK = 500;
+
+// Incremental avg_embedding updates allowed before an exact recompute
+// resets accumulated float32 rounding drift in embedding_sum.
+const EXACT_RECOMPUTE_EVERY = 100;
+
+// Centroids kept per conversation.
+const CENTROID_K = 3;
+
+// Incrementally updated centroids are only rewritten once they have moved
+// this far (L2) from their stored position.
+const CENTROID_MOVE_THRESHOLD = 0.01;
+
+// ANN candidate messages fetched per requested conversation; several
+// messages of one conversation often rank close together.
+const ANN_OVERSAMPLE = 10;
+
+// Ranked conversations fetched per requested one when re-ranking for
+// diversity, up to MMR_MAX_CANDIDATES.
+const MMR_OVERSAMPLE = 3;
+const MMR_MAX_CANDIDATES = 100;
+
+// Characters of the best-matching message returned in summary results.
+const SNIPPET_LENGTH = 300;
+
+/**
+ * Fold repeated sourceIds in a batch into one item, applying them in order:
+ * later metadata wins and messages are concatenated.
+ */
+function mergeBySourceId(items: UpsertConversationParams[]): UpsertConversationParams[] {
+  const merged = new Map<string, UpsertConversationParams>();
+  for (const item of items) {
+    const prev = merged.get(item.sourceId);
+    if (!prev) {
+      merged.set(item.sourceId, { ...item });
+      continue;
+    }
+    merged.set(item.sourceId, {
+      sourceId: item.sourceId,
+      title: item.title ?? prev.title,
+      source: item.source ?? prev.source,
+      tags: item.tags ?? prev.tags,
+      userId: item.userId ?? prev.userId,
+      messages: [...(prev.messages ?? []), ...(item.messages ?? [])],
+    });
+  }
+  return [...merged.values()];
+}
+
+/** Running-mean delta for one conversation: sum and count of new embeddings. */
+interface EmbeddingDelta {
+  id: string;
+  sum: Float64Array;
+  count: number;
+}
+
+function embeddingDelta(
+  id: string,
+  messages: { embedding: number[] | null }[],
+): EmbeddingDelta | null {
+  let sum: Float64Array | null = null;
+  let count = 0;
+  for (const msg of messages) {
+    const vec = msg.embedding;
+    if (!vec || vec.length === 0) continue;
+    sum ??= new Float64Array(vec.length);
+    for (let i = 0; i < vec.length; i++) sum[i] += vec[i];
+    count++;
+  }
+  return sum ? { id, sum, count } : null;
+}
 
 const SCHEMA_SQL = `
 CREATE EXTENSION IF NOT EXISTS vector;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 CREATE TABLE IF NOT EXISTS conversations (
   id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -56,72 +179,281 @@ CREATE INDEX IF NOT EXISTS idx_conv_centroids_conv_id ON conversation_centroids(
 
 ALTER TABLE conversations ADD COLUMN IF NOT EXISTS user_id TEXT;
 CREATE INDEX IF NOT EXISTS idx_conversations_user_id ON conversations(user_id);
+
+-- Vectors summarised by each centroid; NULL for centroids written before
+-- incremental updates, which are rebuilt by the centroid backfill job.
+ALTER TABLE conversation_centroids ADD COLUMN IF NOT EXISTS weight INTEGER;
+
+-- Running mean state behind avg_embedding; kept as float32 in every storage mode.
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS embedding_sum vector(4096);
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS embedding_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS embedding_appends INTEGER NOT NULL DEFAULT 0;
+${tsvectorSchemaSql("conversation_messages", "content_tsv", "content")}
+${tsvectorSchemaSql("conversations", "title_tsv", "title")}
 `;
 
+// Every embedding column, migrated when the storage mode changes, with the
+// UUID column the migration job walks.
+const EMBEDDING_COLUMNS: [table: string, column: string, key: string][] = [
+  ["conversation_messages", "embedding", "id"],
+  ["conversations", "avg_embedding", "id"],
+  ["conversation_centroids", "embedding", "conversation_id"],
+];
+
 export class ConversationPostgresRepository implements ConversationRepository {
   private pool: pg.Pool;
-
-  constructor(connectionString: string) {
+  private ann: AnnSearchOptions;
+  private vectorOidPromise?: Promise<number>;
+  // Whether the ANN column is backfilled and indexed; searches are exact until then.
+  private annReady = false;
+  // Whether content_tsv and title_tsv are backfilled and indexed; hybrid
+  // search waits for both.
+  private messageTextReady = false;
+  private titleTextReady = false;
+  // Type of conversation_messages.embedding; differs from the storage mode's
+  // until a storage migration has swapped the column.
+  private messageEmbeddingType: VectorType = "vector";
+  private degradedBudgetMs: number;
+
+  constructor(
+    connectionString: string,
+    ann: AnnSearchOptions = {},
+    text: TextSearchOptions = {},
+  ) {
     this.pool = new pg.Pool({ connectionString });
+    this.ann = ann;
+    this.degradedBudgetMs = text.degradedBudgetMs ?? DEFAULT_DEGRADED_BUDGET_MS;
+  }
+
+  private get storage() {
+    return this.ann.storage ?? "vector";
+  }
+
+  private vectorOid(): Promise<number> {
+    this.vectorOidPromise ??= vectorTypeOid(this.pool);
+    return this.vectorOidPromise;
   }
 
   async initialize(): Promise<void> {
     await this.pool.query(SCHEMA_SQL);
-    await this.backfillAvgEmbeddings();
-    await this.backfillCentroids();
+    for (const [table, column] of EMBEDDING_COLUMNS) {
+      const type = await startEmbeddingMigration(this.pool, table, column, this.storage);
+      if (table === "conversation_messages") {
+        this.messageEmbeddingType = type ?? vectorType(this.storage);
+      }
+    }
+    await this.pool.query(annSchemaSql("conversation_messages", this.storage));
   }
 
-  private async backfillAvgEmbeddings(): Promise<void> {
-    const result = await this.pool.query(
-      `SELECT DISTINCT c.id
-       FROM conversations c
-       JOIN conversation_messages cm ON cm.conversation_id = c.id
-       WHERE c.avg_embedding IS NULL AND cm.embedding IS NOT NULL`,
+  /** Background work left by initialize(); see BackfillService. */
+  backfillJobs(): BackfillJob[] {
+    const hasEmbeddings = `EXISTS (
+      SELECT 1 FROM conversation_messages cm
+      WHERE cm.conversation_id = c.id AND cm.embedding IS NOT NULL
+    )`;
+
+    const migrations = EMBEDDING_COLUMNS.map(([table, column, key]) =>
+      table === "conversation_messages"
+        ? embeddingMigrationJob(
+            this.pool,
+            table,
+            column,
+            key,
+            annSchemaSql(table, this.storage),
+            () => (this.messageEmbeddingType = vectorType(this.storage)),
+          )
+        : embeddingMigrationJob(this.pool, table, column, key),
     );
-    for (const row of result.rows) {
-      const client = await this.pool.connect();
-      try {
-        await this.recomputeAvgEmbedding(client, row.id as string);
-      } finally {
-        client.release();
-      }
-    }
+
+    return [
+      ...migrations,
+      annBackfillJob(this.pool, "conversation_messages", this.storage, () => {
+        this.annReady = true;
+      }),
+      this.conversationBackfillJob(
+        "conversations.avg_embedding",
+        `c.embedding_sum IS NULL AND ${hasEmbeddings}`,
+        (client, id) => this.recomputeAvgEmbeddings(client, [id]),
+      ),
+      this.conversationBackfillJob(
+        "conversations.centroids",
+        `${hasEmbeddings} AND NOT EXISTS (
+          SELECT 1 FROM conversation_centroids cc
+          WHERE cc.conversation_id = c.id AND cc.weight IS NOT NULL
+        )`,
+        (client, id) => this.recomputeCentroids(client, id),
+      ),
+      tsvectorBackfillJob(this.pool, "conversation_messages", "content_tsv", "content", () => {
+        this.messageTextReady = true;
+      }),
+      tsvectorBackfillJob(this.pool, "conversations", "title_tsv", "title", () => {
+        this.titleTextReady = true;
+      }),
+      trigramIndexJob(this.pool, "conversation_messages", ["content"]),
+      trigramIndexJob(this.pool, "conversations", ["title"]),
+      recencyIndexJob(this.pool, "conversations"),
+      keysetIndexJob(
+        this.pool,
+        "conversation_messages",
+        "idx_conv_messages_position",
+        "conversation_id, position",
+      ),
+    ];
+  }
+
+  /**
+   * Backfill job over conversations matching `needsWork` (an SQL condition
+   * on `c`). Each conversation is handled in its own transaction holding
+   * its row lock, so writes to the same conversation wait for it rather
+   * than interleave, and the condition is re-checked under the lock.
+   */
+  private conversationBackfillJob(
+    name: string,
+    needsWork: string,
+    run: (client: pg.PoolClient, id: string) => Promise<void>,
+  ): BackfillJob {
+    return {
+      name,
+      pending: async (after, limit) => {
+        const result = await this.pool.query(
+          `SELECT c.id FROM conversations c
+           WHERE ${needsWork} AND ($1::uuid IS NULL OR c.id > $1::uuid)
+           ORDER BY c.id LIMIT $2`,
+          [after, limit],
+        );
+        return result.rows.map((r) => r.id as string);
+      },
+      process: async (ids) => {
+        const client = await this.pool.connect();
+        try {
+          for (const id of ids) {
+            await client.query("BEGIN");
+            try {
+              const locked = await client.query(
+                `SELECT c.id FROM conversations c WHERE c.id = $1 AND ${needsWork} FOR UPDATE`,
+                [id],
+              );
+              if (locked.rows.length > 0) await run(client, id);
+              await client.query("COMMIT");
+            } catch (err) {
+              await client.query("ROLLBACK");
+              throw err;
+            }
+          }
+        } finally {
+          client.release();
+        }
+      },
+      count: async () => {
+        const result = await this.pool.query(
+          `SELECT COUNT(*) AS n FROM conversations c WHERE ${needsWork}`,
+        );
+        return Number(result.rows[0].n);
+      },
+    };
   }
 
-  private async recomputeAvgEmbedding(
+  /**
+   * Exact recompute of avg_embedding and its running-mean state from every
+   * embedded message. AVG/SUM run in Postgres, so embeddings never leave
+   * the database.
+   */
+  private async recomputeAvgEmbeddings(
     client: pg.PoolClient,
-    conversationId: string,
+    conversationIds: string[],
   ): Promise<void> {
+    if (conversationIds.length === 0) return;
+
+    await client.query(
+      `UPDATE conversations c
+       SET avg_embedding = a.avg, embedding_sum = a.sum,
+           embedding_count = a.count, embedding_appends = 0
+       FROM (
+         SELECT conversation_id, AVG(embedding) AS avg,
+                SUM(embedding::vector) AS sum, COUNT(embedding) AS count
+         FROM conversation_messages
+         WHERE conversation_id = ANY($1::uuid[]) AND embedding IS NOT NULL
+         GROUP BY conversation_id
+       ) a
+       WHERE c.id = a.conversation_id`,
+      [conversationIds],
+    );
+  }
+
+  /**
+   * Fold newly appended embeddings into avg_embedding in O(dim) per
+   * conversation: add each delta to embedding_sum and divide by the new
+   * count. Conversations without running-mean state yet (new, or not yet
+   * reached by the backfill) and those that have accumulated
+   * EXACT_RECOMPUTE_EVERY incremental updates get an exact recompute
+   * instead. Returns the ids that were recomputed.
+   */
+  private async applyEmbeddingDeltas(
+    client: pg.PoolClient,
+    deltas: EmbeddingDelta[],
+  ): Promise<Set<string>> {
+    if (deltas.length === 0) return new Set();
+
     const result = await client.query(
-      `SELECT embedding::text FROM conversation_messages
-       WHERE conversation_id = $1 AND embedding IS NOT NULL`,
-      [conversationId],
+      `UPDATE conversations c
+       SET embedding_sum = s.sum,
+           embedding_count = s.count,
+           embedding_appends = c.embedding_appends + 1,
+           avg_embedding = s.sum * array_fill((1.0 / s.count)::real, ARRAY[vector_dims(s.sum)])::vector
+       FROM (
+         SELECT d.id, cur.embedding_sum + d.delta AS sum,
+                cur.embedding_count + d.n AS count
+         FROM unnest($1::uuid[], $2::vector[], $3::int[]) AS d(id, delta, n)
+         JOIN conversations cur ON cur.id = d.id
+         WHERE cur.embedding_sum IS NOT NULL
+       ) s
+       WHERE c.id = s.id
+       RETURNING c.id, c.embedding_appends`,
+      [
+        deltas.map((d) => d.id),
+        encodeVectorArray(deltas.map((d) => d.sum), await this.vectorOid()),
+        deltas.map((d) => d.count),
+      ],
     );
 
-    if (result.rows.length === 0) {
-      await client.query(
-        `UPDATE conversations SET avg_embedding = NULL WHERE id = $1`,
-        [conversationId],
-      );
-      return;
-    }
+    const applied = new Map<string, number>(
+      result.rows.map((row) => [row.id as string, row.embedding_appends as number]),
+    );
+    const recomputed = new Set(
+      deltas
+        .map((d) => d.id)
+        .filter((id) => (applied.get(id) ?? EXACT_RECOMPUTE_EVERY) >= EXACT_RECOMPUTE_EVERY),
+    );
+    await this.recomputeAvgEmbeddings(client, [...recomputed]);
+    return recomputed;
+  }
 
-    const vectors = result.rows.map((r) => JSON.parse(r.embedding as string) as number[]);
-    const dim = vectors[0].length;
-    const avg = new Array(dim).fill(0);
-    for (const vec of vectors) {
-      for (let i = 0; i < dim; i++) {
-        avg[i] += vec[i];
+  /**
+   * Update avg_embedding and centroids after messages were appended to each
+   * conversation in `items`. Both are updated incrementally; conversations
+   * due an exact avg_embedding recompute also get their centroids rebuilt.
+   */
+  private async updateAggregates(
+    client: pg.PoolClient,
+    items: { id: string; messages: { embedding: number[] | null }[] }[],
+  ): Promise<void> {
+    const recomputed = await this.applyEmbeddingDeltas(
+      client,
+      items
+        .map((t) => embeddingDelta(t.id, t.messages))
+        .filter((d): d is EmbeddingDelta => d !== null),
+    );
+
+    for (const item of items) {
+      if (recomputed.has(item.id)) {
+        await this.recomputeCentroids(client, item.id);
+      } else {
+        const vectors = item.messages
+          .map((m) => m.embedding)
+          .filter((v): v is number[] => v !== null && v.length > 0);
+        await this.updateCentroids(client, item.id, vectors);
       }
     }
-    for (let i = 0; i < dim; i++) {
-      avg[i] /= vectors.length;
-    }
-
-    await client.query(
-      `UPDATE conversations SET avg_embedding = $1::vector WHERE id = $2`,
-      [JSON.stringify(avg), conversationId],
-    );
   }
 
   private async recomputeCentroids(
@@ -129,7 +461,7 @@ export class ConversationPostgresRepository implements ConversationRepository {
     conversationId: string,
   ): Promise<void> {
     const result = await client.query(
-      `SELECT embedding::text FROM conversation_messages
+      `SELECT ${vectorSend("embedding")} AS embedding FROM conversation_messages
        WHERE conversation_id = $1 AND embedding IS NOT NULL`,
       [conversationId],
     );
@@ -142,40 +474,80 @@ export class ConversationPostgresRepository implements ConversationRepository {
 
     if (result.rows.length === 0) return;
 
-    const vectors = result.rows.map(
-      (r) => JSON.parse(r.embedding as string) as number[],
-    );
-    const k = Math.min(3, vectors.length);
-    const centroids = kMeans(vectors, k);
+    const vectors = result.rows.map((r) => decodeVector(r.embedding as Buffer));
+    const k = Math.min(CENTROID_K, vectors.length);
+    const centroids = await kMeansAsync(vectors, k);
+
+    const weights = new Array<number>(centroids.length).fill(0);
+    for (const vec of vectors) {
+      weights[nearestCentroid(vec, centroids)]++;
+    }
 
     for (let i = 0; i < centroids.length; i++) {
       await client.query(
-        `INSERT INTO conversation_centroids (conversation_id, idx, embedding)
-         VALUES ($1, $2, $3::vector)`,
-        [conversationId, i, JSON.stringify(centroids[i])],
+        `INSERT INTO conversation_centroids (conversation_id, idx, embedding, weight)
+         VALUES ($1, $2, $3::vector, $4)`,
+        [conversationId, i, encodeVector(centroids[i]), weights[i]],
       );
     }
   }
 
-  private async backfillCentroids(): Promise<void> {
-    const result = await this.pool.query(
-      `SELECT DISTINCT c.id
-       FROM conversations c
-       JOIN conversation_messages cm ON cm.conversation_id = c.id
-       WHERE cm.embedding IS NOT NULL
-         AND NOT EXISTS (
-           SELECT 1 FROM conversation_centroids cc WHERE cc.conversation_id = c.id
-         )`,
+  /**
+   * Fold newly appended embeddings into the stored centroids with online
+   * k-means, in time proportional to the new vectors. A centroid row is
+   * rewritten only when it moves more than CENTROID_MOVE_THRESHOLD;
+   * otherwise only its weight is updated. Falls back to a full recompute
+   * when there are no weighted centroids to start from.
+   */
+  private async updateCentroids(
+    client: pg.PoolClient,
+    conversationId: string,
+    vectors: number[][],
+  ): Promise<void> {
+    if (vectors.length === 0) return;
+
+    const result = await client.query(
+      `SELECT idx, weight, ${vectorSend("embedding")} AS embedding
+       FROM conversation_centroids
+       WHERE conversation_id = $1
+       ORDER BY idx`,
+      [conversationId],
     );
-    if (result.rows.length === 0) return;
 
-    const client = await this.pool.connect();
-    try {
-      for (const row of result.rows) {
-        await this.recomputeCentroids(client, row.id as string);
+    if (result.rows.length === 0 || result.rows.some((r) => r.weight == null)) {
+      await this.recomputeCentroids(client, conversationId);
+      return;
+    }
+
+    const before: WeightedCentroid[] = result.rows.map((r) => ({
+      vector: Array.from(decodeVector(r.embedding as Buffer)),
+      weight: r.weight as number,
+    }));
+    const after = onlineKMeansUpdate(before, vectors, CENTROID_K);
+
+    for (let i = 0; i < after.length; i++) {
+      const prev = before[i];
+      const next = after[i];
+
+      if (!prev) {
+        await client.query(
+          `INSERT INTO conversation_centroids (conversation_id, idx, embedding, weight)
+           VALUES ($1, $2, $3::vector, $4)`,
+          [conversationId, i, encodeVector(next.vector), next.weight],
+        );
+      } else if (euclideanDistance(prev.vector, next.vector) > CENTROID_MOVE_THRESHOLD) {
+        await client.query(
+          `UPDATE conversation_centroids SET embedding = $3::vector, weight = $4
+           WHERE conversation_id = $1 AND idx = $2`,
+          [conversationId, i, encodeVector(next.vector), next.weight],
+        );
+      } else if (next.weight !== prev.weight) {
+        await client.query(
+          `UPDATE conversation_centroids SET weight = $3
+           WHERE conversation_id = $1 AND idx = $2`,
+          [conversationId, i, next.weight],
+        );
       }
-    } finally {
-      client.release();
     }
   }
 
@@ -203,7 +575,7 @@ export class ConversationPostgresRepository implements ConversationRepository {
               `INSERT INTO conversation_messages (conversation_id, role, content, position, embedding)
                VALUES ($1, $2, $3, $4, $5::vector)
                RETURNING id, conversation_id, role, content, position, created_at`,
-              [conv.id, msg.role, msg.content, i, JSON.stringify(msg.embedding)],
+              [conv.id, msg.role, msg.content, i, encodeVector(msg.embedding!)],
             )
           : await client.query(
               `INSERT INTO conversation_messages (conversation_id, role, content, position)
@@ -215,8 +587,7 @@ export class ConversationPostgresRepository implements ConversationRepository {
         messages.push(this.rowToMessage(msgResult.rows[0]));
       }
 
-      await this.recomputeAvgEmbedding(client, conv.id as string);
-      await this.recomputeCentroids(client, conv.id as string);
+      await this.updateAggregates(client, [{ id: conv.id as string, messages: params.messages }]);
       await client.query("COMMIT");
 
       return {
@@ -323,7 +694,7 @@ export class ConversationPostgresRepository implements ConversationRepository {
             await client.query(
               `INSERT INTO conversation_messages (conversation_id, role, content, position, embedding)
                VALUES ($1, $2, $3, $4, $5::vector)`,
-              [conversationId, msg.role, msg.content, nextPosition, JSON.stringify(msg.embedding)],
+              [conversationId, msg.role, msg.content, nextPosition, encodeVector(msg.embedding!)],
             );
           } else {
             await client.query(
@@ -340,10 +711,10 @@ export class ConversationPostgresRepository implements ConversationRepository {
           `UPDATE conversations SET updated_at = now() WHERE id = $1`,
           [conversationId],
         );
+
+        await this.updateAggregates(client, [{ id: conversationId, messages: params.messages }]);
       }
 
-      await this.recomputeAvgEmbedding(client, conversationId);
-      await this.recomputeCentroids(client, conversationId);
       await client.query("COMMIT");
 
       return (await this.getById(conversationId))!;
@@ -355,14 +726,162 @@ export class ConversationPostgresRepository implements ConversationRepository {
     }
   }
 
+  async bulkUpsert(items: UpsertConversationParams[]): Promise<Conversation[]> {
+    const merged = mergeBySourceId(items);
+    if (merged.length === 0) return [];
+
+    const client = await this.pool.connect();
+    try {
+      await client.query("BEGIN");
+
+      const rows = JSON.stringify(
+        merged.map((p) => ({
+          source_id: p.sourceId,
+          title: p.title ?? null,
+          source: p.source ?? null,
+          tags: p.tags ?? null,
+          user_id: p.userId ?? null,
+        })),
+      );
+
+      // Create missing conversations, then apply metadata that was provided.
+      await client.query(
+        `INSERT INTO conversations (title, source, source_id, tags, user_id)
+         SELECT COALESCE(x.title, ''), COALESCE(x.source, ''), x.source_id,
+                COALESCE(x.tags, '{}'), x.user_id
+         FROM jsonb_to_recordset($1::jsonb)
+           AS x(source_id TEXT, title TEXT, source TEXT, tags TEXT[], user_id TEXT)
+         ON CONFLICT (source_id) WHERE source_id IS NOT NULL DO NOTHING`,
+        [rows],
+      );
+      await client.query(
+        `UPDATE conversations c
+         SET title = COALESCE(x.title, c.title),
+             source = COALESCE(x.source, c.source),
+             tags = COALESCE(x.tags, c.tags),
+             user_id = COALESCE(x.user_id, c.user_id),
+             updated_at = now()
+         FROM jsonb_to_recordset($1::jsonb)
+           AS x(source_id TEXT, title TEXT, source TEXT, tags TEXT[], user_id TEXT)
+         WHERE c.source_id = x.source_id
+           AND (x.title IS NOT NULL OR x.source IS NOT NULL
+                OR x.tags IS NOT NULL OR x.user_id IS NOT NULL)`,
+        [rows],
+      );
+
+      const idResult = await client.query(
+        `SELECT id, source_id FROM conversations WHERE source_id = ANY($1::text[])`,
+        [merged.map((p) => p.sourceId)],
+      );
+      const idBySourceId = new Map<string, string>(
+        idResult.rows.map((r) => [r.source_id as string, r.id as string]),
+      );
+      const ids = merged.map((p) => idBySourceId.get(p.sourceId)!);
+
+      // Append messages with multi-row inserts after each conversation's
+      // current last position.
+      const touched = merged
+        .map((p, i) => ({ id: ids[i], messages: p.messages ?? [] }))
+        .filter((t) => t.messages.length > 0);
+
+      if (touched.length > 0) {
+        const touchedIds = touched.map((t) => t.id);
+        const posResult = await client.query(
+          `SELECT conversation_id, MAX(position) AS max_pos
+           FROM conversation_messages
+           WHERE conversation_id = ANY($1::uuid[])
+           GROUP BY conversation_id`,
+          [touchedIds],
+        );
+        const maxPos = new Map<string, number>(
+          posResult.rows.map((r) => [r.conversation_id as string, r.max_pos as number]),
+        );
+
+        const convIds: string[] = [];
+        const roles: string[] = [];
+        const contents: string[] = [];
+        const positions: number[] = [];
+        const embeddings: (number[] | null)[] = [];
+        for (const t of touched) {
+          let nextPosition = (maxPos.get(t.id) ?? -1) + 1;
+          for (const msg of t.messages) {
+            convIds.push(t.id);
+            roles.push(msg.role);
+            contents.push(msg.content);
+            positions.push(nextPosition++);
+            embeddings.push(
+              msg.embedding && msg.embedding.length > 0 ? msg.embedding : null,
+            );
+          }
+        }
+
+        const oid = await this.vectorOid();
+        for (let start = 0; start < convIds.length; start += BULK_INSERT_CHUNK) {
+          const end = start + BULK_INSERT_CHUNK;
+          await client.query(
+            `INSERT INTO conversation_messages (conversation_id, role, content, position, embedding)
+             SELECT * FROM unnest($1::uuid[], $2::text[], $3::text[], $4::int[], $5::vector[])`,
+            [
+              convIds.slice(start, end),
+              roles.slice(start, end),
+              contents.slice(start, end),
+              positions.slice(start, end),
+              encodeVectorArray(embeddings.slice(start, end), oid),
+            ],
+          );
+        }
+
+        await client.query(
+          `UPDATE conversations SET updated_at = now() WHERE id = ANY($1::uuid[])`,
+          [touchedIds],
+        );
+
+        // One aggregate update pass for the whole batch instead of one per item.
+        await this.updateAggregates(client, touched);
+      }
+
+      const convResult = await client.query(
+        `SELECT id, title, source, source_id, user_id, tags, created_at, updated_at
+         FROM conversations WHERE id = ANY($1::uuid[])`,
+        [ids],
+      );
+      await client.query("COMMIT");
+
+      const byId = new Map(convResult.rows.map((r) => [r.id as string, r]));
+      return ids.map((id) => this.rowToConversation(byId.get(id)!));
+    } catch (err) {
+      await client.query("ROLLBACK");
+      throw err;
+    } finally {
+      client.release();
+    }
+  }
+
   async search(params: SearchConversationParams): Promise<Conversation[]> {
-    const limit = params.limit ?? 10;
+    const requested = params.limit ?? 10;
+    // With diversity, rank a larger pool for scoredConversations to re-rank.
+    const limit = (params.diversity ?? 0) > 0
+      ? Math.max(requested, Math.min(MMR_MAX_CANDIDATES, requested * MMR_OVERSAMPLE))
+      : requested;
+    const hasEmbedding = params.queryEmbedding && params.queryEmbedding.length > 0;
+
+    // Until the tsvector columns are filled, hybrid searches fall back to
+    // vector search.
+    const textReady = this.messageTextReady && this.titleTextReady;
+    if (hasEmbedding && params.mode === "hybrid" && params.query && textReady) {
+      return this.hybridSearch(params, limit);
+    }
 
-    if (params.queryEmbedding && params.queryEmbedding.length > 0) {
+    if (hasEmbedding && params.mode !== "text") {
       return this.vectorSearch(params, limit);
     }
 
-    return this.textSearch(params, limit);
+    // Semantic search without a query embedding: degrade to trigram similarity.
+    if (params.query && params.mode !== "text") {
+      return this.degradedSearch(params, limit);
+    }
+
+    return this.textSearch(params, requested);
   }
 
   private shouldIncludeAvgEmbedding(include?: string[]): boolean {
@@ -373,61 +892,259 @@ export class ConversationPostgresRepository implements ConversationRepository {
     return include?.includes("centroids") ?? false;
   }
 
-  private async vectorSearch(
-    params: SearchConversationParams,
-    limit: number,
-  ): Promise<Conversation[]> {
+  private get useAnn(): boolean {
+    return !this.ann.exact && this.annReady;
+  }
+
+  /** `AND ...` conditions on `c` for the tag and user filters, appended to `values`. */
+  private filterConditions(params: SearchConversationParams, values: unknown[]): string {
     const conditions: string[] = [];
-    const values: unknown[] = [
-      JSON.stringify(params.queryEmbedding),
-      limit,
-    ];
-    let nextIdx = 3;
 
     if (params.tags && params.tags.length > 0) {
-      conditions.push(`AND c.tags && $${nextIdx}`);
       values.push(params.tags);
-      nextIdx++;
+      conditions.push(`AND c.tags && $${values.length}`);
     }
 
     if (params.userId) {
-      conditions.push(`AND c.user_id = $${nextIdx}`);
       values.push(params.userId);
-      nextIdx++;
+      conditions.push(`AND c.user_id = $${values.length}`);
     }
 
-    const extraConditions = conditions.join(" ");
+    return conditions.join(" ");
+  }
 
-    const result = await this.pool.query(
-      `WITH ranked AS (
-        SELECT cm.conversation_id,
-               MIN(cm.embedding <=> $1::vector) AS best_distance
+  private async vectorSearch(
+    params: SearchConversationParams,
+    limit: number,
+  ): Promise<Conversation[]> {
+    const values: unknown[] = [encodeVector(params.queryEmbedding!), limit];
+    const extraConditions = this.filterConditions(params, values);
+
+    // Read once: the parameter list and the SQL must agree if annReady flips.
+    const useAnn = this.useAnn;
+    const candidates = candidateCount(this.ann, limit, ANN_OVERSAMPLE);
+    if (useAnn) values.push(candidates);
+
+    const result = await this.runRanking(
+      useAnn,
+      `WITH ranked AS (${this.closestMessageSql(useAnn, extraConditions, `$${values.length}`, "$2")})
+       SELECT conversation_id, 1 - best_distance AS score FROM ranked`,
+      values,
+      candidates,
+    );
+
+    return this.scoredConversations(result.rows, params);
+  }
+
+  /**
+   * Fuse the closest-message vector ranking with a full-text ranking over
+   * message content and titles by reciprocal rank fusion, in one query.
+   * Scores are RRF scores, not similarities.
+   */
+  private async hybridSearch(
+    params: SearchConversationParams,
+    limit: number,
+  ): Promise<Conversation[]> {
+    const values: unknown[] = [encodeVector(params.queryEmbedding!), limit, params.query];
+    const extraConditions = this.filterConditions(params, values);
+    const candidates = candidateCount(this.ann, limit, ANN_OVERSAMPLE);
+    values.push(candidates);
+    const candidatesParam = `$${values.length}`;
+    const tsq = tsQuery("$3");
+    const useAnn = this.useAnn;
+
+    const result = await this.runRanking(
+      useAnn,
+      `WITH vector_ranked AS (
+        SELECT conversation_id, ROW_NUMBER() OVER (ORDER BY best_distance) AS rank
+        FROM (${this.closestMessageSql(useAnn, extraConditions, candidatesParam, candidatesParam)}) v
+      ),
+      text_hits AS (
+        SELECT cm.conversation_id, ts_rank_cd(cm.content_tsv, ${tsq}) AS text_rank
         FROM conversation_messages cm
         JOIN conversations c ON c.id = cm.conversation_id
-        WHERE cm.embedding IS NOT NULL ${extraConditions}
-        GROUP BY cm.conversation_id
-        ORDER BY best_distance ASC
-        LIMIT $2
+        WHERE cm.content_tsv @@ ${tsq} ${extraConditions}
+        UNION ALL
+        SELECT c.id, ts_rank_cd(c.title_tsv, ${tsq})
+        FROM conversations c
+        WHERE c.title_tsv @@ ${tsq} ${extraConditions}
+      ),
+      text_ranked AS (
+        SELECT conversation_id, ROW_NUMBER() OVER (ORDER BY MAX(text_rank) DESC) AS rank
+        FROM text_hits
+        GROUP BY conversation_id
+        ORDER BY rank
+        LIMIT ${candidatesParam}
       )
-      SELECT conversation_id, 1 - best_distance AS score FROM ranked`,
+      ${reciprocalRankFusion("conversation_id", ["vector_ranked", "text_ranked"])}
+      ORDER BY score DESC
+      LIMIT $2`,
       values,
+      candidates,
     );
 
-    if (result.rows.length === 0) return [];
+    return this.scoredConversations(result.rows, params);
+  }
+
+  /**
+   * SQL ranking conversations by their closest message, as
+   * (conversation_id, best_distance) rows; the query vector is $1. With
+   * `useAnn`, `candidatesParam` candidate messages come from the HNSW index and
+   * are re-ranked against the full embedding; otherwise every embedded
+   * message is scanned and `candidatesParam` is not referenced.
+   */
+  private closestMessageSql(
+    useAnn: boolean,
+    extraConditions: string,
+    candidatesParam: string,
+    limitParam: string,
+  ): string {
+    const query = vectorParam("$1", this.messageEmbeddingType);
+
+    if (!useAnn) {
+      return `
+        SELECT cm.conversation_id, MIN(cm.embedding <=> ${query}) AS best_distance
+        FROM conversation_messages cm
+        JOIN conversations c ON c.id = cm.conversation_id
+        WHERE cm.embedding IS NOT NULL ${extraConditions}
+        GROUP BY cm.conversation_id
+        ORDER BY best_distance ASC
+        LIMIT ${limitParam}`;
+    }
+
+    const ann = annColumn(this.storage);
+    const join = extraConditions
+      ? "JOIN conversations c ON c.id = cm.conversation_id"
+      : "";
+
+    return `
+      SELECT cm.conversation_id, MIN(cm.embedding <=> ${query}) AS best_distance
+      FROM (
+        SELECT cm.id
+        FROM conversation_messages cm
+        ${join}
+        WHERE cm.${ann.name} IS NOT NULL ${extraConditions}
+        ORDER BY cm.${ann.name} ${ann.operator} ${ann.project(query)}
+        LIMIT ${candidatesParam}
+      ) candidates
+      JOIN conversation_messages cm USING (id)
+      GROUP BY cm.conversation_id
+      ORDER BY best_distance ASC
+      LIMIT ${limitParam}`;
+  }
+
+  /** Run a ranking query built on closestMessageSql with the right settings. */
+  private async runRanking(
+    useAnn: boolean,
+    sql: string,
+    values: unknown[],
+    candidates: number,
+  ): Promise<pg.QueryResult> {
+    if (!useAnn) return this.pool.query(sql, values);
+    return withAnnSettings(this.pool, this.ann, candidates, (client) => client.query(sql, values));
+  }
+
+  /**
+   * Load ranked (conversation_id, score) rows as conversations, best first,
+   * or in maximal-marginal-relevance order when `params.diversity` is set.
+   */
+  private async scoredConversations(
+    rows: Record<string, unknown>[],
+    params: SearchConversationParams,
+  ): Promise<Conversation[]> {
+    if (rows.length === 0) return [];
 
-    const ids = result.rows.map((r) => r.conversation_id);
     const scoreMap = new Map(
-      result.rows.map((r) => [
-        r.conversation_id,
+      rows.map((r) => [
+        r.conversation_id as string,
         parseFloat(r.score as string),
       ]),
     );
+    const ids = (params.diversity ?? 0) > 0
+      ? await this.diverseIds([...scoreMap], params.limit ?? 10, params.diversity!)
+      : [...scoreMap.keys()];
+
+    const conversations = await this.loadConversations(ids, params);
+    const byId = new Map(conversations.map((c) => [c.id, { ...c, score: scoreMap.get(c.id) }]));
+
+    if ((params.diversity ?? 0) > 0) {
+      return ids.flatMap((id) => byId.get(id) ?? []);
+    }
+    return [...byId.values()].sort((a, b) => (b.score ?? 0) - (a.score ?? 0));
+  }
+
+  /**
+   * Pick `limit` of the scored candidates by maximal marginal relevance,
+   * treating conversations with similar average embeddings as redundant.
+   */
+  private async diverseIds(
+    scored: [string, number][],
+    limit: number,
+    diversity: number,
+  ): Promise<string[]> {
+    const result = await this.pool.query(
+      `SELECT id, ${vectorSend("avg_embedding")} AS avg_embedding
+       FROM conversations
+       WHERE id = ANY($1::uuid[]) AND avg_embedding IS NOT NULL`,
+      [scored.map(([id]) => id)],
+    );
+    const embeddings = new Map(
+      result.rows.map((r) => [r.id as string, decodeVector(r.avg_embedding as Buffer)]),
+    );
+
+    const order = mmrSelect(
+      scored.map(([id, score]) => ({ score, embedding: embeddings.get(id) ?? null })),
+      limit,
+      diversity,
+    );
+    return order.map((i) => scored[i][0]);
+  }
+
+  /**
+   * Rank conversations by the trigram word similarity of their best
+   * matching message or title, within the degraded latency budget; falls
+   * back to the substring match if the budget runs out. Scores are word
+   * similarities.
+   */
+  private async degradedSearch(
+    params: SearchConversationParams,
+    limit: number,
+  ): Promise<Conversation[]> {
+    const values: unknown[] = [params.query, limit];
+    const extraConditions = this.filterConditions(params, values);
+    const join = extraConditions
+      ? "JOIN conversations c ON c.id = cm.conversation_id"
+      : "";
+
+    const result = await withLatencyBudget(this.pool, this.degradedBudgetMs, (client) =>
+      client.query(
+        `WITH hits AS (
+          SELECT cm.conversation_id, word_similarity($1, cm.content) AS similarity
+          FROM conversation_messages cm
+          ${join}
+          WHERE $1 <% cm.content ${extraConditions}
+          UNION ALL
+          SELECT c.id, word_similarity($1, c.title)
+          FROM conversations c
+          WHERE $1 <% c.title ${extraConditions}
+        )
+        SELECT conversation_id, MAX(similarity) AS score
+        FROM hits
+        GROUP BY conversation_id
+        ORDER BY score DESC
+        LIMIT $2`,
+        values,
+      ),
+    );
 
-    const conversations = await this.fetchConversationsByIds(ids, params.include);
+    if (!result) {
+      console.warn(
+        `Degraded conversation search exceeded ${this.degradedBudgetMs}ms; using substring match`,
+      );
+      return this.textSearch(params, params.limit ?? 10);
+    }
 
-    return conversations
-      .map((c) => ({ ...c, score: scoreMap.get(c.id) }))
-      .sort((a, b) => (b.score ?? 0) - (a.score ?? 0));
+    return this.scoredConversations(result.rows, params);
   }
 
   private async textSearch(
@@ -461,16 +1178,22 @@ export class ConversationPostgresRepository implements ConversationRepository {
       idx++;
     }
 
+    if (params.after) {
+      conditions.push(recencyAfter("c.", `$${idx}`, `$${idx + 1}`));
+      values.push(params.after.createdAt, params.after.id);
+      idx += 2;
+    }
+
     const where =
       conditions.length > 0 ? `WHERE ${conditions.join(" AND ")}` : "";
 
     values.push(limit);
 
     const result = await this.pool.query(
-      `SELECT c.id, c.title, c.source, c.source_id, c.user_id, c.tags, c.created_at, c.updated_at
+      `SELECT c.id
        FROM conversations c
        ${where}
-       ORDER BY c.created_at DESC
+       ORDER BY ${recencyOrder("c.")}
        LIMIT $${idx}`,
       values,
     );
@@ -478,10 +1201,10 @@ export class ConversationPostgresRepository implements ConversationRepository {
     if (result.rows.length === 0) return [];
 
     const ids = result.rows.map((r) => r.id);
-    return this.fetchConversationsByIds(ids, params.include);
+    return this.loadConversations(ids, params);
   }
 
-  async getById(id: string): Promise<Conversation | null> {
+  async getById(id: string, page?: MessagePage): Promise<Conversation | null> {
     const convResult = await this.pool.query(
       `SELECT id, title, source, source_id, user_id, tags, created_at, updated_at
        FROM conversations WHERE id = $1`,
@@ -490,13 +1213,22 @@ export class ConversationPostgresRepository implements ConversationRepository {
 
     if (convResult.rows.length === 0) return null;
 
-    const msgResult = await this.pool.query(
-      `SELECT id, conversation_id, role, content, position, created_at
-       FROM conversation_messages
-       WHERE conversation_id = $1
-       ORDER BY position ASC`,
-      [id],
-    );
+    const msgResult = page
+      ? await this.pool.query(
+          `SELECT id, conversation_id, role, content, position, created_at
+           FROM conversation_messages
+           WHERE conversation_id = $1 AND position > $2
+           ORDER BY position ASC
+           LIMIT $3`,
+          [id, page.afterPosition ?? -1, page.limit],
+        )
+      : await this.pool.query(
+          `SELECT id, conversation_id, role, content, position, created_at
+           FROM conversation_messages
+           WHERE conversation_id = $1
+           ORDER BY position ASC`,
+          [id],
+        );
 
     return {
       ...this.rowToConversation(convResult.rows[0]),
@@ -504,6 +1236,170 @@ export class ConversationPostgresRepository implements ConversationRepository {
     };
   }
 
+  async getByIds(ids: string[], messageLimit?: number): Promise<Conversation[]> {
+    if (ids.length === 0) return [];
+
+    const convResult = await this.pool.query(
+      `SELECT id, title, source, source_id, user_id, tags, created_at, updated_at
+       FROM conversations WHERE id = ANY($1::uuid[])`,
+      [ids],
+    );
+    if (convResult.rows.length === 0) return [];
+    const found = convResult.rows.map((r) => r.id as string);
+
+    // With a limit, each conversation's first messages come from one index
+    // range scan of (conversation_id, position).
+    const msgResult = messageLimit !== undefined
+      ? await this.pool.query(
+          `SELECT m.id, m.conversation_id, m.role, m.content, m.position, m.created_at
+           FROM unnest($1::uuid[]) AS c(id)
+           CROSS JOIN LATERAL (
+             SELECT id, conversation_id, role, content, position, created_at
+             FROM conversation_messages
+             WHERE conversation_id = c.id
+             ORDER BY position ASC
+             LIMIT $2
+           ) m
+           ORDER BY m.conversation_id, m.position`,
+          [found, messageLimit],
+        )
+      : await this.pool.query(
+          `SELECT id, conversation_id, role, content, position, created_at
+           FROM conversation_messages
+           WHERE conversation_id = ANY($1::uuid[])
+           ORDER BY conversation_id, position ASC`,
+          [found],
+        );
+
+    const messagesByConv = new Map<string, ConversationMessage[]>();
+    for (const row of msgResult.rows) {
+      const list = messagesByConv.get(row.conversation_id as string) ?? [];
+      list.push(this.rowToMessage(row));
+      messagesByConv.set(row.conversation_id as string, list);
+    }
+
+    return convResult.rows.map((row) => ({
+      ...this.rowToConversation(row),
+      messages: messagesByConv.get(row.id as string) ?? [],
+    }));
+  }
+
+  /** Load search hits in `ids` order, in the result shape `params.view` asks for. */
+  private async loadConversations(
+    ids: string[],
+    params: SearchConversationParams,
+  ): Promise<Conversation[]> {
+    const conversations = params.view === "summary"
+      ? await this.fetchConversationSummaries(ids, params)
+      : await this.fetchConversationsByIds(ids, params.include);
+    const byId = new Map(conversations.map((c) => [c.id, c]));
+    return ids.flatMap((id) => byId.get(id) ?? []);
+  }
+
+  /**
+   * Load conversations without their messages: a message count and the
+   * message that best matches the search, ranked the way the search ranks
+   * (embedding distance, substring match or trigram similarity), cut to a
+   * snippet. Only the snippet of one message per conversation is read.
+   */
+  private async fetchConversationSummaries(
+    ids: string[],
+    params: SearchConversationParams,
+  ): Promise<Conversation[]> {
+    if (ids.length === 0) return [];
+
+    const extraCols = this.shouldIncludeAvgEmbedding(params.include)
+      ? `, ${vectorSend("c.avg_embedding")} AS avg_embedding`
+      : "";
+
+    const convResult = await this.pool.query(
+      `SELECT c.id, c.title, c.source, c.source_id, c.user_id, c.tags, c.created_at, c.updated_at,
+              (SELECT COUNT(*) FROM conversation_messages cm WHERE cm.conversation_id = c.id)
+                AS message_count${extraCols}
+       FROM conversations c WHERE c.id = ANY($1::uuid[])`,
+      [ids],
+    );
+
+    const bestMatches = await this.fetchBestMatches(ids, params);
+    const centroidsByConv = this.shouldIncludeCentroids(params.include)
+      ? await this.fetchCentroids(ids)
+      : null;
+
+    return convResult.rows.map((row) => {
+      const conv: Conversation = {
+        ...this.rowToConversation(row),
+        messageCount: Number(row.message_count),
+      };
+      if (bestMatches) {
+        conv.bestMatch = bestMatches.get(row.id as string) ?? null;
+      }
+      if (centroidsByConv) {
+        conv.centroids = centroidsByConv.get(row.id as string) ?? null;
+      }
+      return conv;
+    });
+  }
+
+  /** Best-matching message snippet per conversation; null without a query. */
+  private async fetchBestMatches(
+    ids: string[],
+    params: SearchConversationParams,
+  ): Promise<Map<string, MessageSnippet> | null> {
+    const values: unknown[] = [ids, SNIPPET_LENGTH];
+    let condition: string;
+    let order: string;
+
+    if (params.queryEmbedding && params.queryEmbedding.length > 0 && params.mode !== "text") {
+      values.push(encodeVector(params.queryEmbedding));
+      condition = "cm.embedding IS NOT NULL";
+      order = `cm.embedding <=> ${vectorParam("$3", this.messageEmbeddingType)}`;
+    } else if (params.query && params.mode === "text") {
+      values.push(`%${params.query}%`);
+      condition = "cm.content ILIKE $3";
+      order = "cm.position";
+    } else if (params.query) {
+      values.push(params.query);
+      condition = "$3 <% cm.content";
+      order = "word_similarity($3, cm.content) DESC";
+    } else {
+      return null;
+    }
+
+    const result = await this.pool.query(
+      `SELECT DISTINCT ON (cm.conversation_id)
+              cm.conversation_id, cm.position, cm.role, LEFT(cm.content, $2) AS snippet
+       FROM conversation_messages cm
+       WHERE cm.conversation_id = ANY($1::uuid[]) AND ${condition}
+       ORDER BY cm.conversation_id, ${order}, cm.position`,
+      values,
+    );
+
+    return new Map(
+      result.rows.map((r) => [
+        r.conversation_id as string,
+        { position: r.position as number, role: r.role as string, snippet: r.snippet as string },
+      ]),
+    );
+  }
+
+  private async fetchCentroids(ids: string[]): Promise<Map<string, number[][]>> {
+    const result = await this.pool.query(
+      `SELECT conversation_id, idx, ${vectorSend("embedding")} AS embedding
+       FROM conversation_centroids
+       WHERE conversation_id = ANY($1::uuid[])
+       ORDER BY conversation_id, idx`,
+      [ids],
+    );
+    const centroidsByConv = new Map<string, number[][]>();
+    for (const row of result.rows) {
+      const convId = row.conversation_id as string;
+      const existing = centroidsByConv.get(convId) ?? [];
+      existing.push(Array.from(decodeVector(row.embedding as Buffer)));
+      centroidsByConv.set(convId, existing);
+    }
+    return centroidsByConv;
+  }
+
   private async fetchConversationsByIds(
     ids: string[],
     include?: string[],
@@ -512,7 +1408,7 @@ export class ConversationPostgresRepository implements ConversationRepository {
 
     const placeholders = ids.map((_, i) => `$${i + 1}`).join(", ");
     const extraCols = this.shouldIncludeAvgEmbedding(include)
-      ? ", avg_embedding"
+      ? `, ${vectorSend("avg_embedding")} AS avg_embedding`
       : "";
 
     const convResult = await this.pool.query(
@@ -537,25 +1433,9 @@ export class ConversationPostgresRepository implements ConversationRepository {
       msgsByConv.set(msg.conversationId, existing);
     }
 
-    // Optionally fetch centroids
-    let centroidsByConv: Map<string, number[][]> | null = null;
-    if (this.shouldIncludeCentroids(include)) {
-      const centroidResult = await this.pool.query(
-        `SELECT conversation_id, idx, embedding::text
-         FROM conversation_centroids
-         WHERE conversation_id IN (${placeholders})
-         ORDER BY conversation_id, idx`,
-        ids,
-      );
-      centroidsByConv = new Map();
-      for (const row of centroidResult.rows) {
-        const convId = row.conversation_id as string;
-        const embedding = JSON.parse(row.embedding as string) as number[];
-        const existing = centroidsByConv.get(convId) ?? [];
-        existing.push(embedding);
-        centroidsByConv.set(convId, existing);
-      }
-    }
+    const centroidsByConv = this.shouldIncludeCentroids(include)
+      ? await this.fetchCentroids(ids)
+      : null;
 
     return convResult.rows.map((row) => {
       const conv: Conversation = {
@@ -569,6 +1449,48 @@ export class ConversationPostgresRepository implements ConversationRepository {
     });
   }
 
+  exportRecords(options: ExportOptions): AsyncGenerator<ExportRecord> {
+    return inSnapshot(this.pool, (client) => this.exportConversations(client, options));
+  }
+
+  /**
+   * Walk conversations and messages with one cursor each, both in
+   * conversation id order, merging them so that each conversation is
+   * followed by its messages.
+   */
+  private async *exportConversations(
+    client: pg.PoolClient,
+    options: ExportOptions,
+  ): AsyncGenerator<ExportRecord> {
+    const embedding = options.embeddings ? `, ${vectorSend("embedding")} AS embedding` : "";
+    const conversations = cursorRows(
+      client,
+      "export_conversations",
+      `SELECT id, title, source, source_id, user_id, tags, created_at, updated_at
+       FROM conversations ORDER BY id`,
+    );
+    const messages = cursorRows(
+      client,
+      "export_messages",
+      `SELECT id, conversation_id, role, content, position, created_at${embedding}
+       FROM conversation_messages ORDER BY conversation_id, position`,
+    );
+
+    let next = await messages.next();
+    for await (const row of conversations) {
+      const conversation = this.rowToConversation(row);
+      yield { type: "conversation", ...conversation };
+
+      while (!next.done && next.value.conversation_id === conversation.id) {
+        const message = this.rowToMessage(next.value);
+        yield options.embeddings
+          ? { type: "message", ...message, embedding: exportedEmbedding(next.value.embedding) }
+          : { type: "message", ...message };
+        next = await messages.next();
+      }
+    }
+  }
+
   async healthCheck(): Promise<boolean> {
     try {
       await this.pool.query("SELECT 1");
@@ -597,7 +1519,7 @@ export class ConversationPostgresRepository implements ConversationRepository {
       conv.score = parseFloat(row.score as string);
     }
     if (row.avg_embedding != null) {
-      conv.avgEmbedding = JSON.parse(row.avg_embedding as string) as number[];
+      conv.avgEmbedding = Array.from(decodeVector(row.avg_embedding as Buffer));
     }
     return conv;
   }
@@ -1,4 +1,7 @@
-import type { Conversation } from "../types/conversation.js";
+import type { Conversation, ConversationView } from "../types/conversation.js";
+import type { SearchMode } from "../types/search.js";
+import type { ExportOptions, ExportRecord } from "../types/export.js";
+import type { RecencyKey } from "./pagination.js";
 
 export interface StoreConversationParams {
   title: string;
@@ -33,15 +36,46 @@ export interface SearchConversationParams {
   queryEmbedding?: number[] | null;
   limit?: number;
   include?: string[];
+  mode?: SearchMode;
+  /**
+   * 0–1 trade-off between relevance and diversity for ranked searches:
+   * results are re-ranked by maximal marginal relevance over the
+   * conversations' average embeddings. 0 (the default) keeps pure relevance.
+   */
+  diversity?: number;
+  /** Result shape; defaults to "full". */
+  view?: ConversationView;
+  /** Page through a substring-match or unfiltered listing, newest first, after this key. */
+  after?: RecencyKey;
+}
+
+/** A page of a conversation's messages, in position order. */
+export interface MessagePage {
+  /** Return messages after this position; from the start when omitted. */
+  afterPosition?: number;
+  limit: number;
 }
 
 export interface ConversationRepository {
   initialize(): Promise<void>;
   store(params: StoreConversationParams): Promise<Conversation>;
   search(params: SearchConversationParams): Promise<Conversation[]>;
-  getById(id: string): Promise<Conversation | null>;
+  /** Load a conversation with all its messages, or one page of them. */
+  getById(id: string, page?: MessagePage): Promise<Conversation | null>;
+  /**
+   * Load several conversations with their messages, or the first
+   * `messageLimit` of each. Ids that do not exist are left out.
+   */
+  getByIds(ids: string[], messageLimit?: number): Promise<Conversation[]>;
   findBySourceId(sourceId: string): Promise<Conversation | null>;
   upsert(params: UpsertConversationParams): Promise<Conversation>;
+  /**
+   * Upsert many conversations in one transaction. Returns one conversation
+   * (without messages) per distinct sourceId, in first-seen order.
+   */
+  bulkUpsert(params: UpsertConversationParams[]): Promise<Conversation[]>;
+  /** Stream every conversation, each followed by its messages, in id order. */
+  exportRecords(options: ExportOptions): AsyncIterable<ExportRecord>;
   healthCheck(): Promise<boolean>;
   close(): Promise<void>;
 }
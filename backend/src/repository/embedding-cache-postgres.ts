@@ -0,0 +1,72 @@
+import pg from "pg";
+import type { EmbeddingCacheStore } from "./embedding-cache-types.js";
+import { vectorSend, vectorTypeOid } from "./storage.js";
+import { decodeVector, encodeVectorArray } from "../utils/vector-codec.js";
+
+// The embedding column is left without a dimension so that switching
+// EMBEDDING_MODEL never requires a migration — rows are keyed by model.
+const SCHEMA_SQL = `
+CREATE EXTENSION IF NOT EXISTS vector;
+
+CREATE TABLE IF NOT EXISTS embedding_cache (
+  model TEXT NOT NULL,
+  content_hash TEXT NOT NULL,
+  embedding vector NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (model, content_hash)
+);
+`;
+
+export class EmbeddingCachePostgresStore implements EmbeddingCacheStore {
+  private pool: pg.Pool;
+  private vectorOidPromise?: Promise<number>;
+
+  constructor(connectionString: string) {
+    this.pool = new pg.Pool({ connectionString });
+  }
+
+  async initialize(): Promise<void> {
+    await this.pool.query(SCHEMA_SQL);
+  }
+
+  async getMany(model: string, hashes: string[]): Promise<Map<string, number[]>> {
+    const found = new Map<string, number[]>();
+    if (hashes.length === 0) return found;
+
+    const result = await this.pool.query(
+      `SELECT content_hash, ${vectorSend("embedding")} AS embedding FROM embedding_cache
+       WHERE model = $1 AND content_hash = ANY($2::text[])`,
+      [model, hashes],
+    );
+
+    for (const row of result.rows) {
+      found.set(row.content_hash as string, Array.from(decodeVector(row.embedding as Buffer)));
+    }
+    return found;
+  }
+
+  async putMany(model: string, entries: { hash: string; embedding: number[] }[]): Promise<void> {
+    if (entries.length === 0) return;
+
+    await this.pool.query(
+      `INSERT INTO embedding_cache (model, content_hash, embedding)
+       SELECT $1, x.content_hash, x.embedding
+       FROM unnest($2::text[], $3::vector[]) AS x(content_hash, embedding)
+       ON CONFLICT (model, content_hash) DO NOTHING`,
+      [
+        model,
+        entries.map((e) => e.hash),
+        encodeVectorArray(entries.map((e) => e.embedding), await this.vectorOid()),
+      ],
+    );
+  }
+
+  private vectorOid(): Promise<number> {
+    this.vectorOidPromise ??= vectorTypeOid(this.pool);
+    return this.vectorOidPromise;
+  }
+
+  async close(): Promise<void> {
+    await this.pool.end();
+  }
+}
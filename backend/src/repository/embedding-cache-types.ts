@@ -0,0 +1,11 @@
+/**
+ * Persistent tier of the embedding cache: embeddings keyed by
+ * (model, sha256 of the embedded text).
+ */
+export interface EmbeddingCacheStore {
+  initialize(): Promise<void>;
+  /** Look up cached embeddings; the result only contains the hashes that were found. */
+  getMany(model: string, hashes: string[]): Promise<Map<string, number[]>>;
+  putMany(model: string, entries: { hash: string; embedding: number[] }[]): Promise<void>;
+  close(): Promise<void>;
+}
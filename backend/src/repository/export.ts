@@ -0,0 +1,52 @@
+import type pg from "pg";
+
+// Rows fetched per round trip from an export cursor.
+const EXPORT_BATCH_SIZE = 500;
+
+/**
+ * Run `fn` on a dedicated connection inside a read-only REPEATABLE READ
+ * transaction, so that everything it streams comes from one snapshot. The
+ * transaction is ended and the connection released however the consumer
+ * stops, including by abandoning the iteration.
+ */
+export async function* inSnapshot<T>(
+  pool: pg.Pool,
+  fn: (client: pg.PoolClient) => AsyncGenerator<T>,
+): AsyncGenerator<T> {
+  const client = await pool.connect();
+  let committed = false;
+  try {
+    await client.query("BEGIN ISOLATION LEVEL REPEATABLE READ READ ONLY");
+    yield* fn(client);
+    await client.query("COMMIT");
+    committed = true;
+  } finally {
+    if (!committed) {
+      await client.query("ROLLBACK").catch(() => {});
+    }
+    client.release();
+  }
+}
+
+/**
+ * Stream the rows of `sql` through a server-side cursor, so that only one
+ * batch is held in memory at a time. Must run inside a transaction, which
+ * closes the cursor when it ends.
+ */
+export async function* cursorRows(
+  client: pg.PoolClient,
+  name: string,
+  sql: string,
+): AsyncGenerator<Record<string, unknown>> {
+  await client.query(`DECLARE ${name} NO SCROLL CURSOR FOR ${sql}`);
+  for (;;) {
+    const result = await client.query(`FETCH ${EXPORT_BATCH_SIZE} FROM ${name}`);
+    if (result.rows.length === 0) return;
+    yield* result.rows;
+  }
+}
+
+/** Base64 of a `vector_send` column, or null. */
+export function exportedEmbedding(value: unknown): string | null {
+  return value ? (value as Buffer).toString("base64") : null;
+}
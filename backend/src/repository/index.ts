@@ -1,12 +1,29 @@
 export type { MemoryRepository, StoreParams, FetchParams } from "./types.js";
 export { InMemoryRepository } from "./memory.js";
 export { PostgresRepository } from "./postgres.js";
+export type { AnnSearchOptions } from "./ann.js";
+export type { TextSearchOptions } from "./text-search.js";
+export type { EmbeddingStorage } from "./storage.js";
+export type { RecencyKey } from "./pagination.js";
+export { EMBEDDING_STORAGE_MODES } from "./storage.js";
 
 export type {
   ConversationRepository,
   StoreConversationParams,
   UpsertConversationParams,
   SearchConversationParams,
+  MessagePage,
 } from "./conversation-types.js";
 export { InMemoryConversationRepository } from "./conversation-memory.js";
 export { ConversationPostgresRepository } from "./conversation-postgres.js";
+
+export type { EmbeddingCacheStore } from "./embedding-cache-types.js";
+export { EmbeddingCachePostgresStore } from "./embedding-cache-postgres.js";
+
+export type {
+  BackfillJob,
+  BackfillProgress,
+  BackfillProgressStore,
+  BackfillStatus,
+} from "./backfill-types.js";
+export { BackfillProgressPostgresStore } from "./backfill-postgres.js";
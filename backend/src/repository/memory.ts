@@ -1,6 +1,8 @@
 import { randomUUID } from "node:crypto";
 import type { Memory } from "../types/memory.js";
+import type { ExportOptions, ExportRecord } from "../types/export.js";
 import type { MemoryRepository, StoreParams, FetchParams } from "./types.js";
+import { compareRecency } from "./pagination.js";
 
 export class InMemoryRepository implements MemoryRepository {
   private memories: Memory[] = [];
@@ -20,6 +22,25 @@ export class InMemoryRepository implements MemoryRepository {
     return memory;
   }
 
+  async storeBatch(params: StoreParams[]): Promise<Memory[]> {
+    const memories: Memory[] = [];
+    for (const p of params) {
+      const existing = p.id ? this.memories.find((m) => m.id === p.id) : undefined;
+      if (existing) {
+        memories.push(existing);
+        continue;
+      }
+      const memory = await this.store(p);
+      if (p.id) memory.id = p.id;
+      if (p.createdAt) memory.createdAt = new Date(p.createdAt).toISOString();
+      memory.updatedAt = p.updatedAt
+        ? new Date(p.updatedAt).toISOString()
+        : memory.createdAt;
+      memories.push(memory);
+    }
+    return memories;
+  }
+
   async fetch(params: FetchParams): Promise<Memory[]> {
     let result = this.memories;
 
@@ -38,7 +59,24 @@ export class InMemoryRepository implements MemoryRepository {
       );
     }
 
-    return result;
+    // Listings come newest first so that `after` pages through them.
+    result = [...result].sort(compareRecency);
+    if (params.after) {
+      const after = params.after;
+      result = result.filter((m) => compareRecency(m, after) > 0);
+    }
+
+    return result.slice(0, params.limit ?? 50);
+  }
+
+  async *exportRecords(options: ExportOptions): AsyncGenerator<ExportRecord> {
+    const ordered = [...this.memories].sort((a, b) => (a.id < b.id ? -1 : 1));
+    for (const memory of ordered) {
+      // Embeddings are not kept in memory.
+      yield options.embeddings
+        ? { type: "memory", ...memory, embedding: null }
+        : { type: "memory", ...memory };
+    }
   }
 
   async healthCheck(): Promise<boolean> {
@@ -0,0 +1,58 @@
+import type pg from "pg";
+import type { BackfillJob } from "./backfill-types.js";
+import { createIndexConcurrently } from "./storage.js";
+
+/**
+ * Keyset of recency-ordered listings (newest first, ties broken by id):
+ * the createdAt and id of the last row of the previous page.
+ */
+export interface RecencyKey {
+  createdAt: string;
+  id: string;
+}
+
+// Timestamps are compared at millisecond precision, the precision of the
+// createdAt strings keys are built from, and in UTC so that the expression
+// is immutable and can be indexed.
+function recencyExpr(alias: string): string {
+  return `date_trunc('milliseconds', ${alias}created_at AT TIME ZONE 'UTC')`;
+}
+
+/** ORDER BY clause of recency listings; `alias` is e.g. "c." or "". */
+export function recencyOrder(alias = ""): string {
+  return `${recencyExpr(alias)} DESC, ${alias}id DESC`;
+}
+
+/** Condition selecting the rows after the key bound to the two parameters. */
+export function recencyAfter(alias: string, createdAtParam: string, idParam: string): string {
+  return `(${recencyExpr(alias)}, ${alias}id) < (${createdAtParam}::timestamp, ${idParam}::uuid)`;
+}
+
+/** Newest first, ties broken by id descending, as recencyOrder sorts. */
+export function compareRecency(a: RecencyKey, b: RecencyKey): number {
+  const byTime = Date.parse(b.createdAt) - Date.parse(a.createdAt);
+  if (byTime !== 0) return byTime;
+  return a.id < b.id ? 1 : a.id > b.id ? -1 : 0;
+}
+
+/** Index serving recencyOrder and recencyAfter on `table`. */
+export function recencyIndexJob(pool: pg.Pool, table: string): BackfillJob {
+  return keysetIndexJob(pool, table, `idx_${table}_recency`, `(${recencyExpr("")}) DESC, id DESC`);
+}
+
+/** Build a keyset pagination index after startup, without blocking writes. */
+export function keysetIndexJob(
+  pool: pg.Pool,
+  table: string,
+  index: string,
+  columns: string,
+): BackfillJob {
+  return {
+    name: `${table}.keyset`,
+    pending: async () => [],
+    process: async () => {},
+    async finish() {
+      await createIndexConcurrently(pool, index, `${table} (${columns})`);
+    },
+  };
+}
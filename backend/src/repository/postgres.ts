@@ -1,9 +1,46 @@
+import { randomUUID } from "node:crypto";
 import pg from "pg";
 import type { Memory } from "../types/memory.js";
+import type { ExportOptions, ExportRecord } from "../types/export.js";
 import type { MemoryRepository, StoreParams, FetchParams } from "./types.js";
+import {
+  annBackfillJob,
+  annColumn,
+  annSchemaSql,
+  candidateCount,
+  withAnnSettings,
+} from "./ann.js";
+import type { AnnSearchOptions } from "./ann.js";
+import type { BackfillJob } from "./backfill-types.js";
+import { recencyAfter, recencyIndexJob, recencyOrder } from "./pagination.js";
+import {
+  embeddingMigrationJob,
+  startEmbeddingMigration,
+  vectorParam,
+  vectorSend,
+  vectorType,
+  vectorTypeOid,
+} from "./storage.js";
+import type { VectorType } from "./storage.js";
+import { cursorRows, exportedEmbedding, inSnapshot } from "./export.js";
+import {
+  DEFAULT_DEGRADED_BUDGET_MS,
+  reciprocalRankFusion,
+  trigramIndexJob,
+  tsQuery,
+  tsvectorBackfillJob,
+  tsvectorSchemaSql,
+  withLatencyBudget,
+} from "./text-search.js";
+import type { TextSearchOptions } from "./text-search.js";
+import { encodeVector, encodeVectorArray } from "../utils/vector-codec.js";
+
+// ANN candidates fetched per requested memory before exact re-ranking.
+const ANN_OVERSAMPLE = 4;
 
 const SCHEMA_SQL = `
 CREATE EXTENSION IF NOT EXISTS vector;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 CREATE TABLE IF NOT EXISTS memories (
   id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -15,14 +52,18 @@ CREATE TABLE IF NOT EXISTS memories (
 );
 
 CREATE INDEX IF NOT EXISTS idx_memories_tags ON memories USING GIN (tags);
+${tsvectorSchemaSql("memories", "content_tsv", "content")}
 `;
 
+// Fix up embedding columns created with another dimension; columns already
+// at 4096 dims in either storage type are left to embeddingMigrationJob.
 const MIGRATION_SQL = `
 DO $$
 BEGIN
   IF EXISTS (
-    SELECT 1 FROM information_schema.columns
-    WHERE table_name = 'memories' AND column_name = 'embedding'
+    SELECT 1 FROM pg_attribute
+    WHERE attrelid = to_regclass('memories') AND attname = 'embedding' AND NOT attisdropped
+      AND format_type(atttypid, atttypmod) NOT IN ('vector(4096)', 'halfvec(4096)')
   ) THEN
     ALTER TABLE memories ALTER COLUMN embedding TYPE vector(4096);
   END IF;
@@ -31,14 +72,63 @@ END $$;
 
 export class PostgresRepository implements MemoryRepository {
   private pool: pg.Pool;
+  private ann: AnnSearchOptions;
+  private vectorOidPromise?: Promise<number>;
+  // Whether the ANN column is backfilled and indexed; searches are exact until then.
+  private annReady = false;
+  // Whether content_tsv is backfilled and indexed; hybrid search waits for it.
+  private textReady = false;
+  // Type of the embedding column; differs from the storage mode's until a
+  // storage migration has swapped the column.
+  private embeddingType: VectorType = "vector";
+  private degradedBudgetMs: number;
 
-  constructor(connectionString: string) {
+  constructor(
+    connectionString: string,
+    ann: AnnSearchOptions = {},
+    text: TextSearchOptions = {},
+  ) {
     this.pool = new pg.Pool({ connectionString });
+    this.ann = ann;
+    this.degradedBudgetMs = text.degradedBudgetMs ?? DEFAULT_DEGRADED_BUDGET_MS;
+  }
+
+  private get storage() {
+    return this.ann.storage ?? "vector";
+  }
+
+  private vectorOid(): Promise<number> {
+    this.vectorOidPromise ??= vectorTypeOid(this.pool);
+    return this.vectorOidPromise;
   }
 
   async initialize(): Promise<void> {
     await this.pool.query(MIGRATION_SQL);
     await this.pool.query(SCHEMA_SQL);
+    this.embeddingType =
+      (await startEmbeddingMigration(this.pool, "memories", "embedding", this.storage)) ??
+      vectorType(this.storage);
+    await this.pool.query(annSchemaSql("memories", this.storage));
+  }
+
+  /** Background work left by initialize(); see BackfillService. */
+  backfillJobs(): BackfillJob[] {
+    return [
+      embeddingMigrationJob(
+        this.pool,
+        "memories",
+        "embedding",
+        "id",
+        annSchemaSql("memories", this.storage),
+        () => (this.embeddingType = vectorType(this.storage)),
+      ),
+      annBackfillJob(this.pool, "memories", this.storage, () => (this.annReady = true)),
+      tsvectorBackfillJob(this.pool, "memories", "content_tsv", "content", () => {
+        this.textReady = true;
+      }),
+      trigramIndexJob(this.pool, "memories", ["content"]),
+      recencyIndexJob(this.pool, "memories"),
+    ];
   }
 
   async store(params: StoreParams): Promise<Memory> {
@@ -49,7 +139,7 @@ export class PostgresRepository implements MemoryRepository {
           `INSERT INTO memories (content, tags, embedding)
            VALUES ($1, $2, $3::vector)
            RETURNING id, content, tags, created_at, updated_at`,
-          [params.content, params.tags, JSON.stringify(params.embedding)],
+          [params.content, params.tags, encodeVector(params.embedding!)],
         )
       : await this.pool.query(
           `INSERT INTO memories (content, tags)
@@ -61,21 +151,177 @@ export class PostgresRepository implements MemoryRepository {
     return this.rowToMemory(result.rows[0]);
   }
 
+  async storeBatch(params: StoreParams[]): Promise<Memory[]> {
+    if (params.length === 0) return [];
+
+    // Ids are assigned here so that rows can be returned in input order.
+    const ids = params.map((p) => p.id?.toLowerCase() ?? randomUUID());
+    const rows = JSON.stringify(
+      params.map((p, i) => ({
+        id: ids[i],
+        content: p.content,
+        tags: p.tags,
+        created_at: p.createdAt ?? null,
+        updated_at: p.updatedAt ?? p.createdAt ?? null,
+      })),
+    );
+    const embeddings = params.map((p) =>
+      p.embedding && p.embedding.length > 0 ? p.embedding : null,
+    );
+
+    // Restored ids that already exist are skipped, so a re-run restore does
+    // not duplicate memories; the stored rows are read back instead.
+    const inserted = await this.pool.query(
+      `INSERT INTO memories (id, content, tags, embedding, created_at, updated_at)
+       SELECT x.id, x.content, x.tags, e.embedding,
+              COALESCE(x.created_at, now()), COALESCE(x.updated_at, now())
+       FROM ROWS FROM (jsonb_to_recordset($1::jsonb) AS (
+           id UUID, content TEXT, tags TEXT[], created_at TIMESTAMPTZ, updated_at TIMESTAMPTZ
+         ))
+         WITH ORDINALITY AS x(id, content, tags, created_at, updated_at, n)
+       JOIN unnest($2::vector[]) WITH ORDINALITY AS e(embedding, n) USING (n)
+       ON CONFLICT (id) DO NOTHING
+       RETURNING id, content, tags, created_at, updated_at`,
+      [rows, encodeVectorArray(embeddings, await this.vectorOid())],
+    );
+
+    const byId = new Map(inserted.rows.map((r) => [r.id as string, r]));
+    const existing = ids.filter((id) => !byId.has(id));
+    if (existing.length > 0) {
+      const result = await this.pool.query(
+        `SELECT id, content, tags, created_at, updated_at
+         FROM memories WHERE id = ANY($1::uuid[])`,
+        [existing],
+      );
+      for (const row of result.rows) byId.set(row.id as string, row);
+    }
+    return ids.map((id) => this.rowToMemory(byId.get(id)!));
+  }
+
   async fetch(params: FetchParams): Promise<Memory[]> {
     const limit = params.limit ?? 50;
 
+    const hasEmbedding = params.queryEmbedding && params.queryEmbedding.length > 0;
+
+    // Until content_tsv is filled, hybrid searches fall back to vector search.
+    if (hasEmbedding && params.mode === "hybrid" && params.query && this.textReady) {
+      return this.hybridSearch(params, limit);
+    }
+
     // Vector search path: when we have a query embedding
-    if (params.queryEmbedding && params.queryEmbedding.length > 0) {
+    if (hasEmbedding && params.mode !== "text") {
       return this.vectorSearch(params, limit);
     }
 
-    // Text search path: ILIKE fallback
+    // Semantic search without a query embedding: degrade to trigram similarity
+    if (params.query && params.mode !== "text") {
+      return this.degradedSearch(params, limit);
+    }
+
+    // Text search path: ILIKE substring match
     return this.textSearch(params, limit);
   }
 
+  /**
+   * Rank memories by trigram word similarity to the query, within the
+   * degraded latency budget; falls back to the substring match if the
+   * budget runs out. Scores are word similarities.
+   */
+  private async degradedSearch(params: FetchParams, limit: number): Promise<Memory[]> {
+    const values: unknown[] = [params.query];
+    let filter = "";
+    let idx = 2;
+
+    if (params.tags && params.tags.length > 0) {
+      filter += ` AND tags && $${idx}`;
+      values.push(params.tags);
+      idx++;
+    }
+
+    values.push(limit);
+
+    const result = await withLatencyBudget(this.pool, this.degradedBudgetMs, (client) =>
+      client.query(
+        `SELECT id, content, tags, created_at, updated_at,
+                word_similarity($1, content) AS score
+         FROM memories
+         WHERE $1 <% content${filter}
+         ORDER BY score DESC
+         LIMIT $${idx}`,
+        values,
+      ),
+    );
+
+    if (!result) {
+      console.warn(`Degraded memory search exceeded ${this.degradedBudgetMs}ms; using substring match`);
+      return this.textSearch(params, limit);
+    }
+
+    return result.rows.map((row) => this.rowToMemory(row));
+  }
+
+  /**
+   * Fuse the vector ranking (ANN candidates re-ranked exactly, or an exact
+   * scan) with the full-text ranking by reciprocal rank fusion, in one
+   * query. Scores are RRF scores, not similarities.
+   */
+  private async hybridSearch(params: FetchParams, limit: number): Promise<Memory[]> {
+    const values: unknown[] = [encodeVector(params.queryEmbedding!), params.query];
+    let filter = "";
+    let idx = 3;
+
+    if (params.tags && params.tags.length > 0) {
+      filter += ` AND tags && $${idx}`;
+      values.push(params.tags);
+      idx++;
+    }
+
+    const query = vectorParam("$1", this.embeddingType);
+    const tsq = tsQuery("$2");
+    const useAnn = !this.ann.exact && this.annReady;
+    const ann = annColumn(this.storage);
+    const candidates = candidateCount(this.ann, limit, ANN_OVERSAMPLE);
+    values.push(candidates, limit);
+
+    const vectorHits = useAnn
+      ? `SELECT id FROM memories
+         WHERE ${ann.name} IS NOT NULL${filter}
+         ORDER BY ${ann.name} ${ann.operator} ${ann.project(query)}
+         LIMIT $${idx}`
+      : `SELECT id FROM memories
+         WHERE embedding IS NOT NULL${filter}
+         ORDER BY embedding <=> ${query}
+         LIMIT $${idx}`;
+
+    const sql = `
+      WITH vector_hits AS (${vectorHits}),
+      vector_ranked AS (
+        SELECT m.id, ROW_NUMBER() OVER (ORDER BY m.embedding <=> ${query}) AS rank
+        FROM vector_hits JOIN memories m USING (id)
+      ),
+      text_ranked AS (
+        SELECT id, ROW_NUMBER() OVER (ORDER BY ts_rank_cd(content_tsv, ${tsq}) DESC) AS rank
+        FROM memories
+        WHERE content_tsv @@ ${tsq}${filter}
+        ORDER BY rank
+        LIMIT $${idx}
+      ),
+      fused AS (${reciprocalRankFusion("id", ["vector_ranked", "text_ranked"])})
+      SELECT m.id, m.content, m.tags, m.created_at, m.updated_at, f.score
+      FROM fused f JOIN memories m USING (id)
+      ORDER BY f.score DESC
+      LIMIT $${idx + 1}`;
+
+    const result = useAnn
+      ? await withAnnSettings(this.pool, this.ann, candidates, (client) => client.query(sql, values))
+      : await this.pool.query(sql, values);
+
+    return result.rows.map((row) => this.rowToMemory(row));
+  }
+
   private async vectorSearch(params: FetchParams, limit: number): Promise<Memory[]> {
     const conditions: string[] = [];
-    const values: unknown[] = [JSON.stringify(params.queryEmbedding)];
+    const values: unknown[] = [encodeVector(params.queryEmbedding!)];
     let idx = 2;
 
     if (params.tags && params.tags.length > 0) {
@@ -88,16 +334,45 @@ export class PostgresRepository implements MemoryRepository {
       ? `WHERE ${conditions.join(" AND ")}`
       : "";
 
-    values.push(limit);
+    const query = vectorParam("$1", this.embeddingType);
 
-    const result = await this.pool.query(
-      `SELECT id, content, tags, created_at, updated_at,
-              1 - (embedding <=> $1::vector) AS score
-       FROM memories
-       ${where}
-       ORDER BY embedding <=> $1::vector
-       LIMIT $${idx}`,
-      values,
+    if (this.ann.exact || !this.annReady) {
+      values.push(limit);
+
+      const result = await this.pool.query(
+        `SELECT id, content, tags, created_at, updated_at,
+                1 - (embedding <=> ${query}) AS score
+         FROM memories
+         ${where}
+         ORDER BY embedding <=> ${query}
+         LIMIT $${idx}`,
+        values,
+      );
+
+      return result.rows.map((row) => this.rowToMemory(row));
+    }
+
+    // Take candidates from the HNSW index, then re-rank them exactly.
+    const ann = annColumn(this.storage);
+    const candidates = candidateCount(this.ann, limit, ANN_OVERSAMPLE);
+    const annWhere = `WHERE ${[...conditions, `${ann.name} IS NOT NULL`].join(" AND ")}`;
+    values.push(candidates, limit);
+
+    const result = await withAnnSettings(this.pool, this.ann, candidates, (client) =>
+      client.query(
+        `WITH candidates AS (
+           SELECT id FROM memories
+           ${annWhere}
+           ORDER BY ${ann.name} ${ann.operator} ${ann.project(query)}
+           LIMIT $${idx}
+         )
+         SELECT m.id, m.content, m.tags, m.created_at, m.updated_at,
+                1 - (m.embedding <=> ${query}) AS score
+         FROM candidates JOIN memories m USING (id)
+         ORDER BY m.embedding <=> ${query}
+         LIMIT $${idx + 1}`,
+        values,
+      ),
     );
 
     return result.rows.map((row) => this.rowToMemory(row));
@@ -120,6 +395,12 @@ export class PostgresRepository implements MemoryRepository {
       idx++;
     }
 
+    if (params.after) {
+      conditions.push(recencyAfter("", `$${idx}`, `$${idx + 1}`));
+      values.push(params.after.createdAt, params.after.id);
+      idx += 2;
+    }
+
     const where = conditions.length > 0
       ? `WHERE ${conditions.join(" AND ")}`
       : "";
@@ -129,7 +410,7 @@ export class PostgresRepository implements MemoryRepository {
     const result = await this.pool.query(
       `SELECT id, content, tags, created_at, updated_at
        FROM memories ${where}
-       ORDER BY created_at DESC
+       ORDER BY ${recencyOrder()}
        LIMIT $${idx}`,
       values,
     );
@@ -137,6 +418,30 @@ export class PostgresRepository implements MemoryRepository {
     return result.rows.map((row) => this.rowToMemory(row));
   }
 
+  exportRecords(options: ExportOptions): AsyncGenerator<ExportRecord> {
+    return inSnapshot(this.pool, (client) => this.exportMemories(client, options));
+  }
+
+  private async *exportMemories(
+    client: pg.PoolClient,
+    options: ExportOptions,
+  ): AsyncGenerator<ExportRecord> {
+    const embedding = options.embeddings ? `, ${vectorSend("embedding")} AS embedding` : "";
+    const rows = cursorRows(
+      client,
+      "export_memories",
+      `SELECT id, content, tags, created_at, updated_at${embedding}
+       FROM memories ORDER BY id`,
+    );
+
+    for await (const row of rows) {
+      const memory = this.rowToMemory(row);
+      yield options.embeddings
+        ? { type: "memory", ...memory, embedding: exportedEmbedding(row.embedding) }
+        : { type: "memory", ...memory };
+    }
+  }
+
   async healthCheck(): Promise<boolean> {
     try {
       await this.pool.query("SELECT 1");
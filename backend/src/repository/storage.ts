@@ -0,0 +1,235 @@
+import type pg from "pg";
+import type { BackfillJob } from "./backfill-types.js";
+
+/**
+ * How embeddings are stored.
+ *
+ * - `vector`:  float32 columns; ANN candidates from a halfvec(1024) index.
+ * - `halfvec`: float16 columns (half the heap, TOAST and buffer-cache
+ *   footprint); ANN candidates from a halfvec(1024) index.
+ * - `binary`:  float32 columns; ANN candidates from a binary-quantized
+ *   bit(4096) index (1/32 of the float32 size), re-ranked at full precision.
+ *
+ * `binary` is an index mode, not a storage mode: only the ANN index shrinks.
+ * The re-rank reads the float32 columns, so heap and TOAST stay the size they
+ * are under `vector`. Use `halfvec` to reduce them.
+ */
+export type EmbeddingStorage = "vector" | "halfvec" | "binary";
+
+export const EMBEDDING_STORAGE_MODES: EmbeddingStorage[] = ["vector", "halfvec", "binary"];
+
+export const EMBEDDING_DIMENSIONS = 4096;
+
+/** Postgres type of a full-precision embedding column. */
+export type VectorType = "vector" | "halfvec";
+
+/** Postgres type of full-precision embedding columns for a storage mode. */
+export function vectorType(storage: EmbeddingStorage = "vector"): VectorType {
+  return storage === "halfvec" ? "halfvec" : "vector";
+}
+
+/** Name of the shadow column a storage migration copies into. */
+function shadowColumn(column: string): string {
+  return `${column}_next`;
+}
+
+/**
+ * Start converting `table.column` to the column type of `storage` without
+ * holding a long lock: a shadow column is added and kept in sync by a
+ * trigger. Existing rows are copied, and the columns swapped, by
+ * embeddingMigrationJob. A shadow column left by an interrupted migration
+ * to the same type is kept, so the copy resumes.
+ *
+ * Returns the column's current type, which searches must use until the
+ * swap; null if the column does not exist.
+ */
+export async function startEmbeddingMigration(
+  pool: pg.Pool,
+  table: string,
+  column: string,
+  storage: EmbeddingStorage,
+): Promise<VectorType | null> {
+  const target = `${vectorType(storage)}(${EMBEDDING_DIMENSIONS})`;
+  const shadow = shadowColumn(column);
+  const sync = `${table}_${column}_sync`;
+
+  const current = await pool.query(
+    `SELECT attname, format_type(atttypid, atttypmod) AS type
+     FROM pg_attribute
+     WHERE attrelid = $1::regclass AND attname = ANY($2) AND NOT attisdropped`,
+    [table, [column, shadow]],
+  );
+  const types = new Map(current.rows.map((r) => [r.attname as string, r.type as string]));
+  const currentType = types.get(column);
+  if (currentType === undefined) return null;
+
+  if (currentType === target) {
+    // Left over from a migration that was abandoned by switching back.
+    if (types.has(shadow)) {
+      await pool.query(`
+        DROP TRIGGER IF EXISTS trg_${sync} ON ${table};
+        DROP FUNCTION IF EXISTS ${sync}();
+        ALTER TABLE ${table} DROP COLUMN ${shadow};
+      `);
+    }
+    return vectorTypeOf(currentType);
+  }
+
+  if (types.get(shadow) !== target) {
+    console.log(`Migrating ${table}.${column} from ${currentType} to ${target} in the background`);
+    await pool.query(`
+      ALTER TABLE ${table} DROP COLUMN IF EXISTS ${shadow};
+      ALTER TABLE ${table} ADD COLUMN ${shadow} ${target};
+    `);
+  }
+
+  await pool.query(`
+    CREATE OR REPLACE FUNCTION ${sync}() RETURNS trigger AS $$
+    BEGIN
+      NEW.${shadow} := NEW.${column};
+      RETURN NEW;
+    END $$ LANGUAGE plpgsql;
+
+    CREATE OR REPLACE TRIGGER trg_${sync}
+      BEFORE INSERT OR UPDATE OF ${column} ON ${table}
+      FOR EACH ROW EXECUTE FUNCTION ${sync}();
+  `);
+
+  return vectorTypeOf(currentType);
+}
+
+function vectorTypeOf(formatted: string): VectorType {
+  return formatted.startsWith("halfvec") ? "halfvec" : "vector";
+}
+
+/**
+ * Backfill job finishing a migration started by startEmbeddingMigration:
+ * copies existing rows into the shadow column, keyed by `key` (a UUID
+ * column), then swaps the columns in one short transaction and calls
+ * `onSwapped`. Does nothing if no migration is in progress.
+ *
+ * Triggers that reference the column by name (e.g. the ANN trigger) are
+ * dropped by the swap; `recreateSql` runs in the same transaction to
+ * recreate them.
+ */
+export function embeddingMigrationJob(
+  pool: pg.Pool,
+  table: string,
+  column: string,
+  key: string,
+  recreateSql = "",
+  onSwapped: () => void = () => {},
+): BackfillJob {
+  const shadow = shadowColumn(column);
+  const sync = `${table}_${column}_sync`;
+  const needsWork = `${column} IS NOT NULL AND ${shadow} IS NULL`;
+
+  const migrating = async () => {
+    const result = await pool.query(
+      `SELECT 1 FROM pg_attribute
+       WHERE attrelid = $1::regclass AND attname = $2 AND NOT attisdropped`,
+      [table, shadow],
+    );
+    return result.rows.length > 0;
+  };
+
+  return {
+    name: `${table}.${column}.storage`,
+    async pending(after, limit) {
+      if (!(await migrating())) return [];
+      const result = await pool.query(
+        `SELECT DISTINCT ${key} AS key FROM ${table}
+         WHERE ${needsWork} AND ($1::uuid IS NULL OR ${key} > $1::uuid)
+         ORDER BY 1 LIMIT $2`,
+        [after, limit],
+      );
+      return result.rows.map((r) => r.key as string);
+    },
+    async process(keys) {
+      await pool.query(
+        `UPDATE ${table} SET ${shadow} = ${column}
+         WHERE ${key} = ANY($1::uuid[]) AND ${needsWork}`,
+        [keys],
+      );
+    },
+    async count() {
+      if (!(await migrating())) return 0;
+      const result = await pool.query(
+        `SELECT COUNT(DISTINCT ${key}) AS n FROM ${table} WHERE ${needsWork}`,
+      );
+      return Number(result.rows[0].n);
+    },
+    async finish() {
+      if (!(await migrating())) return;
+
+      const client = await pool.connect();
+      try {
+        await client.query("BEGIN");
+        await client.query(`LOCK TABLE ${table} IN SHARE ROW EXCLUSIVE MODE`);
+        const notNull = await client.query(
+          `SELECT attnotnull FROM pg_attribute
+           WHERE attrelid = $1::regclass AND attname = $2 AND NOT attisdropped`,
+          [table, column],
+        );
+        await client.query(`UPDATE ${table} SET ${shadow} = ${column} WHERE ${needsWork}`);
+        await client.query(`DROP TRIGGER trg_${sync} ON ${table}`);
+        await client.query(`DROP FUNCTION ${sync}()`);
+        await client.query(`DROP TRIGGER IF EXISTS trg_${table}_embedding_ann ON ${table}`);
+        await client.query(`ALTER TABLE ${table} DROP COLUMN ${column}`);
+        await client.query(`ALTER TABLE ${table} RENAME COLUMN ${shadow} TO ${column}`);
+        if (notNull.rows[0]?.attnotnull) {
+          await client.query(`ALTER TABLE ${table} ALTER COLUMN ${column} SET NOT NULL`);
+        }
+        if (recreateSql) await client.query(recreateSql);
+        await client.query("COMMIT");
+      } catch (err) {
+        await client.query("ROLLBACK");
+        throw err;
+      } finally {
+        client.release();
+      }
+
+      onSwapped();
+    },
+  };
+}
+
+/**
+ * Build an index without blocking writes. A previous interrupted
+ * CONCURRENTLY build leaves an invalid index behind, which is dropped first.
+ */
+export async function createIndexConcurrently(
+  pool: pg.Pool,
+  index: string,
+  definition: string,
+): Promise<void> {
+  const invalid = await pool.query(
+    `SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+     WHERE c.relname = $1 AND NOT i.indisvalid`,
+    [index],
+  );
+  if (invalid.rows.length > 0) {
+    await pool.query(`DROP INDEX CONCURRENTLY IF EXISTS ${index}`);
+  }
+  await pool.query(`CREATE INDEX CONCURRENTLY IF NOT EXISTS ${index} ON ${definition}`);
+}
+
+/**
+ * SQL for a query-vector parameter compared against an embedding column of
+ * type `type`. Parameters are always sent in vector's binary format (see
+ * utils/vector-codec.ts) and cast to the column type afterwards.
+ */
+export function vectorParam(param: string, type: VectorType = "vector"): string {
+  return type === "halfvec" ? `${param}::vector::halfvec` : `${param}::vector`;
+}
+
+/** SQL reading an embedding column in vector's binary format, as bytea. */
+export function vectorSend(expr: string): string {
+  return `vector_send(${expr}::vector)`;
+}
+
+/** OID of the vector type, needed to send binary vector[] parameters. */
+export async function vectorTypeOid(pool: pg.Pool): Promise<number> {
+  const result = await pool.query(`SELECT 'vector'::regtype::oid AS oid`);
+  return Number(result.rows[0].oid);
+}
@@ -0,0 +1,166 @@
+import type pg from "pg";
+import type { BackfillJob } from "./backfill-types.js";
+import { createIndexConcurrently } from "./storage.js";
+
+/**
+ * Full-text search support shared by the Postgres repositories.
+ *
+ * Searchable text gets a trigger-maintained tsvector column with a GIN
+ * index for the keyword ranking of hybrid search. It is fused with the vector ranking by
+ * reciprocal rank fusion, which needs no calibration between ts_rank and
+ * cosine similarity: only each result's position in either list matters.
+ *
+ * When a semantic search cannot get a query embedding (the embedding
+ * service is down or overloaded), searches degrade to pg_trgm word
+ * similarity over trigram GIN indexes, under a statement timeout so that
+ * an embedding outage cannot turn into database load. `text` mode keeps
+ * ILIKE substring matching, which the trigram indexes also serve, so
+ * partial words, identifiers and non-English text still match.
+ */
+
+export const TEXT_SEARCH_CONFIG = "english";
+
+export interface TextSearchOptions {
+  /** Statement timeout of the degraded (trigram) search, in milliseconds. */
+  degradedBudgetMs?: number;
+}
+
+export const DEFAULT_DEGRADED_BUDGET_MS = 500;
+
+const QUERY_CANCELED = "57014";
+
+// Damping constant from the original RRF paper; keeps a single first place
+// in one list from outweighing consistent placement in both.
+export const RRF_K = 60;
+
+/**
+ * Schema for a tsvector column over `source`, kept in sync by a trigger
+ * (a generated column would rewrite the table under an exclusive lock when
+ * added). Existing rows are filled, and the GIN index built, by
+ * tsvectorBackfillJob.
+ */
+export function tsvectorSchemaSql(table: string, column: string, source: string): string {
+  return `
+ALTER TABLE ${table} ADD COLUMN IF NOT EXISTS ${column} tsvector;
+ALTER TABLE ${table} ALTER COLUMN ${column} DROP EXPRESSION IF EXISTS;
+
+CREATE OR REPLACE FUNCTION ${table}_set_${column}() RETURNS trigger AS $$
+BEGIN
+  NEW.${column} := to_tsvector('${TEXT_SEARCH_CONFIG}', NEW.${source});
+  RETURN NEW;
+END $$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER trg_${table}_${column}
+  BEFORE INSERT OR UPDATE OF ${source} ON ${table}
+  FOR EACH ROW EXECUTE FUNCTION ${table}_set_${column}();
+`;
+}
+
+/**
+ * Backfill job filling the tsvector column for rows written before it
+ * existed, then building its GIN index without blocking writes. `onReady`
+ * is called once the index is usable; until then hybrid search should not
+ * be used, since the keyword ranking would miss unfilled rows.
+ */
+export function tsvectorBackfillJob(
+  pool: pg.Pool,
+  table: string,
+  column: string,
+  source: string,
+  onReady: () => void,
+): BackfillJob {
+  return {
+    name: `${table}.${column}`,
+    async pending(after, limit) {
+      const result = await pool.query(
+        `SELECT id FROM ${table}
+         WHERE ${column} IS NULL AND ($1::uuid IS NULL OR id > $1::uuid)
+         ORDER BY id LIMIT $2`,
+        [after, limit],
+      );
+      return result.rows.map((r) => r.id as string);
+    },
+    async process(ids) {
+      await pool.query(
+        `UPDATE ${table} SET ${column} = to_tsvector('${TEXT_SEARCH_CONFIG}', ${source})
+         WHERE id = ANY($1::uuid[]) AND ${column} IS NULL`,
+        [ids],
+      );
+    },
+    async count() {
+      const result = await pool.query(`SELECT COUNT(*) AS n FROM ${table} WHERE ${column} IS NULL`);
+      return Number(result.rows[0].n);
+    },
+    async finish() {
+      await createIndexConcurrently(
+        pool,
+        `idx_${table}_${column}`,
+        `${table} USING GIN (${column})`,
+      );
+      onReady();
+    },
+  };
+}
+
+/** SQL parsing a user query parameter (quotes, OR and -term are supported). */
+export function tsQuery(param: string): string {
+  return `websearch_to_tsquery('${TEXT_SEARCH_CONFIG}', ${param})`;
+}
+
+/**
+ * SQL fusing ranked relations, each with columns (`key`, rank) where rank
+ * starts at 1, into (`key`, score) rows: score = Σ 1 / (RRF_K + rank).
+ */
+export function reciprocalRankFusion(key: string, relations: string[]): string {
+  const union = relations.map((r) => `SELECT ${key}, rank FROM ${r}`).join(" UNION ALL ");
+  return `SELECT ${key}, SUM(1.0 / (${RRF_K} + rank)) AS score
+          FROM (${union}) ranks
+          GROUP BY ${key}`;
+}
+
+/**
+ * Backfill job building trigram GIN indexes on `columns` of `table`
+ * without blocking writes. Until they exist the degraded search still
+ * works, bounded by its latency budget.
+ */
+export function trigramIndexJob(pool: pg.Pool, table: string, columns: string[]): BackfillJob {
+  return {
+    name: `${table}.trgm`,
+    pending: async () => [],
+    process: async () => {},
+    async finish() {
+      for (const column of columns) {
+        await createIndexConcurrently(
+          pool,
+          `idx_${table}_${column}_trgm`,
+          `${table} USING gin (${column} gin_trgm_ops)`,
+        );
+      }
+    },
+  };
+}
+
+/**
+ * Run `fn` on a dedicated connection inside a transaction whose statements
+ * are cancelled after `budgetMs`. Resolves to null if the budget ran out.
+ */
+export async function withLatencyBudget<T>(
+  pool: pg.Pool,
+  budgetMs: number,
+  fn: (client: pg.PoolClient) => Promise<T>,
+): Promise<T | null> {
+  const client = await pool.connect();
+  try {
+    await client.query("BEGIN");
+    await client.query(`SELECT set_config('statement_timeout', $1, true)`, [String(budgetMs)]);
+    const result = await fn(client);
+    await client.query("COMMIT");
+    return result;
+  } catch (err) {
+    await client.query("ROLLBACK");
+    if ((err as { code?: string }).code === QUERY_CANCELED) return null;
+    throw err;
+  } finally {
+    client.release();
+  }
+}
@@ -1,9 +1,16 @@
 import type { Memory } from "../types/memory.js";
+import type { ExportOptions, ExportRecord } from "../types/export.js";
+import type { SearchMode } from "../types/search.js";
+import type { RecencyKey } from "./pagination.js";
 
 export interface StoreParams {
   content: string;
   tags: string[];
   embedding?: number[] | null;
+  /** Restored id and timestamps (batch only); generated when absent. */
+  id?: string;
+  createdAt?: string;
+  updatedAt?: string;
 }
 
 export interface FetchParams {
@@ -11,12 +18,23 @@ export interface FetchParams {
   tags?: string[];
   queryEmbedding?: number[] | null;
   limit?: number;
+  mode?: SearchMode;
+  /** Page through a substring-match or unfiltered listing, newest first, after this key. */
+  after?: RecencyKey;
 }
 
 export interface MemoryRepository {
   initialize(): Promise<void>;
   store(params: StoreParams): Promise<Memory>;
+  /**
+   * Store many memories in one transaction; returns them in input order.
+   * Items whose given id already exists are not written; the stored memory
+   * is returned instead.
+   */
+  storeBatch(params: StoreParams[]): Promise<Memory[]>;
   fetch(params: FetchParams): Promise<Memory[]>;
+  /** Stream every memory, in id order. */
+  exportRecords(options: ExportOptions): AsyncIterable<ExportRecord>;
   healthCheck(): Promise<boolean>;
   close(): Promise<void>;
 }
@@ -0,0 +1,8 @@
+import type { FastifyInstance } from "fastify";
+import type { BackfillService } from "../services/backfill-service.js";
+
+export function backfillRoutes(backfill: BackfillService) {
+  return async function (app: FastifyInstance): Promise<void> {
+    app.get("/api/backfill/status", async () => backfill.status());
+  };
+}
@@ -1,95 +1,416 @@
 import type { FastifyInstance } from "fastify";
 import type { ConversationService } from "../services/conversation-service.js";
+import { CONVERSATION_VIEWS } from "../types/conversation.js";
 import type {
+  BatchGetResult,
+  BulkUpsertResult,
+  ConversationView,
+  GetConversationQuery,
+  GetConversationsRequest,
+  MultiSearchConversationsRequest,
   StoreConversationRequest,
   SearchConversationsQuery,
 } from "../types/conversation.js";
+import { SEARCH_MODES } from "../types/search.js";
+import type { SearchMode } from "../types/search.js";
+import type { RecencyKey } from "../repository/pagination.js";
+import { EMBEDDING_DIMENSIONS } from "../repository/storage.js";
+import { importedEmbedding } from "../utils/vector-codec.js";
+import {
+  decodePositionCursor,
+  decodeRecencyCursor,
+  parsePageSize,
+  toPage,
+} from "../utils/cursor.js";
+
+const MAX_BULK_ITEMS = 1000;
+const MAX_SEARCH_QUERIES = 10;
+const MAX_BATCH_IDS = 100;
+const UUID_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+const DEFAULT_PAGE_SIZE = 10;
+const DEFAULT_MESSAGE_PAGE_SIZE = 100;
+const BULK_BODY_LIMIT = 64 * 1024 * 1024;
+
+/** Returns an error message, or null when the upsert request is valid. */
+function validateUpsertRequest(body: StoreConversationRequest): string | null {
+  const { sourceId, messages } = body ?? {};
+
+  if (!sourceId || typeof sourceId !== "string" || sourceId.trim() === "") {
+    return "sourceId is required and must be a non-empty string";
+  }
+
+  if (messages !== undefined) {
+    if (!Array.isArray(messages) || messages.length === 0) {
+      return "messages must be a non-empty array when provided";
+    }
+
+    for (const msg of messages) {
+      if (
+        !msg ||
+        !msg.role ||
+        typeof msg.role !== "string" ||
+        !msg.content ||
+        typeof msg.content !== "string"
+      ) {
+        return "each message must have a non-empty role and content string";
+      }
+
+      if (importedEmbedding(msg.embedding, EMBEDDING_DIMENSIONS) === false) {
+        return `each message embedding must be null or a base64-encoded vector of ${EMBEDDING_DIMENSIONS} dimensions`;
+      }
+    }
+  }
+
+  return null;
+}
+
+/** Returns an error message, or null when `view` is absent or valid. */
+function validateView(view: string | undefined): string | null {
+  if (view !== undefined && !CONVERSATION_VIEWS.includes(view as ConversationView)) {
+    return `view must be one of: ${CONVERSATION_VIEWS.join(", ")}`;
+  }
+  return null;
+}
+
+function toUpsertOptions(body: StoreConversationRequest) {
+  const { userId, title, source, tags, messages } = body;
+  return {
+    title: title?.trim(),
+    source,
+    userId: userId || undefined,
+    tags: Array.isArray(tags) ? tags : undefined,
+    messages: messages?.map(({ role, content, embedding }) => {
+      // Already validated; exported embeddings are stored without re-embedding.
+      const vector = importedEmbedding(embedding, EMBEDDING_DIMENSIONS);
+      return { role, content, embedding: vector === false ? undefined : vector };
+    }),
+  };
+}
+
+/** Parses NDJSON; returns an error message for the first malformed line. */
+function parseNdjson(body: string): StoreConversationRequest[] | string {
+  const items: StoreConversationRequest[] = [];
+  const lines = body.split("\n");
+  for (let i = 0; i < lines.length; i++) {
+    const line = lines[i].trim();
+    if (line === "") continue;
+    try {
+      items.push(JSON.parse(line) as StoreConversationRequest);
+    } catch {
+      return `invalid JSON on line ${i + 1}`;
+    }
+  }
+  return items;
+}
 
 export function conversationRoutes(service: ConversationService) {
   return async function (app: FastifyInstance): Promise<void> {
+    // NDJSON bodies reach the handler as a raw string.
+    app.addContentTypeParser(
+      "application/x-ndjson",
+      { parseAs: "string", bodyLimit: BULK_BODY_LIMIT },
+      (_request, body, done) => done(null, body),
+    );
+
     app.post<{ Body: StoreConversationRequest }>(
       "/api/conversations",
       async (request, reply) => {
-        const { sourceId, userId, title, source, tags, messages } =
-          request.body ?? {};
+        const error = validateUpsertRequest(request.body);
+        if (error) {
+          return reply.status(400).send({ error });
+        }
+
+        const conversation = await service.upsert(
+          request.body.sourceId.trim(),
+          toUpsertOptions(request.body),
+        );
+
+        return reply.status(200).send(conversation);
+      },
+    );
+
+    // Bulk upsert: NDJSON (one conversation per line) or a JSON array.
+    // Invalid items are reported per item; valid ones are written in one
+    // transaction.
+    app.post<{ Body: StoreConversationRequest[] | string }>(
+      "/api/conversations/bulk",
+      { bodyLimit: BULK_BODY_LIMIT },
+      async (request, reply) => {
+        const items =
+          typeof request.body === "string"
+            ? parseNdjson(request.body)
+            : request.body;
+
+        if (typeof items === "string") {
+          return reply.status(400).send({ error: items });
+        }
 
-        if (!sourceId || typeof sourceId !== "string" || sourceId.trim() === "") {
+        if (!Array.isArray(items) || items.length === 0) {
           return reply.status(400).send({
-            error: "sourceId is required and must be a non-empty string",
+            error: "body must be a non-empty NDJSON stream or JSON array of conversations",
           });
         }
 
-        if (messages !== undefined) {
-          if (!Array.isArray(messages) || messages.length === 0) {
-            return reply.status(400).send({
-              error: "messages must be a non-empty array when provided",
-            });
+        if (items.length > MAX_BULK_ITEMS) {
+          return reply.status(400).send({
+            error: `at most ${MAX_BULK_ITEMS} conversations per batch`,
+          });
+        }
+
+        const results: BulkUpsertResult[] = [];
+        const valid: ({ sourceId: string } & ReturnType<typeof toUpsertOptions>)[] = [];
+
+        for (const item of items) {
+          const error = validateUpsertRequest(item);
+          const sourceId = typeof item?.sourceId === "string" ? item.sourceId.trim() : null;
+          results.push(error ? { sourceId, error } : { sourceId });
+          if (!error) {
+            valid.push({ sourceId: sourceId!, ...toUpsertOptions(item) });
           }
+        }
 
-          for (const msg of messages) {
-            if (
-              !msg.role ||
-              typeof msg.role !== "string" ||
-              !msg.content ||
-              typeof msg.content !== "string"
-            ) {
-              return reply.status(400).send({
-                error:
-                  "each message must have a non-empty role and content string",
-              });
+        if (valid.length > 0) {
+          const conversations = await service.bulkUpsert(valid);
+          const idsBySourceId = new Map(
+            conversations.map((c) => [c.sourceId, c.id]),
+          );
+          for (const result of results) {
+            if (!result.error) {
+              result.id = idsBySourceId.get(result.sourceId!);
             }
           }
         }
 
-        const conversation = await service.upsert(sourceId.trim(), {
-          title: title?.trim(),
-          source,
-          userId: userId || undefined,
-          tags: Array.isArray(tags) ? tags : undefined,
-          messages,
+        const failed = results.filter((r) => r.error).length;
+        return reply.status(200).send({
+          results,
+          total: results.length,
+          succeeded: results.length - failed,
+          failed,
         });
-
-        return reply.status(200).send(conversation);
       },
     );
 
     app.get<{ Querystring: SearchConversationsQuery }>(
       "/api/conversations",
-      async (request) => {
-        const { query, tags, limit, include, userId } = request.query;
+      async (request, reply) => {
+        const { query, tags, limit, include, userId, mode, diversity, view, cursor } =
+          request.query;
+
+        if (mode !== undefined && !SEARCH_MODES.includes(mode as SearchMode)) {
+          return reply.status(400).send({
+            error: `mode must be one of: ${SEARCH_MODES.join(", ")}`,
+          });
+        }
+
+        const parsedDiversity = diversity !== undefined ? Number(diversity) : undefined;
+        if (
+          parsedDiversity !== undefined &&
+          (diversity!.trim() === "" || !(parsedDiversity >= 0 && parsedDiversity <= 1))
+        ) {
+          return reply.status(400).send({
+            error: "diversity must be a number between 0 and 1",
+          });
+        }
+
+        const viewError = validateView(view);
+        if (viewError) {
+          return reply.status(400).send({ error: viewError });
+        }
+
+        const pageSize = parsePageSize(limit, DEFAULT_PAGE_SIZE);
+        if (pageSize === null) {
+          return reply.status(400).send({ error: "limit must be a positive integer" });
+        }
+
+        // Ranked searches return the top results only; listings and
+        // substring matches (newest first) page by cursor.
+        const paged = !query || mode === "text";
+        let after: RecencyKey | undefined;
+        if (cursor !== undefined) {
+          if (!paged) {
+            return reply.status(400).send({
+              error: "cursor requires mode=text when a query is given",
+            });
+          }
+          after = decodeRecencyCursor(cursor) ?? undefined;
+          if (!after) {
+            return reply.status(400).send({ error: "invalid cursor" });
+          }
+        }
 
         const tagList = tags
           ? tags.split(",").map((t) => t.trim().toLowerCase())
           : undefined;
 
-        const parsedLimit = limit ? parseInt(limit, 10) : undefined;
-
         const includeList = include
           ? include.split(",").map((s) => s.trim())
           : undefined;
 
-        const conversations = await service.search(
+        const rows = await service.search(
           query,
           tagList,
-          parsedLimit,
+          paged ? pageSize + 1 : pageSize,
           includeList,
           userId || undefined,
+          mode as SearchMode | undefined,
+          parsedDiversity,
+          view as ConversationView | undefined,
+          after,
+        );
+        const { items: conversations, nextCursor } = paged
+          ? toPage(rows, pageSize, (c) => ({ createdAt: c.createdAt, id: c.id }))
+          : { items: rows, nextCursor: null };
+        return { conversations, total: conversations.length, nextCursor };
+      },
+    );
+
+    // Multi-query search: one round trip for several phrasings of a recall
+    // query, fused and deduplicated server-side.
+    app.post<{ Body: MultiSearchConversationsRequest }>(
+      "/api/conversations/search",
+      async (request, reply) => {
+        const { queries, tags, limit, include, userId, mode, view } = request.body ?? {};
+
+        if (
+          !Array.isArray(queries) ||
+          queries.length === 0 ||
+          queries.some((q) => typeof q !== "string" || q.trim() === "")
+        ) {
+          return reply.status(400).send({
+            error: "queries must be a non-empty array of non-empty strings",
+          });
+        }
+
+        if (queries.length > MAX_SEARCH_QUERIES) {
+          return reply.status(400).send({
+            error: `at most ${MAX_SEARCH_QUERIES} queries per search`,
+          });
+        }
+
+        if (mode !== undefined && !SEARCH_MODES.includes(mode as SearchMode)) {
+          return reply.status(400).send({
+            error: `mode must be one of: ${SEARCH_MODES.join(", ")}`,
+          });
+        }
+
+        const viewError = validateView(view);
+        if (viewError) {
+          return reply.status(400).send({ error: viewError });
+        }
+
+        const conversations = await service.multiSearch(
+          queries.map((q) => q.trim()),
+          Array.isArray(tags) ? tags.map((t) => t.trim().toLowerCase()) : undefined,
+          typeof limit === "number" ? limit : undefined,
+          Array.isArray(include) ? include : undefined,
+          userId || undefined,
+          mode as SearchMode | undefined,
+          view as ConversationView | undefined,
         );
         return { conversations, total: conversations.length };
       },
     );
 
-    app.get<{ Params: { id: string } }>(
+    // Batch read: one result per requested id, in request order, each with
+    // the first `limit` messages (all when absent) and a cursor for the rest.
+    app.post<{ Body: GetConversationsRequest }>(
+      "/api/conversations/by-ids",
+      async (request, reply) => {
+        const { ids, limit } = request.body ?? {};
+
+        if (
+          !Array.isArray(ids) ||
+          ids.length === 0 ||
+          ids.some((id) => typeof id !== "string")
+        ) {
+          return reply.status(400).send({
+            error: "ids must be a non-empty array of strings",
+          });
+        }
+
+        if (ids.length > MAX_BATCH_IDS) {
+          return reply.status(400).send({
+            error: `at most ${MAX_BATCH_IDS} ids per request`,
+          });
+        }
+
+        if (limit !== undefined && !(Number.isInteger(limit) && limit > 0)) {
+          return reply.status(400).send({ error: "limit must be a positive integer" });
+        }
+
+        const valid = [...new Set(ids.filter((id) => UUID_PATTERN.test(id)))];
+        const found = valid.length > 0
+          ? await service.getByIds(valid, limit !== undefined ? limit + 1 : undefined)
+          : [];
+        const byId = new Map(found.map((c) => [c.id, c]));
+
+        const results: BatchGetResult[] = ids.map((id) => {
+          const conversation = byId.get(id);
+          if (!conversation) {
+            return { id, error: "conversation not found" };
+          }
+          if (limit === undefined) {
+            return { id, conversation };
+          }
+          const { items: messages, nextCursor } = toPage(
+            conversation.messages ?? [],
+            limit,
+            (m) => ({ position: m.position }),
+          );
+          return { id, conversation: { ...conversation, messages }, nextCursor };
+        });
+
+        const failed = results.filter((r) => r.error).length;
+        return reply.status(200).send({
+          results,
+          total: results.length,
+          succeeded: results.length - failed,
+          failed,
+        });
+      },
+    );
+
+    // Messages are paged by position when limit or cursor is given;
+    // otherwise the whole transcript is returned.
+    app.get<{ Params: { id: string }; Querystring: GetConversationQuery }>(
       "/api/conversations/:id",
       async (request, reply) => {
         const { id } = request.params;
-        const conversation = await service.getById(id);
+        const { limit, cursor } = request.query;
+
+        if (limit === undefined && cursor === undefined) {
+          const conversation = await service.getById(id);
+          if (!conversation) {
+            return reply.status(404).send({ error: "conversation not found" });
+          }
+          return conversation;
+        }
 
+        const pageSize = parsePageSize(limit, DEFAULT_MESSAGE_PAGE_SIZE);
+        if (pageSize === null) {
+          return reply.status(400).send({ error: "limit must be a positive integer" });
+        }
+
+        let afterPosition: number | undefined;
+        if (cursor !== undefined) {
+          afterPosition = decodePositionCursor(cursor) ?? undefined;
+          if (afterPosition === undefined) {
+            return reply.status(400).send({ error: "invalid cursor" });
+          }
+        }
+
+        const conversation = await service.getById(id, { afterPosition, limit: pageSize + 1 });
         if (!conversation) {
           return reply.status(404).send({ error: "conversation not found" });
         }
 
-        return conversation;
+        const { items: messages, nextCursor } = toPage(
+          conversation.messages ?? [],
+          pageSize,
+          (m) => ({ position: m.position }),
+        );
+        return { ...conversation, messages, nextCursor };
       },
     );
   };
@@ -0,0 +1,48 @@
+import { Readable } from "node:stream";
+import type { FastifyInstance } from "fastify";
+import type { MemoryService } from "../services/memory-service.js";
+import type { ConversationService } from "../services/conversation-service.js";
+import type { ExportOptions, ExportQuery, ExportRecord } from "../types/export.js";
+
+// Lines are buffered up to this size before being written to the response.
+const CHUNK_BYTES = 64 * 1024;
+
+async function* ndjson(sources: AsyncIterable<ExportRecord>[]): AsyncGenerator<string> {
+  let chunk = "";
+  for (const source of sources) {
+    for await (const record of source) {
+      chunk += JSON.stringify(record) + "\n";
+      if (chunk.length >= CHUNK_BYTES) {
+        yield chunk;
+        chunk = "";
+      }
+    }
+  }
+  if (chunk) yield chunk;
+}
+
+export function exportRoutes(service: MemoryService, conversationService?: ConversationService) {
+  return async function (app: FastifyInstance): Promise<void> {
+    // Stream the whole store as NDJSON: conversations, each followed by its
+    // messages, then memories. Records are read through server-side cursors
+    // and written as the client consumes them, so memory use does not grow
+    // with the dataset.
+    app.get<{ Querystring: ExportQuery }>("/api/export", async (request, reply) => {
+      const { embeddings } = request.query;
+
+      if (embeddings !== undefined && embeddings !== "true" && embeddings !== "false") {
+        return reply.status(400).send({ error: "embeddings must be true or false" });
+      }
+
+      const options: ExportOptions = { embeddings: embeddings === "true" };
+      const sources = [
+        ...(conversationService ? [conversationService.exportRecords(options)] : []),
+        service.exportRecords(options),
+      ];
+
+      return reply
+        .type("application/x-ndjson")
+        .send(Readable.from(ndjson(sources)));
+    });
+  };
+}
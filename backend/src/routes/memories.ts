@@ -1,43 +1,186 @@
 import type { FastifyInstance } from "fastify";
 import type { MemoryService } from "../services/memory-service.js";
 import type {
+  BatchStoreResult,
   StoreMemoryRequest,
+  StoreMemoriesItem,
+  StoreMemoriesRequest,
   FetchMemoriesQuery,
 } from "../types/memory.js";
+import { SEARCH_MODES } from "../types/search.js";
+import type { SearchMode } from "../types/search.js";
+import type { RecencyKey } from "../repository/pagination.js";
+import { decodeRecencyCursor, parsePageSize, toPage } from "../utils/cursor.js";
+import { importedEmbedding } from "../utils/vector-codec.js";
+import { EMBEDDING_DIMENSIONS } from "../repository/storage.js";
+
+const DEFAULT_PAGE_SIZE = 50;
+const MAX_BATCH_ITEMS = 1000;
+// Room for a full batch of exported memories with base64 embeddings.
+const BATCH_BODY_LIMIT = 64 * 1024 * 1024;
+const UUID_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+
+/** Returns an error message, or null when the store request is valid. */
+function validateStoreRequest(body: StoreMemoryRequest): string | null {
+  const { content, embedding } = body ?? {};
+
+  if (!content || typeof content !== "string" || content.trim() === "") {
+    return "content is required and must be a non-empty string";
+  }
+
+  if (importedEmbedding(embedding, EMBEDDING_DIMENSIONS) === false) {
+    return `embedding must be null or a base64-encoded vector of ${EMBEDDING_DIMENSIONS} dimensions`;
+  }
+
+  return null;
+}
+
+/** Like validateStoreRequest, plus the restore fields of batch items. */
+function validateBatchItem(item: StoreMemoriesItem): string | null {
+  const error = validateStoreRequest(item);
+  if (error) return error;
+
+  if (item.id !== undefined && (typeof item.id !== "string" || !UUID_PATTERN.test(item.id))) {
+    return "id must be a UUID";
+  }
+
+  for (const field of ["createdAt", "updatedAt"] as const) {
+    const value = item[field];
+    if (value !== undefined && (typeof value !== "string" || Number.isNaN(Date.parse(value)))) {
+      return `${field} must be an ISO 8601 timestamp`;
+    }
+  }
+
+  return null;
+}
+
+function toStoreItem(body: StoreMemoryRequest) {
+  // Already validated; exported embeddings are stored without re-embedding.
+  const vector = importedEmbedding(body.embedding, EMBEDDING_DIMENSIONS);
+  return {
+    content: body.content.trim(),
+    tags: Array.isArray(body.tags) ? body.tags : [],
+    embedding: vector === false ? undefined : vector,
+  };
+}
 
 export function memoryRoutes(service: MemoryService) {
   return async function (app: FastifyInstance): Promise<void> {
     app.post<{ Body: StoreMemoryRequest }>(
       "/api/memories",
       async (request, reply) => {
-        const { content, tags } = request.body ?? {};
+        const error = validateStoreRequest(request.body);
+        if (error) {
+          return reply.status(400).send({ error });
+        }
+
+        const { content, tags, embedding } = toStoreItem(request.body);
+        const memory = await service.store(content, tags, embedding);
+
+        return reply.status(201).send(memory);
+      },
+    );
+
+    // Batch store: invalid items are reported per item; valid ones are
+    // embedded together and written in one transaction.
+    app.post<{ Body: StoreMemoriesRequest }>(
+      "/api/memories/batch",
+      { bodyLimit: BATCH_BODY_LIMIT },
+      async (request, reply) => {
+        const items = request.body?.memories;
 
-        if (!content || typeof content !== "string" || content.trim() === "") {
+        if (!Array.isArray(items) || items.length === 0) {
           return reply.status(400).send({
-            error: "content is required and must be a non-empty string",
+            error: "memories must be a non-empty array",
           });
         }
 
-        const memory = await service.store(
-          content.trim(),
-          Array.isArray(tags) ? tags : [],
-        );
+        if (items.length > MAX_BATCH_ITEMS) {
+          return reply.status(400).send({
+            error: `at most ${MAX_BATCH_ITEMS} memories per batch`,
+          });
+        }
 
-        return reply.status(201).send(memory);
+        const results: BatchStoreResult[] = items.map((item) => {
+          const error = validateBatchItem(item);
+          return error ? { error } : {};
+        });
+        const valid = items.filter((_item, i) => !results[i].error);
+
+        if (valid.length > 0) {
+          const memories = await service.storeBatch(
+            valid.map((item) => ({
+              ...toStoreItem(item),
+              id: item.id,
+              createdAt: item.createdAt,
+              updatedAt: item.updatedAt,
+            })),
+          );
+          let next = 0;
+          for (const result of results) {
+            if (!result.error) {
+              result.id = memories[next++].id;
+            }
+          }
+        }
+
+        const failed = results.filter((r) => r.error).length;
+        return reply.status(200).send({
+          results,
+          total: results.length,
+          succeeded: results.length - failed,
+          failed,
+        });
       },
     );
 
     app.get<{ Querystring: FetchMemoriesQuery }>(
       "/api/memories",
-      async (request) => {
-        const { query, tags } = request.query;
+      async (request, reply) => {
+        const { query, tags, mode, limit, cursor } = request.query;
+
+        if (mode !== undefined && !SEARCH_MODES.includes(mode as SearchMode)) {
+          return reply.status(400).send({
+            error: `mode must be one of: ${SEARCH_MODES.join(", ")}`,
+          });
+        }
+
+        const pageSize = parsePageSize(limit, DEFAULT_PAGE_SIZE);
+        if (pageSize === null) {
+          return reply.status(400).send({ error: "limit must be a positive integer" });
+        }
+
+        // Ranked searches return the top results only; listings and
+        // substring matches (newest first) page by cursor.
+        const paged = !query || mode === "text";
+        let after: RecencyKey | undefined;
+        if (cursor !== undefined) {
+          if (!paged) {
+            return reply.status(400).send({
+              error: "cursor requires mode=text when a query is given",
+            });
+          }
+          after = decodeRecencyCursor(cursor) ?? undefined;
+          if (!after) {
+            return reply.status(400).send({ error: "invalid cursor" });
+          }
+        }
 
         const tagList = tags
           ? tags.split(",").map((t) => t.trim().toLowerCase())
           : undefined;
 
-        const memories = await service.fetch(query, tagList);
-        return { memories, total: memories.length };
+        const rows = await service.fetch(
+          query,
+          tagList,
+          mode as SearchMode | undefined,
+          paged ? pageSize + 1 : pageSize,
+          after,
+        );
+        const { items: memories, nextCursor } = paged
+          ? toPage(rows, pageSize, (m) => ({ createdAt: m.createdAt, id: m.id }))
+          : { items: rows, nextCursor: null };
+        return { memories, total: memories.length, nextCursor };
       },
     );
   };
@@ -0,0 +1,147 @@
+import type {
+  BackfillJob,
+  BackfillProgress,
+  BackfillProgressStore,
+} from "../repository/backfill-types.js";
+
+export interface BackfillOptions {
+  /** Chunks of one job processed concurrently. */
+  workers?: number;
+  /** Keys per chunk. */
+  batchSize?: number;
+}
+
+export interface BackfillStatusReport {
+  running: boolean;
+  jobs: BackfillProgress[];
+}
+
+const DEFAULT_WORKERS = 2;
+const DEFAULT_BATCH_SIZE = 100;
+
+function idle(name: string): BackfillProgress {
+  return {
+    name,
+    status: "pending",
+    cursor: null,
+    processed: 0,
+    total: null,
+    error: null,
+    startedAt: null,
+    finishedAt: null,
+  };
+}
+
+/**
+ * Runs backfill jobs in the background, one job at a time in the order
+ * given. Each round fetches `workers × batchSize` pending keys and processes
+ * them as `workers` concurrent chunks; the cursor is persisted after every
+ * round, so a run interrupted by a restart resumes after the last completed
+ * round. A failed job is recorded and the remaining jobs still run.
+ */
+export class BackfillService {
+  private workers: number;
+  private batchSize: number;
+  private progress = new Map<string, BackfillProgress>();
+  private running?: Promise<void>;
+  private active = false;
+  private stopping = false;
+
+  constructor(
+    private store: BackfillProgressStore,
+    private jobs: BackfillJob[],
+    options: BackfillOptions = {},
+  ) {
+    this.workers = Math.max(1, options.workers ?? DEFAULT_WORKERS);
+    this.batchSize = Math.max(1, options.batchSize ?? DEFAULT_BATCH_SIZE);
+    for (const job of jobs) this.progress.set(job.name, idle(job.name));
+  }
+
+  /** Start running all jobs; the returned promise settles when they are done. */
+  start(): Promise<void> {
+    this.running ??= this.runAll();
+    return this.running;
+  }
+
+  /** Stop after the current round; unfinished jobs resume on the next start. */
+  async close(): Promise<void> {
+    this.stopping = true;
+    await this.running;
+    await this.store.close();
+  }
+
+  status(): BackfillStatusReport {
+    return {
+      running: this.active,
+      jobs: this.jobs.map((job) => ({ ...this.progress.get(job.name)! })),
+    };
+  }
+
+  private async runAll(): Promise<void> {
+    this.active = true;
+    try {
+      for (const job of this.jobs) {
+        if (this.stopping) return;
+        await this.runJob(job);
+      }
+    } finally {
+      this.active = false;
+    }
+  }
+
+  private async runJob(job: BackfillJob): Promise<void> {
+    const progress = idle(job.name);
+    this.progress.set(job.name, progress);
+
+    try {
+      const saved = await this.store.load(job.name);
+      if (saved?.status === "running") {
+        progress.cursor = saved.cursor;
+        progress.processed = saved.processed;
+        progress.startedAt = saved.startedAt;
+        console.log(`Resuming backfill ${job.name} after ${saved.processed} rows`);
+      }
+      progress.status = "running";
+      progress.startedAt ??= new Date().toISOString();
+      if (job.count) {
+        progress.total = progress.processed + (await job.count());
+      }
+      await this.store.save(progress);
+
+      for (;;) {
+        if (this.stopping) return;
+
+        const keys = await job.pending(progress.cursor, this.workers * this.batchSize);
+        if (keys.length === 0) break;
+
+        const chunks: string[][] = [];
+        for (let i = 0; i < keys.length; i += this.batchSize) {
+          chunks.push(keys.slice(i, i + this.batchSize));
+        }
+        await Promise.all(chunks.map((chunk) => job.process(chunk)));
+
+        progress.cursor = keys[keys.length - 1];
+        progress.processed += keys.length;
+        await this.store.save(progress);
+      }
+
+      await job.finish?.();
+      progress.status = "done";
+      progress.finishedAt = new Date().toISOString();
+      await this.store.save(progress);
+      if (progress.processed > 0) {
+        console.log(`Backfill ${job.name} finished (${progress.processed} rows)`);
+      }
+    } catch (err) {
+      console.error(`Backfill ${job.name} failed: ${err}`);
+      progress.status = "failed";
+      progress.error = String(err);
+      progress.finishedAt = new Date().toISOString();
+      try {
+        await this.store.save(progress);
+      } catch (saveErr) {
+        console.error(`Failed to record backfill ${job.name} failure: ${saveErr}`);
+      }
+    }
+  }
+}
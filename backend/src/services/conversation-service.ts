@@ -1,9 +1,32 @@
-import type { Conversation } from "../types/conversation.js";
-import type { ConversationRepository } from "../repository/conversation-types.js";
+import type { Conversation, ConversationView } from "../types/conversation.js";
+import type {
+  ConversationRepository,
+  MessagePage,
+  UpsertConversationParams,
+} from "../repository/conversation-types.js";
+import type { RecencyKey } from "../repository/pagination.js";
 import type { EmbeddingService } from "../embedding/types.js";
+import type { SearchMode } from "../types/search.js";
+import type { ExportOptions, ExportRecord } from "../types/export.js";
+import { RRF_K } from "../repository/text-search.js";
 
 const MIN_EMBED_LENGTH = 50;
 
+export interface UpsertConversationOptions {
+  title?: string;
+  source?: string;
+  tags?: string[];
+  userId?: string | null;
+  /** Messages with an `embedding` (even null), e.g. from an export, are not re-embedded. */
+  messages?: { role: string; content: string; embedding?: number[] | null }[];
+}
+
+interface EmbeddedMessage {
+  role: string;
+  content: string;
+  embedding: number[] | null;
+}
+
 export class ConversationService {
   constructor(
     private repository: ConversationRepository,
@@ -19,17 +42,7 @@ export class ConversationService {
     messages: { role: string; content: string }[],
     options: { source?: string; sourceId?: string; tags?: string[]; userId?: string | null } = {},
   ): Promise<Conversation> {
-    const embeddedMessages = await Promise.all(
-      messages.map(async (msg) => {
-        let embedding: number[] | null = null;
-
-        if (msg.role === "user" && msg.content.length >= MIN_EMBED_LENGTH) {
-          embedding = await this.embedding.embed(msg.content);
-        }
-
-        return { role: msg.role, content: msg.content, embedding };
-      }),
-    );
+    const embeddedMessages = await this.embedMessages(messages);
 
     return this.repository.store({
       title,
@@ -43,30 +56,12 @@ export class ConversationService {
 
   async upsert(
     sourceId: string,
-    options: {
-      title?: string;
-      source?: string;
-      tags?: string[];
-      userId?: string | null;
-      messages?: { role: string; content: string }[];
-    } = {},
+    options: UpsertConversationOptions = {},
   ): Promise<Conversation> {
-    let embeddedMessages:
-      | { role: string; content: string; embedding: number[] | null }[]
-      | undefined;
+    let embeddedMessages: EmbeddedMessage[] | undefined;
 
     if (options.messages && options.messages.length > 0) {
-      embeddedMessages = await Promise.all(
-        options.messages.map(async (msg) => {
-          let embedding: number[] | null = null;
-
-          if (msg.role === "user" && msg.content.length >= MIN_EMBED_LENGTH) {
-            embedding = await this.embedding.embed(msg.content);
-          }
-
-          return { role: msg.role, content: msg.content, embedding };
-        }),
-      );
+      embeddedMessages = await this.embedMessages(options.messages);
     }
 
     return this.repository.upsert({
@@ -79,28 +74,141 @@ export class ConversationService {
     });
   }
 
+  /**
+   * Upsert a batch of conversations in a single repository transaction.
+   * Returns one conversation (without messages) per distinct sourceId.
+   */
+  async bulkUpsert(
+    items: ({ sourceId: string } & UpsertConversationOptions)[],
+  ): Promise<Conversation[]> {
+    // Embed every message in the batch together so requests to the
+    // embedding service are as full as possible, then split back per item.
+    const embedded = await this.embedMessages(items.flatMap((item) => item.messages ?? []));
+
+    let offset = 0;
+    const params: UpsertConversationParams[] = items.map((item) => {
+      const count = item.messages?.length ?? 0;
+      const messages = count > 0 ? embedded.slice(offset, offset + count) : undefined;
+      offset += count;
+
+      return {
+        sourceId: item.sourceId,
+        userId: item.userId,
+        title: item.title,
+        source: item.source,
+        tags: item.tags,
+        messages,
+      };
+    });
+
+    return this.repository.bulkUpsert(params);
+  }
+
   async search(
     query?: string,
     tags?: string[],
     limit?: number,
     include?: string[],
     userId?: string | null,
+    mode?: SearchMode,
+    diversity?: number,
+    view?: ConversationView,
+    after?: RecencyKey,
   ): Promise<Conversation[]> {
     let queryEmbedding: number[] | null = null;
 
-    if (query) {
+    if (query && mode !== "text") {
       queryEmbedding = await this.embedding.embed(query);
     }
 
     if (queryEmbedding) {
-      return this.repository.search({ query, tags, userId, queryEmbedding, limit, include });
+      return this.repository.search({ query, tags, userId, queryEmbedding, limit, include, mode, diversity, view, after });
+    }
+
+    return this.repository.search({ query, tags, userId, limit, include, mode, diversity, view, after });
+  }
+
+  /**
+   * Search once per query and fuse the rankings by reciprocal rank fusion,
+   * deduplicated by conversation. Queries are embedded in one batch and
+   * the searches run concurrently. Scores are RRF scores.
+   */
+  async multiSearch(
+    queries: string[],
+    tags?: string[],
+    limit?: number,
+    include?: string[],
+    userId?: string | null,
+    mode?: SearchMode,
+    view?: ConversationView,
+  ): Promise<Conversation[]> {
+    const embeddings = mode === "text"
+      ? queries.map(() => null)
+      : await this.embedding.embedBatch(queries);
+
+    const rankings = await Promise.all(
+      queries.map((query, i) => {
+        const queryEmbedding = embeddings[i];
+        return queryEmbedding
+          ? this.repository.search({ query, tags, userId, queryEmbedding, limit, include, mode, view })
+          : this.repository.search({ query, tags, userId, limit, include, mode, view });
+      }),
+    );
+
+    const fused = new Map<string, Conversation>();
+    for (const ranking of rankings) {
+      ranking.forEach((conversation, rank) => {
+        const existing = fused.get(conversation.id);
+        const score = (existing?.score ?? 0) + 1 / (RRF_K + rank + 1);
+        fused.set(conversation.id, { ...(existing ?? conversation), score });
+      });
     }
 
-    return this.repository.search({ query, tags, userId, limit, include });
+    return [...fused.values()]
+      .sort((a, b) => (b.score ?? 0) - (a.score ?? 0))
+      .slice(0, limit ?? 10);
+  }
+
+  /**
+   * Embed user messages long enough to carry meaning; others get null.
+   * Messages that already carry an embedding keep it.
+   */
+  private async embedMessages(
+    messages: { role: string; content: string; embedding?: number[] | null }[],
+  ): Promise<EmbeddedMessage[]> {
+    const indices: number[] = [];
+    messages.forEach((msg, i) => {
+      if (
+        msg.embedding === undefined &&
+        msg.role === "user" &&
+        msg.content.length >= MIN_EMBED_LENGTH
+      ) {
+        indices.push(i);
+      }
+    });
+
+    const vectors = indices.length > 0
+      ? await this.embedding.embedBatch(indices.map((i) => messages[i].content))
+      : [];
+    const byIndex = new Map(indices.map((msgIndex, i) => [msgIndex, vectors[i] ?? null]));
+
+    return messages.map((msg, i) => ({
+      role: msg.role,
+      content: msg.content,
+      embedding: msg.embedding !== undefined ? msg.embedding : byIndex.get(i) ?? null,
+    }));
+  }
+
+  exportRecords(options: ExportOptions): AsyncIterable<ExportRecord> {
+    return this.repository.exportRecords(options);
+  }
+
+  async getById(id: string, page?: MessagePage): Promise<Conversation | null> {
+    return this.repository.getById(id, page);
   }
 
-  async getById(id: string): Promise<Conversation | null> {
-    return this.repository.getById(id);
+  async getByIds(ids: string[], messageLimit?: number): Promise<Conversation[]> {
+    return this.repository.getByIds(ids, messageLimit);
   }
 
   async healthCheck(): Promise<boolean> {
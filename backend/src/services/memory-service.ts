@@ -1,6 +1,9 @@
 import type { Memory } from "../types/memory.js";
-import type { MemoryRepository } from "../repository/types.js";
+import type { MemoryRepository, StoreParams } from "../repository/types.js";
+import type { RecencyKey } from "../repository/pagination.js";
 import type { EmbeddingService } from "../embedding/types.js";
+import type { SearchMode } from "../types/search.js";
+import type { ExportOptions, ExportRecord } from "../types/export.js";
 
 export class MemoryService {
   constructor(
@@ -12,25 +15,55 @@ export class MemoryService {
     await this.repository.initialize();
   }
 
-  async store(content: string, tags: string[]): Promise<Memory> {
-    const vector = await this.embedding.embed(content);
+  /** Store a memory; a given embedding (e.g. from an export) is used as is. */
+  async store(content: string, tags: string[], embedding?: number[] | null): Promise<Memory> {
+    const vector = embedding !== undefined ? embedding : await this.embedding.embed(content);
     return this.repository.store({ content, tags, embedding: vector });
   }
 
-  async fetch(query?: string, tags?: string[]): Promise<Memory[]> {
+  /**
+   * Store many memories at once. Contents without a given embedding are
+   * embedded in one batch; the memories are written in one transaction.
+   */
+  async storeBatch(items: StoreParams[]): Promise<Memory[]> {
+    const pending = items.filter((item) => item.embedding === undefined);
+    const vectors = pending.length > 0
+      ? await this.embedding.embedBatch(pending.map((item) => item.content))
+      : [];
+    const embedded = new Map(pending.map((item, i) => [item, vectors[i] ?? null]));
+
+    return this.repository.storeBatch(
+      items.map((item) => ({
+        ...item,
+        embedding: item.embedding !== undefined ? item.embedding : embedded.get(item)!,
+      })),
+    );
+  }
+
+  async fetch(
+    query?: string,
+    tags?: string[],
+    mode?: SearchMode,
+    limit?: number,
+    after?: RecencyKey,
+  ): Promise<Memory[]> {
     let queryEmbedding: number[] | null = null;
 
-    if (query) {
+    if (query && mode !== "text") {
       queryEmbedding = await this.embedding.embed(query);
     }
 
     if (queryEmbedding) {
-      // Vector search — pass query too so repo can use it for tag filtering
-      return this.repository.fetch({ query, tags, queryEmbedding });
+      // Vector or hybrid search — pass query too for the full-text ranking
+      return this.repository.fetch({ query, tags, queryEmbedding, mode, limit, after });
     }
 
-    // Fallback to ILIKE text search
-    return this.repository.fetch({ query, tags });
+    // Text search: substring match when requested, else the degraded fallback
+    return this.repository.fetch({ query, tags, mode, limit, after });
+  }
+
+  exportRecords(options: ExportOptions): AsyncIterable<ExportRecord> {
+    return this.repository.exportRecords(options);
   }
 
   async healthCheck(): Promise<boolean> {
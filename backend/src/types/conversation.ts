@@ -7,6 +7,22 @@ export interface ConversationMessage {
   createdAt: string;
 }
 
+/**
+ * Shape of conversations in search results:
+ * - `full`:    every message with its full content.
+ * - `summary`: no messages; a message count and the best-matching message
+ *   as a snippet instead.
+ */
+export type ConversationView = "full" | "summary";
+
+export const CONVERSATION_VIEWS: ConversationView[] = ["full", "summary"];
+
+export interface MessageSnippet {
+  position: number;
+  role: string;
+  snippet: string;
+}
+
 export interface Conversation {
   id: string;
   title: string;
@@ -20,6 +36,8 @@ export interface Conversation {
   avgEmbedding?: number[] | null;
   centroids?: number[][] | null;
   messages?: ConversationMessage[];
+  messageCount?: number;
+  bestMatch?: MessageSnippet | null;
 }
 
 export interface StoreConversationRequest {
@@ -28,7 +46,37 @@ export interface StoreConversationRequest {
   title?: string;
   source?: string;
   tags?: string[];
-  messages?: { role: string; content: string }[];
+  /** `embedding`: base64 pgvector binary, as exported; skips re-embedding. */
+  messages?: { role: string; content: string; embedding?: string | null }[];
+}
+
+export interface BulkUpsertResult {
+  sourceId: string | null;
+  id?: string;
+  error?: string;
+}
+
+export interface GetConversationsRequest {
+  ids: string[];
+  /** Messages per conversation; each result carries a cursor for the rest. */
+  limit?: number;
+}
+
+export interface BatchGetResult {
+  id: string;
+  conversation?: Conversation;
+  nextCursor?: string | null;
+  error?: string;
+}
+
+export interface MultiSearchConversationsRequest {
+  queries: string[];
+  tags?: string[];
+  limit?: number;
+  include?: string[];
+  userId?: string;
+  mode?: string;
+  view?: string;
 }
 
 export interface SearchConversationsQuery {
@@ -37,4 +85,13 @@ export interface SearchConversationsQuery {
   limit?: string;
   include?: string;
   userId?: string;
+  mode?: string;
+  diversity?: string;
+  view?: string;
+  cursor?: string;
+}
+
+export interface GetConversationQuery {
+  limit?: string;
+  cursor?: string;
 }
@@ -0,0 +1,22 @@
+import type { Conversation, ConversationMessage } from "./conversation.js";
+import type { Memory } from "./memory.js";
+
+export interface ExportOptions {
+  /** Include embeddings, base64-encoded in pgvector's binary format. */
+  embeddings: boolean;
+}
+
+/**
+ * One line of an export stream. Each conversation is followed by its
+ * messages in position order; memories come after all conversations.
+ * `embedding` is present only when embeddings are exported, and null for
+ * messages or memories that were never embedded.
+ */
+export type ExportRecord =
+  | ({ type: "conversation" } & Omit<Conversation, "messages" | "score">)
+  | ({ type: "message"; embedding?: string | null } & ConversationMessage)
+  | ({ type: "memory"; embedding?: string | null } & Omit<Memory, "score">);
+
+export interface ExportQuery {
+  embeddings?: string;
+}
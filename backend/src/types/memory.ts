@@ -10,9 +10,33 @@ export interface Memory {
 export interface StoreMemoryRequest {
   content: string;
   tags?: string[];
+  /** Base64 pgvector binary embedding, as exported; skips re-embedding. */
+  embedding?: string | null;
+}
+
+/**
+ * A batch item. Restores pass the exported id and timestamps; an item whose
+ * id already exists is left as is, so re-running a restore is harmless.
+ */
+export interface StoreMemoriesItem extends StoreMemoryRequest {
+  id?: string;
+  createdAt?: string;
+  updatedAt?: string;
+}
+
+export interface StoreMemoriesRequest {
+  memories: StoreMemoriesItem[];
+}
+
+export interface BatchStoreResult {
+  id?: string;
+  error?: string;
 }
 
 export interface FetchMemoriesQuery {
   query?: string;
   tags?: string;
+  mode?: string;
+  limit?: string;
+  cursor?: string;
 }
@@ -0,0 +1,13 @@
+/**
+ * How a query is matched:
+ *
+ * - `vector`: semantic similarity of embeddings (falls back to `text` when
+ *   no query embedding is available). The default.
+ * - `text`:   case-insensitive substring match; no embedding is computed.
+ * - `hybrid`: semantic similarity fused with a full-text keyword ranking by
+ *   reciprocal rank fusion; exact keywords such as product or company names
+ *   are found even when embeddings miss them.
+ */
+export type SearchMode = "vector" | "text" | "hybrid";
+
+export const SEARCH_MODES: SearchMode[] = ["vector", "text", "hybrid"];
@@ -0,0 +1,61 @@
+import type { RecencyKey } from "../repository/pagination.js";
+
+/**
+ * Opaque pagination cursors: the keyset of the last item of a page,
+ * JSON-encoded as base64url so that clients pass them back verbatim.
+ */
+
+export function encodeCursor(key: RecencyKey | { position: number }): string {
+  return Buffer.from(JSON.stringify(key)).toString("base64url");
+}
+
+function decode(cursor: string): Record<string, unknown> | null {
+  try {
+    const value = JSON.parse(Buffer.from(cursor, "base64url").toString("utf8"));
+    return value !== null && typeof value === "object" ? value : null;
+  } catch {
+    return null;
+  }
+}
+
+/** Decode a cursor of a recency listing; null if it is malformed. */
+export function decodeRecencyCursor(cursor: string): RecencyKey | null {
+  const value = decode(cursor);
+  if (
+    !value ||
+    typeof value.createdAt !== "string" ||
+    Number.isNaN(Date.parse(value.createdAt)) ||
+    typeof value.id !== "string" ||
+    !/^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i.test(value.id)
+  ) {
+    return null;
+  }
+  return { createdAt: value.createdAt, id: value.id };
+}
+
+/** Decode a cursor of a message page; null if it is malformed. */
+export function decodePositionCursor(cursor: string): number | null {
+  const value = decode(cursor);
+  return value && Number.isInteger(value.position) ? (value.position as number) : null;
+}
+
+/** Parse a page size query parameter; null unless it is a positive integer. */
+export function parsePageSize(value: string | undefined, fallback: number): number | null {
+  if (value === undefined || value === "") return fallback;
+  const size = Number(value);
+  return Number.isInteger(size) && size > 0 ? size : null;
+}
+
+/**
+ * Trim `rows`, fetched with a limit of `pageSize + 1`, to one page; the
+ * cursor is null when there is no further page.
+ */
+export function toPage<T>(
+  rows: T[],
+  pageSize: number,
+  key: (last: T) => RecencyKey | { position: number },
+): { items: T[]; nextCursor: string | null } {
+  if (rows.length <= pageSize) return { items: rows, nextCursor: null };
+  const items = rows.slice(0, pageSize);
+  return { items, nextCursor: encodeCursor(key(items[items.length - 1])) };
+}
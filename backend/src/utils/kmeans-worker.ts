@@ -0,0 +1,8 @@
+import { parentPort, workerData } from "node:worker_threads";
+import { kMeansFlat } from "./kmeans.js";
+import type { KMeansWorkerData } from "./kmeans.js";
+
+// Entry point of the worker thread started by kMeansAsync().
+const { data, dim, k, options } = workerData as KMeansWorkerData;
+const centroids = kMeansFlat(data, dim, k, options);
+parentPort!.postMessage(centroids, [centroids.buffer as ArrayBuffer]);
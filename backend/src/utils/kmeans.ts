@@ -1,7 +1,7 @@
 /**
  * Cosine similarity between two vectors.
  */
-export function cosineSimilarity(a: number[], b: number[]): number {
+export function cosineSimilarity(a: ArrayLike<number>, b: ArrayLike<number>): number {
   if (a.length !== b.length || a.length === 0) return 0;
   let dot = 0;
   let magA = 0;
@@ -15,7 +15,7 @@ export function cosineSimilarity(a: number[], b: number[]): number {
   return denom === 0 ? 0 : dot / denom;
 }
 
-function euclideanDistSq(a: number[], b: number[]): number {
+function euclideanDistSq(a: ArrayLike<number>, b: ArrayLike<number>): number {
   let sum = 0;
   for (let i = 0; i < a.length; i++) {
     const d = a[i] - b[i];
@@ -24,88 +24,323 @@ function euclideanDistSq(a: number[], b: number[]): number {
   return sum;
 }
 
+export interface KMeansOptions {
+  /** Maximum number of Lloyd iterations. */
+  maxIterations?: number;
+  /** Stop once no centroid moves farther than this (Euclidean distance). */
+  tolerance?: number;
+}
+
+const DEFAULT_MAX_ITERATIONS = 50;
+
+/** Copy vectors into one row-major n×dim Float32Array. */
+export function packVectors(vectors: ArrayLike<number>[]): Float32Array {
+  const dim = vectors.length > 0 ? vectors[0].length : 0;
+  const data = new Float32Array(vectors.length * dim);
+  for (let i = 0; i < vectors.length; i++) {
+    data.set(vectors[i], i * dim);
+  }
+  return data;
+}
+
+function unpackCentroids(centroids: Float64Array, dim: number): number[][] {
+  const result: number[][] = [];
+  for (let off = 0; off < centroids.length; off += dim) {
+    result.push(Array.from(centroids.subarray(off, off + dim)));
+  }
+  return result;
+}
+
+/** Euclidean distance between row `i` of `data` and row `c` of `centroids`. */
+function rowDistance(
+  data: Float32Array,
+  i: number,
+  centroids: Float64Array,
+  c: number,
+  dim: number,
+): number {
+  const a = i * dim;
+  const b = c * dim;
+  let sum = 0;
+  for (let d = 0; d < dim; d++) {
+    const diff = data[a + d] - centroids[b + d];
+    sum += diff * diff;
+  }
+  return Math.sqrt(sum);
+}
+
 /**
- * k-means clustering with deterministic max-min initialization.
- * Returns k centroid vectors. If n <= k, returns the input vectors directly.
+ * k-means over a row-major n×dim buffer; returns the k×dim centroids.
+ *
+ * Initialization is deterministic max-min: the first centroid is row 0 and
+ * each subsequent centroid is the row farthest from its nearest centroid.
+ * Assignment uses Hamerly's bounds: each row keeps an upper bound on the
+ * distance to its centroid and a lower bound on the distance to any other,
+ * so rows whose bounds prove the assignment unchanged skip the O(k·dim)
+ * scan. Cluster sums are updated incrementally as rows move, and all
+ * buffers are allocated once up front.
  */
-export function kMeans(
-  vectors: number[][],
+export function kMeansFlat(
+  data: Float32Array,
+  dim: number,
   k: number,
-  maxIterations = 50,
-): number[][] {
-  const n = vectors.length;
-  if (n === 0) return [];
-  if (n <= k) return vectors.map((v) => [...v]);
-
-  const dim = vectors[0].length;
-
-  // Deterministic max-min initialization: first centroid is vectors[0],
-  // each subsequent centroid is the point farthest from its nearest centroid.
-  const centroids: number[][] = [[...vectors[0]]];
-  const minDist = new Array<number>(n).fill(Infinity);
+  options: KMeansOptions = {},
+): Float64Array {
+  const maxIterations = options.maxIterations ?? DEFAULT_MAX_ITERATIONS;
+  const tolerance = options.tolerance ?? 0;
+  const n = dim > 0 ? data.length / dim : 0;
+  const centroids = new Float64Array(k * dim);
 
+  // Max-min initialization.
+  const upper = new Float64Array(n).fill(Infinity);
+  for (let d = 0; d < dim; d++) centroids[d] = data[d];
   for (let c = 1; c < k; c++) {
-    const lastCentroid = centroids[c - 1];
     let farthestIdx = 0;
     let farthestDist = 0;
-
     for (let i = 0; i < n; i++) {
-      const d = euclideanDistSq(vectors[i], lastCentroid);
-      if (d < minDist[i]) minDist[i] = d;
-      if (minDist[i] > farthestDist) {
-        farthestDist = minDist[i];
+      const dist = rowDistance(data, i, centroids, c - 1, dim);
+      if (dist < upper[i]) upper[i] = dist;
+      if (upper[i] > farthestDist) {
+        farthestDist = upper[i];
         farthestIdx = i;
       }
     }
-
-    centroids.push([...vectors[farthestIdx]]);
+    centroids.set(data.subarray(farthestIdx * dim, (farthestIdx + 1) * dim), c * dim);
   }
 
-  // Lloyd's iterations
-  const assignments = new Array<number>(n).fill(-1);
+  const lower = new Float64Array(n);
+  const assignments = new Int32Array(n);
+  const sums = new Float64Array(k * dim);
+  const counts = new Int32Array(k);
+  const shift = new Float64Array(k);
+  const halfGap = new Float64Array(k);
 
-  for (let iter = 0; iter < maxIterations; iter++) {
-    // Assignment step
-    let changed = false;
-    for (let i = 0; i < n; i++) {
-      let bestCluster = 0;
-      let bestDist = Infinity;
-      for (let c = 0; c < k; c++) {
-        const d = euclideanDistSq(vectors[i], centroids[c]);
-        if (d < bestDist) {
-          bestDist = d;
-          bestCluster = c;
-        }
-      }
-      if (assignments[i] !== bestCluster) {
-        assignments[i] = bestCluster;
-        changed = true;
+  /** Full scan of row i against every centroid; returns the nearest. */
+  const scan = (i: number): number => {
+    let best = 0;
+    let bestDist = Infinity;
+    let second = Infinity;
+    for (let c = 0; c < k; c++) {
+      const dist = rowDistance(data, i, centroids, c, dim);
+      if (dist < bestDist) {
+        second = bestDist;
+        bestDist = dist;
+        best = c;
+      } else if (dist < second) {
+        second = dist;
       }
     }
+    upper[i] = bestDist;
+    lower[i] = second;
+    return best;
+  };
 
-    if (!changed) break;
+  const addRow = (i: number, c: number, sign: number): void => {
+    const a = i * dim;
+    const b = c * dim;
+    for (let d = 0; d < dim; d++) sums[b + d] += sign * data[a + d];
+    counts[c] += sign;
+  };
 
-    // Update step: recompute centroids
-    const sums: number[][] = Array.from({ length: k }, () =>
-      new Array<number>(dim).fill(0),
-    );
-    const counts = new Array<number>(k).fill(0);
+  for (let i = 0; i < n; i++) {
+    assignments[i] = scan(i);
+    addRow(i, assignments[i], 1);
+  }
 
-    for (let i = 0; i < n; i++) {
-      const c = assignments[i];
-      counts[c]++;
+  for (let iter = 0; iter < maxIterations; iter++) {
+    // Update step: move each non-empty cluster to its mean.
+    let maxShift = 0;
+    for (let c = 0; c < k; c++) {
+      shift[c] = 0;
+      if (counts[c] === 0) continue;
+      const b = c * dim;
+      let moved = 0;
       for (let d = 0; d < dim; d++) {
-        sums[c][d] += vectors[i][d];
+        const next = sums[b + d] / counts[c];
+        const diff = next - centroids[b + d];
+        moved += diff * diff;
+        centroids[b + d] = next;
       }
+      shift[c] = Math.sqrt(moved);
+      if (shift[c] > maxShift) maxShift = shift[c];
     }
+    if (maxShift <= tolerance || iter === maxIterations - 1) break;
 
+    // Half the distance from each centroid to its nearest other centroid:
+    // a row closer than that to its own centroid cannot be closer to another.
     for (let c = 0; c < k; c++) {
-      if (counts[c] === 0) continue;
-      for (let d = 0; d < dim; d++) {
-        centroids[c][d] = sums[c][d] / counts[c];
+      let nearest = Infinity;
+      for (let o = 0; o < k; o++) {
+        if (o === c) continue;
+        let sum = 0;
+        for (let d = 0; d < dim; d++) {
+          const diff = centroids[c * dim + d] - centroids[o * dim + d];
+          sum += diff * diff;
+        }
+        if (sum < nearest) nearest = sum;
+      }
+      halfGap[c] = Math.sqrt(nearest) / 2;
+    }
+
+    // Assignment step, pruned by the bounds.
+    let changed = false;
+    for (let i = 0; i < n; i++) {
+      const a = assignments[i];
+      upper[i] += shift[a];
+      lower[i] -= maxShift;
+
+      const bound = Math.max(halfGap[a], lower[i]);
+      if (upper[i] <= bound) continue;
+      upper[i] = rowDistance(data, i, centroids, a, dim);
+      if (upper[i] <= bound) continue;
+
+      const best = scan(i);
+      if (best !== a) {
+        addRow(i, a, -1);
+        addRow(i, best, 1);
+        assignments[i] = best;
+        changed = true;
       }
     }
+
+    if (!changed) break;
   }
 
   return centroids;
 }
+
+/**
+ * k-means clustering with deterministic max-min initialization.
+ * Returns k centroid vectors. If n <= k, returns the input vectors directly.
+ */
+export function kMeans(
+  vectors: ArrayLike<number>[],
+  k: number,
+  options: KMeansOptions = {},
+): number[][] {
+  const n = vectors.length;
+  if (n === 0) return [];
+  if (n <= k) return vectors.map((v) => Array.from(v));
+
+  const dim = vectors[0].length;
+  return unpackCentroids(kMeansFlat(packVectors(vectors), dim, k, options), dim);
+}
+
+export interface KMeansAsyncOptions extends KMeansOptions {
+  /**
+   * Run in a worker thread when n × dim is at least this many values;
+   * smaller inputs are clustered inline, where a worker would cost more to
+   * start than it saves.
+   */
+  workerThreshold?: number;
+}
+
+export const DEFAULT_WORKER_THRESHOLD = 1_000_000;
+
+/** Message exchanged with utils/kmeans-worker. */
+export interface KMeansWorkerData {
+  data: Float32Array;
+  dim: number;
+  k: number;
+  options: KMeansOptions;
+}
+
+/**
+ * kMeans() for callers on the request path: large inputs are clustered on
+ * a worker thread so the event loop stays responsive. Falls back to
+ * clustering inline if the worker cannot be started.
+ */
+export async function kMeansAsync(
+  vectors: ArrayLike<number>[],
+  k: number,
+  options: KMeansAsyncOptions = {},
+): Promise<number[][]> {
+  const n = vectors.length;
+  const dim = n > 0 ? vectors[0].length : 0;
+  const { workerThreshold = DEFAULT_WORKER_THRESHOLD, ...kMeansOptions } = options;
+  if (n <= k || n * dim < workerThreshold) return kMeans(vectors, k, kMeansOptions);
+
+  const data = packVectors(vectors);
+  try {
+    const centroids = await runWorker({ data, dim, k, options: kMeansOptions });
+    return unpackCentroids(centroids, dim);
+  } catch (err) {
+    console.warn(`k-means worker failed, clustering inline: ${err}`);
+    return kMeans(vectors, k, kMeansOptions);
+  }
+}
+
+async function runWorker(workerData: KMeansWorkerData): Promise<Float64Array> {
+  const { Worker } = await import("node:worker_threads");
+  // Resolve the worker next to this module, as .ts under tsx and .js in dist.
+  const ext = import.meta.url.endsWith(".ts") ? ".ts" : ".js";
+  const worker = new Worker(new URL(`./kmeans-worker${ext}`, import.meta.url), {
+    workerData,
+    transferList: [workerData.data.buffer as ArrayBuffer],
+  });
+
+  return new Promise<Float64Array>((resolve, reject) => {
+    worker.once("message", (centroids: Float64Array) => {
+      resolve(centroids);
+      void worker.terminate();
+    });
+    worker.once("error", reject);
+    worker.once("exit", (code) => {
+      reject(new Error(`k-means worker exited with code ${code}`));
+    });
+  });
+}
+
+export function euclideanDistance(a: ArrayLike<number>, b: ArrayLike<number>): number {
+  return Math.sqrt(euclideanDistSq(a, b));
+}
+
+/** Index of the centroid closest to `vector`. */
+export function nearestCentroid(vector: ArrayLike<number>, centroids: ArrayLike<number>[]): number {
+  let best = 0;
+  let bestDist = Infinity;
+  for (let c = 0; c < centroids.length; c++) {
+    const d = euclideanDistSq(vector, centroids[c]);
+    if (d < bestDist) {
+      bestDist = d;
+      best = c;
+    }
+  }
+  return best;
+}
+
+export interface WeightedCentroid {
+  vector: number[];
+  /** Number of vectors this centroid summarises. */
+  weight: number;
+}
+
+/**
+ * Online (MacQueen) k-means update: fold `vectors` into existing centroids
+ * in time proportional to the new vectors only. While fewer than k
+ * centroids exist, new vectors become centroids of their own, matching
+ * kMeans() for n <= k. Returns updated copies; the input is not modified.
+ */
+export function onlineKMeansUpdate(
+  centroids: WeightedCentroid[],
+  vectors: ArrayLike<number>[],
+  k: number,
+): WeightedCentroid[] {
+  const result = centroids.map((c) => ({ vector: [...c.vector], weight: c.weight }));
+
+  for (const vec of vectors) {
+    if (result.length < k) {
+      result.push({ vector: Array.from(vec), weight: 1 });
+      continue;
+    }
+
+    const target = result[nearestCentroid(vec, result.map((c) => c.vector))];
+    target.weight++;
+    const rate = 1 / target.weight;
+    for (let d = 0; d < target.vector.length; d++) {
+      target.vector[d] += (vec[d] - target.vector[d]) * rate;
+    }
+  }
+
+  return result;
+}
@@ -0,0 +1,70 @@
+import { cosineSimilarity } from "./kmeans.js";
+
+export interface MmrCandidate {
+  score: number;
+  /** Embedding used for redundancy; candidates without one are never penalised. */
+  embedding: ArrayLike<number> | null;
+}
+
+/**
+ * Greedy maximal marginal relevance selection. Each step picks the
+ * candidate maximising
+ *
+ *   (1 - diversity) * relevance - diversity * max cosine to the picks so far
+ *
+ * where relevance is the score min-max normalised over the candidates, so
+ * that similarity and RRF scores weigh the same against redundancy.
+ * Negative similarities count as 0. Ties go to the earlier candidate.
+ *
+ * Returns indices into `candidates` in pick order.
+ */
+export function mmrSelect(
+  candidates: MmrCandidate[],
+  k: number,
+  diversity: number,
+): number[] {
+  const n = candidates.length;
+  const count = Math.min(k, n);
+  if (count <= 0) return [];
+
+  let min = Infinity;
+  let max = -Infinity;
+  for (const c of candidates) {
+    if (c.score < min) min = c.score;
+    if (c.score > max) max = c.score;
+  }
+  const range = max - min;
+  const relevance = candidates.map((c) => (range > 0 ? (c.score - min) / range : 1));
+
+  // Highest similarity of each candidate to any pick, updated per pick.
+  const redundancy = new Float64Array(n);
+  const picked = new Uint8Array(n);
+  const order: number[] = [];
+
+  while (order.length < count) {
+    let best = -1;
+    let bestValue = -Infinity;
+    for (let i = 0; i < n; i++) {
+      if (picked[i]) continue;
+      const value = (1 - diversity) * relevance[i] - diversity * redundancy[i];
+      if (value > bestValue) {
+        bestValue = value;
+        best = i;
+      }
+    }
+
+    picked[best] = 1;
+    order.push(best);
+
+    const chosen = candidates[best].embedding;
+    if (!chosen) continue;
+    for (let i = 0; i < n; i++) {
+      const embedding = candidates[i].embedding;
+      if (picked[i] || !embedding) continue;
+      const similarity = cosineSimilarity(chosen, embedding);
+      if (similarity > redundancy[i]) redundancy[i] = similarity;
+    }
+  }
+
+  return order;
+}
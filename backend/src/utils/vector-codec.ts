@@ -0,0 +1,90 @@
+/**
+ * pgvector binary wire format (vector_send / vector_recv):
+ * int16 dim, int16 unused, then dim float4 values, all big-endian.
+ *
+ * node-postgres sends Buffer parameters in binary format, so an encoded
+ * vector bound to `$n::vector` is read by vector_recv without any text
+ * formatting or parsing. Reads go through `vector_send(col)`, which
+ * arrives as a bytea Buffer.
+ */
+
+const HEADER_BYTES = 4;
+
+export function encodeVector(vector: ArrayLike<number>): Buffer {
+  const buf = Buffer.allocUnsafe(HEADER_BYTES + vector.length * 4);
+  buf.writeInt16BE(vector.length, 0);
+  buf.writeInt16BE(0, 2);
+  for (let i = 0; i < vector.length; i++) {
+    buf.writeFloatBE(vector[i], HEADER_BYTES + i * 4);
+  }
+  return buf;
+}
+
+export function decodeVector(buf: Buffer): Float32Array {
+  const dim = buf.readInt16BE(0);
+  const out = new Float32Array(dim);
+  for (let i = 0; i < dim; i++) {
+    out[i] = buf.readFloatBE(HEADER_BYTES + i * 4);
+  }
+  return out;
+}
+
+/**
+ * Decode a base64 string of the binary format, as written by exports;
+ * null if it is not a well-formed vector.
+ */
+export function decodeVectorBase64(value: string): Float32Array | null {
+  const buf = Buffer.from(value, "base64");
+  if (buf.length < HEADER_BYTES || buf.length !== HEADER_BYTES + buf.readInt16BE(0) * 4) {
+    return null;
+  }
+  return decodeVector(buf);
+}
+
+/**
+ * Read an optional imported embedding: a base64 string in the binary
+ * format (as exports write it), null, or absent. Returns false if the value
+ * is anything else or does not have `dimensions` values.
+ */
+export function importedEmbedding(
+  value: unknown,
+  dimensions: number,
+): number[] | null | undefined | false {
+  if (value === undefined || value === null) return value;
+  if (typeof value !== "string") return false;
+  const vector = decodeVectorBase64(value);
+  return vector && vector.length === dimensions ? Array.from(vector) : false;
+}
+
+/**
+ * Encode a one-dimensional `vector[]` in Postgres' binary array format.
+ * `elementOid` is the OID of the vector type, which differs per database.
+ */
+export function encodeVectorArray(
+  vectors: (ArrayLike<number> | null)[],
+  elementOid: number,
+): Buffer {
+  const elements = vectors.map((v) => (v ? encodeVector(v) : null));
+  const hasNull = elements.some((e) => e === null);
+  const size = 20 + elements.reduce((sum, e) => sum + 4 + (e?.length ?? 0), 0);
+
+  const buf = Buffer.allocUnsafe(size);
+  buf.writeInt32BE(1, 0); // ndim
+  buf.writeInt32BE(hasNull ? 1 : 0, 4);
+  buf.writeUInt32BE(elementOid, 8);
+  buf.writeInt32BE(elements.length, 12);
+  buf.writeInt32BE(1, 16); // lower bound
+
+  let offset = 20;
+  for (const e of elements) {
+    if (e === null) {
+      buf.writeInt32BE(-1, offset);
+      offset += 4;
+    } else {
+      buf.writeInt32BE(e.length, offset);
+      e.copy(buf, offset + 4);
+      offset += 4 + e.length;
+    }
+  }
+  return buf;
+}
@@ -0,0 +1,199 @@
+import { describe, it, expect, vi } from "vitest";
+import { buildApp } from "../src/app.js";
+import { InMemoryRepository } from "../src/repository/index.js";
+import type {
+  BackfillJob,
+  BackfillProgress,
+  BackfillProgressStore,
+} from "../src/repository/index.js";
+import { NoopEmbeddingService } from "../src/embedding/index.js";
+import { MemoryService } from "../src/services/memory-service.js";
+import { BackfillService } from "../src/services/backfill-service.js";
+
+function createMockStore(saved: BackfillProgress[] = []) {
+  const rows = new Map(saved.map((p) => [p.name, { ...p }]));
+  return {
+    rows,
+    initialize: vi.fn(),
+    load: vi.fn(async (name: string) => rows.get(name) ?? null),
+    save: vi.fn(async (progress: BackfillProgress) => {
+      rows.set(progress.name, { ...progress });
+    }),
+    close: vi.fn(),
+  } satisfies BackfillProgressStore & { rows: Map<string, BackfillProgress> };
+}
+
+/** A job over `keys`; a key stops being pending once processed. */
+function createJob(name: string, keys: string[]) {
+  const done = new Set<string>();
+  const chunks: string[][] = [];
+  return {
+    chunks,
+    name,
+    pending: vi.fn(async (after: string | null, limit: number) =>
+      keys.filter((k) => !done.has(k) && (after === null || k > after)).slice(0, limit),
+    ),
+    process: vi.fn(async (chunk: string[]) => {
+      chunks.push(chunk);
+      chunk.forEach((k) => done.add(k));
+    }),
+    count: vi.fn(async () => keys.filter((k) => !done.has(k)).length),
+    finish: vi.fn(),
+  } satisfies BackfillJob & { chunks: string[][] };
+}
+
+const KEYS = ["a", "b", "c", "d", "e", "f", "g", "h", "i", "j"];
+
+describe("BackfillService", () => {
+  it("processes pending keys in concurrent chunks", async () => {
+    const store = createMockStore();
+    const job = createJob("job", KEYS);
+    const backfill = new BackfillService(store, [job], { workers: 2, batchSize: 3 });
+
+    await backfill.start();
+
+    expect(job.chunks).toEqual([["a", "b", "c"], ["d", "e", "f"], ["g", "h", "i"], ["j"]]);
+    expect(job.pending).toHaveBeenNthCalledWith(1, null, 6);
+    expect(job.pending).toHaveBeenNthCalledWith(2, "f", 6);
+    expect(job.finish).toHaveBeenCalledOnce();
+
+    const [progress] = backfill.status().jobs;
+    expect(progress).toMatchObject({
+      name: "job",
+      status: "done",
+      cursor: "j",
+      processed: 10,
+      total: 10,
+      error: null,
+    });
+    expect(store.rows.get("job")?.status).toBe("done");
+  });
+
+  it("resumes an interrupted run from the saved cursor", async () => {
+    const store = createMockStore([
+      {
+        name: "job",
+        status: "running",
+        cursor: "e",
+        processed: 5,
+        total: 10,
+        error: null,
+        startedAt: "2026-01-01T00:00:00.000Z",
+        finishedAt: null,
+      },
+    ]);
+    const job = createJob("job", KEYS);
+    const backfill = new BackfillService(store, [job], { workers: 1, batchSize: 10 });
+
+    await backfill.start();
+
+    expect(job.pending).toHaveBeenNthCalledWith(1, "e", 10);
+    expect(job.chunks).toEqual([["f", "g", "h", "i", "j"]]);
+    expect(backfill.status().jobs[0]).toMatchObject({
+      status: "done",
+      processed: 10,
+      startedAt: "2026-01-01T00:00:00.000Z",
+    });
+  });
+
+  it("starts from the beginning after a finished run", async () => {
+    const store = createMockStore([
+      {
+        name: "job",
+        status: "done",
+        cursor: "j",
+        processed: 10,
+        total: 10,
+        error: null,
+        startedAt: null,
+        finishedAt: null,
+      },
+    ]);
+    const job = createJob("job", ["a", "b"]);
+    const backfill = new BackfillService(store, [job]);
+
+    await backfill.start();
+
+    expect(job.pending).toHaveBeenNthCalledWith(1, null, 200);
+    expect(backfill.status().jobs[0]).toMatchObject({ status: "done", processed: 2 });
+  });
+
+  it("records a failed job and runs the remaining ones", async () => {
+    const store = createMockStore();
+    const failing = createJob("failing", KEYS);
+    failing.process.mockRejectedValueOnce(new Error("boom"));
+    const next = createJob("next", ["a"]);
+    const backfill = new BackfillService(store, [failing, next]);
+
+    await backfill.start();
+
+    const [failed, done] = backfill.status().jobs;
+    expect(failed).toMatchObject({ status: "failed", error: "Error: boom" });
+    expect(failing.finish).not.toHaveBeenCalled();
+    expect(store.rows.get("failing")?.status).toBe("failed");
+    expect(done).toMatchObject({ status: "done", processed: 1 });
+  });
+
+  it("stops between rounds on close and leaves the job resumable", async () => {
+    const store = createMockStore();
+    const job = createJob("job", KEYS);
+    const backfill = new BackfillService(store, [job], { workers: 1, batchSize: 2 });
+
+    let closing: Promise<void> | undefined;
+    job.process.mockImplementationOnce(async () => {
+      closing = backfill.close();
+    });
+
+    await backfill.start();
+    await closing;
+
+    expect(job.process).toHaveBeenCalledOnce();
+    expect(store.rows.get("job")).toMatchObject({ status: "running", cursor: "b", processed: 2 });
+    expect(store.close).toHaveBeenCalledOnce();
+    expect(job.finish).not.toHaveBeenCalled();
+  });
+
+  it("reports jobs that have not started as pending", () => {
+    const backfill = new BackfillService(createMockStore(), [createJob("job", KEYS)]);
+    expect(backfill.status()).toEqual({
+      running: false,
+      jobs: [
+        {
+          name: "job",
+          status: "pending",
+          cursor: null,
+          processed: 0,
+          total: null,
+          error: null,
+          startedAt: null,
+          finishedAt: null,
+        },
+      ],
+    });
+  });
+});
+
+describe("GET /api/backfill/status", () => {
+  function createService() {
+    return new MemoryService(new InMemoryRepository(), new NoopEmbeddingService());
+  }
+
+  it("returns job progress", async () => {
+    const backfill = new BackfillService(createMockStore(), [createJob("job", ["a"])]);
+    await backfill.start();
+
+    const app = buildApp({ service: createService(), backfill });
+    const res = await app.inject({ method: "GET", url: "/api/backfill/status" });
+
+    expect(res.statusCode).toBe(200);
+    expect(res.json().running).toBe(false);
+    expect(res.json().jobs[0]).toMatchObject({ name: "job", status: "done", processed: 1 });
+  });
+
+  it("is not registered without a backfill service", async () => {
+    const app = buildApp({ service: createService() });
+    const res = await app.inject({ method: "GET", url: "/api/backfill/status" });
+
+    expect(res.statusCode).toBe(404);
+  });
+});
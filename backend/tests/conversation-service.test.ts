@@ -31,6 +31,7 @@ function createMockRepo(): ConversationRepository {
     getById: vi.fn().mockResolvedValue(mockConversation),
     findBySourceId: vi.fn().mockResolvedValue(null),
     upsert: vi.fn().mockResolvedValue(mockConversation),
+    bulkUpsert: vi.fn().mockResolvedValue([mockConversation]),
     healthCheck: vi.fn().mockResolvedValue(true),
     close: vi.fn(),
   };
@@ -41,6 +42,7 @@ function createMockEmbedding(
 ): EmbeddingService {
   return {
     embed: vi.fn().mockResolvedValue(vector),
+    embedBatch: vi.fn().mockImplementation(async (texts: string[]) => texts.map(() => vector)),
     healthCheck: vi.fn().mockResolvedValue(vector !== null),
   };
 }
@@ -66,8 +68,8 @@ describe("ConversationService", () => {
         { role: "assistant", content: "Sure, here is a long response about that topic." },
       ]);
 
-      expect(embedding.embed).toHaveBeenCalledTimes(1);
-      expect(embedding.embed).toHaveBeenCalledWith(longMsg);
+      expect(embedding.embedBatch).toHaveBeenCalledTimes(1);
+      expect(embedding.embedBatch).toHaveBeenCalledWith([longMsg]);
 
       const storeCall = (repo.store as ReturnType<typeof vi.fn>).mock.calls[0][0];
       expect(storeCall.messages[0].embedding).toEqual(fakeVector);
@@ -80,7 +82,7 @@ describe("ConversationService", () => {
         { role: "user", content: "Yes" },
       ]);
 
-      expect(embedding.embed).not.toHaveBeenCalled();
+      expect(embedding.embedBatch).not.toHaveBeenCalled();
 
       const storeCall = (repo.store as ReturnType<typeof vi.fn>).mock.calls[0][0];
       expect(storeCall.messages[0].embedding).toBeNull();
@@ -93,7 +95,7 @@ describe("ConversationService", () => {
         { role: "assistant", content: longAssistant },
       ]);
 
-      expect(embedding.embed).not.toHaveBeenCalled();
+      expect(embedding.embedBatch).not.toHaveBeenCalled();
     });
 
     it("passes source, sourceId, and tags to repository", async () => {
@@ -137,8 +139,8 @@ describe("ConversationService", () => {
         ],
       });
 
-      expect(embedding.embed).toHaveBeenCalledTimes(1);
-      expect(embedding.embed).toHaveBeenCalledWith(longMsg);
+      expect(embedding.embedBatch).toHaveBeenCalledTimes(1);
+      expect(embedding.embedBatch).toHaveBeenCalledWith([longMsg]);
 
       const upsertCall = (repo.upsert as ReturnType<typeof vi.fn>).mock.calls[0][0];
       expect(upsertCall.sourceId).toBe("src-1");
@@ -163,7 +165,7 @@ describe("ConversationService", () => {
     it("does not embed when no messages provided", async () => {
       await service.upsert("src-3");
 
-      expect(embedding.embed).not.toHaveBeenCalled();
+      expect(embedding.embedBatch).not.toHaveBeenCalled();
 
       const upsertCall = (repo.upsert as ReturnType<typeof vi.fn>).mock.calls[0][0];
       expect(upsertCall.sourceId).toBe("src-3");
@@ -175,7 +177,7 @@ describe("ConversationService", () => {
         messages: [{ role: "user", content: "Hi" }],
       });
 
-      expect(embedding.embed).not.toHaveBeenCalled();
+      expect(embedding.embedBatch).not.toHaveBeenCalled();
       const upsertCall = (repo.upsert as ReturnType<typeof vi.fn>).mock.calls[0][0];
       expect(upsertCall.messages[0].embedding).toBeNull();
     });
@@ -191,6 +193,28 @@ describe("ConversationService", () => {
     });
   });
 
+  describe("bulkUpsert", () => {
+    it("embeds long user messages across all items", async () => {
+      const longMsg = "This is a user message that is definitely longer than fifty characters in total";
+      await service.bulkUpsert([
+        { sourceId: "bulk-1", title: "One", messages: [{ role: "user", content: longMsg }] },
+        { sourceId: "bulk-2", messages: [{ role: "user", content: "Hi" }] },
+        { sourceId: "bulk-3", title: "Metadata only" },
+      ]);
+
+      expect(embedding.embedBatch).toHaveBeenCalledTimes(1);
+      expect(embedding.embedBatch).toHaveBeenCalledWith([longMsg]);
+
+      const items = (repo.bulkUpsert as ReturnType<typeof vi.fn>).mock.calls[0][0];
+      expect(items).toHaveLength(3);
+      expect(items[0].sourceId).toBe("bulk-1");
+      expect(items[0].title).toBe("One");
+      expect(items[0].messages[0].embedding).toEqual(fakeVector);
+      expect(items[1].messages[0].embedding).toBeNull();
+      expect(items[2].messages).toBeUndefined();
+    });
+  });
+
   describe("search", () => {
     it("embeds query and uses vector search when embedding succeeds", async () => {
       await service.search("search query", ["tag"], 5);
@@ -232,6 +256,39 @@ describe("ConversationService", () => {
       });
     });
 
+    it("forwards hybrid mode with the query embedding", async () => {
+      await service.search("Acme Corp", undefined, undefined, undefined, undefined, "hybrid");
+
+      expect(repo.search).toHaveBeenCalledWith(
+        expect.objectContaining({ queryEmbedding: fakeVector, mode: "hybrid" }),
+      );
+    });
+
+    it("does not embed the query in text mode", async () => {
+      await service.search("Acme Corp", undefined, undefined, undefined, undefined, "text");
+
+      expect(embedding.embed).not.toHaveBeenCalled();
+      expect(repo.search).toHaveBeenCalledWith(
+        expect.objectContaining({ query: "Acme Corp", mode: "text" }),
+      );
+    });
+
+    it("forwards diversity to the repository", async () => {
+      await service.search("Acme Corp", undefined, 5, undefined, undefined, undefined, 0.5);
+
+      expect(repo.search).toHaveBeenCalledWith(
+        expect.objectContaining({ limit: 5, diversity: 0.5 }),
+      );
+    });
+
+    it("forwards the result view to the repository", async () => {
+      await service.search("Acme Corp", undefined, undefined, undefined, undefined, undefined, undefined, "summary");
+
+      expect(repo.search).toHaveBeenCalledWith(
+        expect.objectContaining({ view: "summary" }),
+      );
+    });
+
     it("forwards include parameter to repository", async () => {
       await service.search("test", undefined, undefined, ["avg_embedding"]);
 
@@ -265,12 +322,64 @@ describe("ConversationService", () => {
     });
   });
 
+  describe("multiSearch", () => {
+    const other: Conversation = { ...mockConversation, id: "conv-2", title: "Other" };
+
+    it("embeds all queries in one batch", async () => {
+      await service.multiSearch(["deploys", "rollbacks"]);
+
+      expect(embedding.embedBatch).toHaveBeenCalledOnce();
+      expect(embedding.embedBatch).toHaveBeenCalledWith(["deploys", "rollbacks"]);
+      expect(embedding.embed).not.toHaveBeenCalled();
+      expect(repo.search).toHaveBeenCalledTimes(2);
+      expect(repo.search).toHaveBeenCalledWith(
+        expect.objectContaining({ query: "rollbacks", queryEmbedding: fakeVector }),
+      );
+    });
+
+    it("fuses rankings and deduplicates conversations", async () => {
+      (repo.search as ReturnType<typeof vi.fn>)
+        .mockResolvedValueOnce([other, mockConversation])
+        .mockResolvedValueOnce([mockConversation]);
+
+      const results = await service.multiSearch(["a", "b"]);
+
+      expect(results.map((c) => c.id)).toEqual(["conv-1", "conv-2"]);
+      expect(results[0].score).toBeCloseTo(1 / 62 + 1 / 61, 10);
+      expect(results[1].score).toBeCloseTo(1 / 61, 10);
+    });
+
+    it("truncates the fused ranking to the limit", async () => {
+      (repo.search as ReturnType<typeof vi.fn>)
+        .mockResolvedValueOnce([other])
+        .mockResolvedValueOnce([mockConversation]);
+
+      const results = await service.multiSearch(["a", "b"], undefined, 1);
+
+      expect(results).toHaveLength(1);
+    });
+
+    it("does not embed queries in text mode", async () => {
+      await service.multiSearch(["a", "b"], undefined, undefined, undefined, undefined, "text");
+
+      expect(embedding.embedBatch).not.toHaveBeenCalled();
+      expect(repo.search).toHaveBeenCalledWith(
+        expect.objectContaining({ query: "a", mode: "text" }),
+      );
+    });
+  });
+
   describe("getById", () => {
     it("delegates to repository", async () => {
       const result = await service.getById("conv-1");
-      expect(repo.getById).toHaveBeenCalledWith("conv-1");
+      expect(repo.getById).toHaveBeenCalledWith("conv-1", undefined);
       expect(result).toEqual(mockConversation);
     });
+
+    it("forwards a message page", async () => {
+      await service.getById("conv-1", { afterPosition: 99, limit: 101 });
+      expect(repo.getById).toHaveBeenCalledWith("conv-1", { afterPosition: 99, limit: 101 });
+    });
   });
 
   describe("lifecycle", () => {
@@ -219,6 +219,133 @@ describe("POST /api/conversations (upsert)", () => {
   });
 });
 
+describe("POST /api/conversations/bulk", () => {
+  function ndjson(items: unknown[]): string {
+    return items.map((i) => JSON.stringify(i)).join("\n") + "\n";
+  }
+
+  it("upserts NDJSON conversations and returns per-item results", async () => {
+    const app = createApp();
+    const res = await app.inject({
+      method: "POST",
+      url: "/api/conversations/bulk",
+      headers: { "content-type": "application/x-ndjson" },
+      payload: ndjson([
+        { sourceId: "bulk-a", title: "A", messages: [{ role: "user", content: "Hello A" }] },
+        { sourceId: "bulk-b", title: "B", tags: ["x"], messages: [{ role: "user", content: "Hello B" }] },
+      ]),
+    });
+    expect(res.statusCode).toBe(200);
+    const body = res.json();
+    expect(body.total).toBe(2);
+    expect(body.succeeded).toBe(2);
+    expect(body.failed).toBe(0);
+    expect(body.results[0].sourceId).toBe("bulk-a");
+    expect(body.results[0].id).toBeDefined();
+
+    const get = await app.inject({
+      method: "GET",
+      url: `/api/conversations/${body.results[1].id}`,
+    });
+    expect(get.json().title).toBe("B");
+    expect(get.json().tags).toEqual(["x"]);
+    expect(get.json().messages).toHaveLength(1);
+  });
+
+  it("accepts a JSON array body", async () => {
+    const app = createApp();
+    const res = await app.inject({
+      method: "POST",
+      url: "/api/conversations/bulk",
+      payload: [{ sourceId: "bulk-json", messages: [{ role: "user", content: "Hi" }] }],
+    });
+    expect(res.statusCode).toBe(200);
+    expect(res.json().succeeded).toBe(1);
+  });
+
+  it("appends to existing conversations and merges repeated sourceIds in order", async () => {
+    const app = createApp();
+    await app.inject({
+      method: "POST",
+      url: "/api/conversations",
+      payload: { sourceId: "bulk-append", messages: [{ role: "user", content: "First" }] },
+    });
+
+    const res = await app.inject({
+      method: "POST",
+      url: "/api/conversations/bulk",
+      headers: { "content-type": "application/x-ndjson" },
+      payload: ndjson([
+        { sourceId: "bulk-append", messages: [{ role: "user", content: "Second" }] },
+        { sourceId: "bulk-append", messages: [{ role: "assistant", content: "Third" }] },
+      ]),
+    });
+    const body = res.json();
+    expect(body.results[0].id).toBe(body.results[1].id);
+
+    const get = await app.inject({
+      method: "GET",
+      url: `/api/conversations/${body.results[0].id}`,
+    });
+    const messages = get.json().messages;
+    expect(messages.map((m: { content: string }) => m.content)).toEqual([
+      "First",
+      "Second",
+      "Third",
+    ]);
+    expect(messages[2].position).toBe(2);
+  });
+
+  it("reports invalid items without rejecting the batch", async () => {
+    const app = createApp();
+    const res = await app.inject({
+      method: "POST",
+      url: "/api/conversations/bulk",
+      headers: { "content-type": "application/x-ndjson" },
+      payload: ndjson([
+        { sourceId: "bulk-ok", messages: [{ role: "user", content: "Fine" }] },
+        { title: "No source id" },
+        { sourceId: "bulk-bad", messages: [] },
+      ]),
+    });
+    expect(res.statusCode).toBe(200);
+    const body = res.json();
+    expect(body.succeeded).toBe(1);
+    expect(body.failed).toBe(2);
+    expect(body.results[0].id).toBeDefined();
+    expect(body.results[1].error).toBe(
+      "sourceId is required and must be a non-empty string",
+    );
+    expect(body.results[2].sourceId).toBe("bulk-bad");
+    expect(body.results[2].error).toBe(
+      "messages must be a non-empty array when provided",
+    );
+  });
+
+  it("returns 400 for malformed NDJSON", async () => {
+    const app = createApp();
+    const res = await app.inject({
+      method: "POST",
+      url: "/api/conversations/bulk",
+      headers: { "content-type": "application/x-ndjson" },
+      payload: '{"sourceId": "ok"}\n{not json}\n',
+    });
+    expect(res.statusCode).toBe(400);
+    expect(res.json().error).toBe("invalid JSON on line 2");
+  });
+
+  it("returns 400 for an empty batch", async () => {
+    const app = createApp();
+    const res = await app.inject({
+      method: "POST",
+      url: "/api/conversations/bulk",
+      headers: { "content-type": "application/x-ndjson" },
+      payload: "\n",
+    });
+    expect(res.statusCode).toBe(400);
+  });
+});
+
 describe("GET /api/conversations", () => {
   it("returns empty list initially", async () => {
     const app = createApp();
@@ -227,7 +354,7 @@ describe("GET /api/conversations", () => {
       url: "/api/conversations",
     });
     expect(res.statusCode).toBe(200);
-    expect(res.json()).toEqual({ conversations: [], total: 0 });
+    expect(res.json()).toEqual({ conversations: [], total: 0, nextCursor: null });
   });
 
   it("returns stored conversations via text search", async () => {
@@ -255,6 +382,26 @@ describe("GET /api/conversations", () => {
     expect(body.conversations[0].messages).toBeDefined();
   });
 
+  it("matches partial words in text mode", async () => {
+    const app = createApp();
+    await app.inject({
+      method: "POST",
+      url: "/api/conversations",
+      payload: {
+        sourceId: "src-partial",
+        title: "Backups",
+        messages: [{ role: "user", content: "Where does Mnemosyne keep its snapshots?" }],
+      },
+    });
+
+    const res = await app.inject({
+      method: "GET",
+      url: "/api/conversations?query=mnemo&mode=text",
+    });
+    expect(res.statusCode).toBe(200);
+    expect(res.json().total).toBe(1);
+  });
+
   it("filters by tags", async () => {
     const app = createApp();
     await app.inject({
@@ -397,6 +544,110 @@ describe("GET /api/conversations", () => {
     expect(body.total).toBe(2);
     expect(body.conversations).toHaveLength(2);
   });
+
+  it("pages through a listing by cursor", async () => {
+    const app = createApp();
+    for (let i = 0; i < 3; i++) {
+      await app.inject({
+        method: "POST",
+        url: "/api/conversations",
+        payload: {
+          sourceId: `src-page-${i}`,
+          title: `Conv ${i}`,
+          messages: [{ role: "user", content: `Message ${i}` }],
+        },
+      });
+    }
+
+    const first = (await app.inject({ method: "GET", url: "/api/conversations?limit=2" })).json();
+    expect(first.conversations).toHaveLength(2);
+    expect(first.nextCursor).toBeTruthy();
+
+    const second = (
+      await app.inject({
+        method: "GET",
+        url: `/api/conversations?limit=2&cursor=${first.nextCursor}`,
+      })
+    ).json();
+    expect(second.conversations).toHaveLength(1);
+    expect(second.nextCursor).toBeNull();
+
+    const titles = [...first.conversations, ...second.conversations].map(
+      (c: { title: string }) => c.title,
+    );
+    expect(titles.sort()).toEqual(["Conv 0", "Conv 1", "Conv 2"]);
+  });
+
+  it("returns 400 for an unknown search mode", async () => {
+    const app = createApp();
+    const res = await app.inject({
+      method: "GET",
+      url: "/api/conversations?query=x&mode=fuzzy",
+    });
+    expect(res.statusCode).toBe(400);
+    expect(res.json().error).toBe("mode must be one of: vector, text, hybrid");
+  });
+
+  it("returns summaries without messages for view=summary", async () => {
+    const app = createApp();
+    await app.inject({
+      method: "POST",
+      url: "/api/conversations",
+      payload: {
+        sourceId: "src-summary",
+        title: "Summary test",
+        messages: [
+          { role: "user", content: "How do I rotate the signing keys?" },
+          { role: "assistant", content: "Run the key rotation script." },
+        ],
+      },
+    });
+
+    const res = await app.inject({
+      method: "GET",
+      url: "/api/conversations?query=rotation&view=summary",
+    });
+    expect(res.statusCode).toBe(200);
+    const [conv] = res.json().conversations;
+    expect(conv.messages).toBeUndefined();
+    expect(conv.messageCount).toBe(2);
+    expect(conv.bestMatch).toEqual({
+      position: 1,
+      role: "assistant",
+      snippet: "Run the key rotation script.",
+    });
+  });
+
+  it("returns 400 for an unknown view", async () => {
+    const app = createApp();
+    const res = await app.inject({
+      method: "GET",
+      url: "/api/conversations?view=compact",
+    });
+    expect(res.statusCode).toBe(400);
+    expect(res.json().error).toBe("view must be one of: full, summary");
+  });
+
+  it("returns 400 for a diversity outside 0-1", async () => {
+    const app = createApp();
+    for (const diversity of ["1.5", "-0.1", "lots", ""]) {
+      const res = await app.inject({
+        method: "GET",
+        url: `/api/conversations?query=x&diversity=${diversity}`,
+      });
+      expect(res.statusCode).toBe(400);
+      expect(res.json().error).toBe("diversity must be a number between 0 and 1");
+    }
+  });
+
+  it("accepts a diversity between 0 and 1", async () => {
+    const app = createApp();
+    const res = await app.inject({
+      method: "GET",
+      url: "/api/conversations?query=x&diversity=0.5",
+    });
+    expect(res.statusCode).toBe(200);
+  });
 });
 
 describe("User scoping", () => {
@@ -528,6 +779,135 @@ describe("User scoping", () => {
   });
 });
 
+describe("POST /api/conversations/search", () => {
+  it("returns a fused, deduplicated ranking", async () => {
+    const app = createApp();
+    for (const [sourceId, title] of [["ms-1", "Deploy notes"], ["ms-2", "Rollback plan"]]) {
+      await app.inject({
+        method: "POST",
+        url: "/api/conversations",
+        payload: { sourceId, title, messages: [{ role: "user", content: title }] },
+      });
+    }
+
+    const res = await app.inject({
+      method: "POST",
+      url: "/api/conversations/search",
+      payload: { queries: ["deploy", "rollback", "plan"] },
+    });
+    expect(res.statusCode).toBe(200);
+    const body = res.json();
+    expect(body.total).toBe(2);
+    expect(body.conversations[0].title).toBe("Rollback plan");
+  });
+
+  it("returns 400 without queries", async () => {
+    const app = createApp();
+    for (const payload of [{}, { queries: [] }, { queries: ["ok", " "] }]) {
+      const res = await app.inject({
+        method: "POST",
+        url: "/api/conversations/search",
+        payload,
+      });
+      expect(res.statusCode).toBe(400);
+      expect(res.json().error).toBe("queries must be a non-empty array of non-empty strings");
+    }
+  });
+
+  it("returns 400 for too many queries", async () => {
+    const app = createApp();
+    const res = await app.inject({
+      method: "POST",
+      url: "/api/conversations/search",
+      payload: { queries: Array.from({ length: 11 }, (_, i) => `q${i}`) },
+    });
+    expect(res.statusCode).toBe(400);
+    expect(res.json().error).toBe("at most 10 queries per search");
+  });
+});
+
+describe("POST /api/conversations/by-ids", () => {
+  it("returns one result per id in request order", async () => {
+    const app = createApp();
+    const ids: string[] = [];
+    for (const sourceId of ["src-a", "src-b"]) {
+      const res = await app.inject({
+        method: "POST",
+        url: "/api/conversations",
+        payload: {
+          sourceId,
+          title: sourceId,
+          messages: [
+            { role: "user", content: "Question" },
+            { role: "assistant", content: "Answer" },
+          ],
+        },
+      });
+      ids.push(res.json().id);
+    }
+    const missing = "00000000-0000-0000-0000-000000000000";
+
+    const res = await app.inject({
+      method: "POST",
+      url: "/api/conversations/by-ids",
+      payload: { ids: [ids[1], missing, ids[0], "not-a-uuid"], limit: 1 },
+    });
+    expect(res.statusCode).toBe(200);
+    const body = res.json();
+    expect(body.succeeded).toBe(2);
+    expect(body.failed).toBe(2);
+    expect(body.results.map((r: { id: string }) => r.id)).toEqual([
+      ids[1],
+      missing,
+      ids[0],
+      "not-a-uuid",
+    ]);
+    expect(body.results[0].conversation.title).toBe("src-b");
+    expect(body.results[0].conversation.messages).toHaveLength(1);
+    expect(body.results[0].nextCursor).toBeTruthy();
+    expect(body.results[1].error).toBe("conversation not found");
+    expect(body.results[3].error).toBe("conversation not found");
+  });
+
+  it("returns every message without a limit", async () => {
+    const app = createApp();
+    const { id } = (
+      await app.inject({
+        method: "POST",
+        url: "/api/conversations",
+        payload: {
+          sourceId: "src-all",
+          messages: [
+            { role: "user", content: "Question" },
+            { role: "assistant", content: "Answer" },
+          ],
+        },
+      })
+    ).json();
+
+    const body = (
+      await app.inject({
+        method: "POST",
+        url: "/api/conversations/by-ids",
+        payload: { ids: [id] },
+      })
+    ).json();
+    expect(body.results[0].conversation.messages).toHaveLength(2);
+    expect(body.results[0].nextCursor).toBeUndefined();
+  });
+
+  it("returns 400 when ids is empty", async () => {
+    const app = createApp();
+    const res = await app.inject({
+      method: "POST",
+      url: "/api/conversations/by-ids",
+      payload: { ids: [] },
+    });
+    expect(res.statusCode).toBe(400);
+    expect(res.json().error).toBe("ids must be a non-empty array of strings");
+  });
+});
+
 describe("GET /api/conversations/:id", () => {
   it("returns a conversation by ID with messages", async () => {
     const app = createApp();
@@ -567,4 +947,46 @@ describe("GET /api/conversations/:id", () => {
     expect(res.statusCode).toBe(404);
     expect(res.json().error).toBe("conversation not found");
   });
+
+  it("pages through messages by position", async () => {
+    const app = createApp();
+    const storeRes = await app.inject({
+      method: "POST",
+      url: "/api/conversations",
+      payload: {
+        sourceId: "src-long",
+        title: "Long",
+        messages: Array.from({ length: 5 }, (_, i) => ({
+          role: i % 2 === 0 ? "user" : "assistant",
+          content: `Message ${i}`,
+        })),
+      },
+    });
+    const { id } = storeRes.json();
+
+    const first = (
+      await app.inject({ method: "GET", url: `/api/conversations/${id}?limit=3` })
+    ).json();
+    expect(first.messages.map((m: { position: number }) => m.position)).toEqual([0, 1, 2]);
+    expect(first.nextCursor).toBeTruthy();
+
+    const second = (
+      await app.inject({
+        method: "GET",
+        url: `/api/conversations/${id}?limit=3&cursor=${first.nextCursor}`,
+      })
+    ).json();
+    expect(second.messages.map((m: { position: number }) => m.position)).toEqual([3, 4]);
+    expect(second.nextCursor).toBeNull();
+  });
+
+  it("returns 400 for a malformed message cursor", async () => {
+    const app = createApp();
+    const res = await app.inject({
+      method: "GET",
+      url: "/api/conversations/00000000-0000-0000-0000-000000000000?cursor=abc",
+    });
+    expect(res.statusCode).toBe(400);
+    expect(res.json().error).toBe("invalid cursor");
+  });
 });
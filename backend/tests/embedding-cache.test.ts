@@ -0,0 +1,161 @@
+import { describe, it, expect, vi, beforeEach, afterEach } from "vitest";
+import { CachedEmbeddingService } from "../src/embedding/cached.js";
+import type { EmbeddingService } from "../src/embedding/types.js";
+import type { EmbeddingCacheStore } from "../src/repository/embedding-cache-types.js";
+import { buildApp } from "../src/app.js";
+import { InMemoryRepository } from "../src/repository/index.js";
+import { MemoryService } from "../src/services/memory-service.js";
+
+function createMockEmbedding(): EmbeddingService {
+  return {
+    embed: vi.fn(),
+    embedBatch: vi.fn().mockImplementation(async (texts: string[]) =>
+      texts.map((t) => (t === "fail" ? null : [t.length, 0.5])),
+    ),
+    healthCheck: vi.fn().mockResolvedValue(true),
+  };
+}
+
+function createMockStore(initial: Record<string, number[]> = {}): EmbeddingCacheStore {
+  const rows = new Map(Object.entries(initial));
+  return {
+    initialize: vi.fn(),
+    getMany: vi.fn().mockImplementation(async (_model: string, hashes: string[]) => {
+      const found = new Map<string, number[]>();
+      for (const h of hashes) {
+        const v = rows.get(h);
+        if (v) found.set(h, v);
+      }
+      return found;
+    }),
+    putMany: vi.fn().mockImplementation(async (_model: string, entries: { hash: string; embedding: number[] }[]) => {
+      for (const e of entries) rows.set(e.hash, e.embedding);
+    }),
+    close: vi.fn(),
+  };
+}
+
+// sha256("hello")
+const HELLO_HASH = "2cf24dba5fb0a30e26e83b2ac5b9e29e1b161e5c1fa7425e73043362938b9824";
+
+describe("CachedEmbeddingService", () => {
+  let inner: EmbeddingService;
+
+  beforeEach(() => {
+    inner = createMockEmbedding();
+  });
+
+  afterEach(() => {
+    vi.restoreAllMocks();
+  });
+
+  it("serves repeated texts from the in-process tier", async () => {
+    const cache = new CachedEmbeddingService(inner, "model");
+
+    expect(await cache.embed("hello")).toEqual([5, 0.5]);
+    expect(await cache.embed("hello")).toEqual([5, 0.5]);
+
+    expect(inner.embedBatch).toHaveBeenCalledTimes(1);
+    expect(cache.stats()).toMatchObject({ hits: 1, misses: 1, size: 1 });
+  });
+
+  it("embeds each distinct text in a batch once", async () => {
+    const cache = new CachedEmbeddingService(inner, "model");
+    await cache.embed("aa");
+
+    const vectors = await cache.embedBatch(["aa", "bbb", "bbb", "cccc"]);
+
+    expect(vectors).toEqual([[2, 0.5], [3, 0.5], [3, 0.5], [4, 0.5]]);
+    expect((inner.embedBatch as ReturnType<typeof vi.fn>).mock.calls[1][0]).toEqual(["bbb", "cccc"]);
+  });
+
+  it("does not cache failed embeddings", async () => {
+    const cache = new CachedEmbeddingService(inner, "model");
+
+    expect(await cache.embed("fail")).toBeNull();
+    expect(await cache.embed("fail")).toBeNull();
+
+    expect(inner.embedBatch).toHaveBeenCalledTimes(2);
+    expect(cache.stats().size).toBe(0);
+  });
+
+  it("evicts the least recently used entry when full", async () => {
+    const cache = new CachedEmbeddingService(inner, "model", { maxEntries: 2 });
+    await cache.embedBatch(["a", "bb"]);
+    await cache.embed("a");
+    await cache.embed("ccc");
+
+    expect(cache.stats()).toMatchObject({ evictions: 1, size: 2 });
+
+    await cache.embed("a");
+    await cache.embed("bb");
+    expect(inner.embedBatch).toHaveBeenCalledTimes(3);
+  });
+
+  it("expires entries after the TTL", async () => {
+    const now = vi.spyOn(Date, "now").mockReturnValue(1_000);
+    const cache = new CachedEmbeddingService(inner, "model", { ttlMs: 100 });
+    await cache.embed("hello");
+
+    now.mockReturnValue(1_200);
+    await cache.embed("hello");
+
+    expect(inner.embedBatch).toHaveBeenCalledTimes(2);
+    expect(cache.stats()).toMatchObject({ hits: 0, misses: 2, expirations: 1 });
+  });
+
+  it("uses the persistent tier before calling the embedding service", async () => {
+    const store = createMockStore({ [HELLO_HASH]: [9, 9] });
+    const cache = new CachedEmbeddingService(inner, "model", { store });
+
+    expect(await cache.embedBatch(["hello", "world!"])).toEqual([[9, 9], [6, 0.5]]);
+
+    expect(store.getMany).toHaveBeenCalledWith("model", [HELLO_HASH, expect.any(String)]);
+    expect(inner.embedBatch).toHaveBeenCalledWith(["world!"]);
+    expect(store.putMany).toHaveBeenCalledWith("model", [
+      { hash: expect.any(String), embedding: [6, 0.5] },
+    ]);
+    expect(cache.stats()).toMatchObject({ hits: 0, persistentHits: 1, misses: 1 });
+  });
+
+  it("falls through to the embedding service when the store fails", async () => {
+    vi.spyOn(console, "warn").mockImplementation(() => {});
+    const store = createMockStore();
+    (store.getMany as ReturnType<typeof vi.fn>).mockRejectedValue(new Error("db down"));
+    (store.putMany as ReturnType<typeof vi.fn>).mockRejectedValue(new Error("db down"));
+    const cache = new CachedEmbeddingService(inner, "model", { store });
+
+    expect(await cache.embed("hello")).toEqual([5, 0.5]);
+  });
+});
+
+describe("GET /api/embedding-cache/stats", () => {
+  it("returns cache counters", async () => {
+    const cache = new CachedEmbeddingService(createMockEmbedding(), "model", { maxEntries: 10 });
+    await cache.embed("hello");
+    await cache.embed("hello");
+
+    const service = new MemoryService(new InMemoryRepository(), cache);
+    const app = buildApp({ service, embeddingCache: cache });
+    const res = await app.inject({ method: "GET", url: "/api/embedding-cache/stats" });
+
+    expect(res.statusCode).toBe(200);
+    expect(res.json()).toEqual({
+      hits: 1,
+      persistentHits: 0,
+      misses: 1,
+      evictions: 0,
+      expirations: 0,
+      size: 1,
+      maxEntries: 10,
+    });
+  });
+
+  it("is not registered without a cache", async () => {
+    const service = new MemoryService(new InMemoryRepository(), createMockEmbedding());
+    const app = buildApp({ service });
+    const res = await app.inject({ method: "GET", url: "/api/embedding-cache/stats" });
+
+    expect(res.statusCode).toBe(404);
+  });
+});
@@ -0,0 +1,151 @@
+import { describe, it, expect, beforeEach, vi } from "vitest";
+import { buildApp } from "../src/app.js";
+import { InMemoryRepository, InMemoryConversationRepository } from "../src/repository/index.js";
+import type { EmbeddingService } from "../src/embedding/types.js";
+import { MemoryService } from "../src/services/memory-service.js";
+import { ConversationService } from "../src/services/conversation-service.js";
+import { decodeVectorBase64 } from "../src/utils/vector-codec.js";
+
+const LONG_MESSAGE = "This user message is comfortably long enough to be embedded by the service";
+
+function createEmbedding(): EmbeddingService {
+  const vector = Array.from({ length: 4096 }, (_, i) => (i % 7) / 8);
+  return {
+    embed: vi.fn().mockResolvedValue(vector),
+    embedBatch: vi.fn().mockImplementation(async (texts: string[]) => texts.map(() => vector)),
+    healthCheck: vi.fn().mockResolvedValue(true),
+  };
+}
+
+function createApp(embedding: EmbeddingService) {
+  return buildApp({
+    service: new MemoryService(new InMemoryRepository(), embedding),
+    conversationService: new ConversationService(new InMemoryConversationRepository(), embedding),
+  });
+}
+
+function parseLines(payload: string) {
+  return payload.trim().split("\n").map((line) => JSON.parse(line));
+}
+
+describe("GET /api/export", () => {
+  let embedding: EmbeddingService;
+
+  beforeEach(() => {
+    embedding = createEmbedding();
+  });
+
+  async function seed(app: ReturnType<typeof createApp>) {
+    await app.inject({
+      method: "POST",
+      url: "/api/conversations",
+      payload: {
+        sourceId: "export-1",
+        title: "Exported",
+        tags: ["backup"],
+        messages: [
+          { role: "user", content: LONG_MESSAGE },
+          { role: "assistant", content: "Short reply" },
+        ],
+      },
+    });
+    await app.inject({
+      method: "POST",
+      url: "/api/memories",
+      payload: { content: "Remember the export", tags: ["backup"] },
+    });
+  }
+
+  it("streams conversations, their messages and memories as NDJSON", async () => {
+    const app = createApp(embedding);
+    await seed(app);
+
+    const res = await app.inject({ method: "GET", url: "/api/export" });
+    expect(res.statusCode).toBe(200);
+    expect(res.headers["content-type"]).toMatch("application/x-ndjson");
+
+    const records = parseLines(res.payload);
+    expect(records.map((r) => r.type)).toEqual(["conversation", "message", "message", "memory"]);
+    expect(records[0]).toMatchObject({ sourceId: "export-1", title: "Exported", tags: ["backup"] });
+    expect(records[0].avgEmbedding).toBeUndefined();
+    expect(records[2]).toMatchObject({ role: "assistant", position: 1 });
+    expect(records[1].embedding).toBeUndefined();
+    expect(records[3]).toMatchObject({ content: "Remember the export" });
+  });
+
+  it("includes base64 embeddings when asked", async () => {
+    const app = createApp(embedding);
+    await seed(app);
+
+    const res = await app.inject({ method: "GET", url: "/api/export?embeddings=true" });
+    const [, user, assistant] = parseLines(res.payload);
+
+    expect(decodeVectorBase64(user.embedding)).toHaveLength(4096);
+    expect(assistant.embedding).toBeNull();
+  });
+
+  it("re-imports through the bulk endpoint without re-embedding", async () => {
+    const source = createApp(embedding);
+    await seed(source);
+    const exported = parseLines(
+      (await source.inject({ method: "GET", url: "/api/export?embeddings=true" })).payload,
+    );
+
+    const target = createEmbedding();
+    const app = createApp(target);
+    const [conversation, ...messages] = exported.filter((r) => r.type !== "memory");
+    const res = await app.inject({
+      method: "POST",
+      url: "/api/conversations/bulk",
+      payload: [
+        {
+          sourceId: conversation.sourceId,
+          title: conversation.title,
+          tags: conversation.tags,
+          messages: messages.map((m) => ({ role: m.role, content: m.content, embedding: m.embedding })),
+        },
+      ],
+    });
+
+    expect(res.json().succeeded).toBe(1);
+    expect(target.embedBatch).not.toHaveBeenCalled();
+  });
+
+  it("returns 400 for an invalid embeddings flag", async () => {
+    const app = createApp(embedding);
+    const res = await app.inject({ method: "GET", url: "/api/export?embeddings=yes" });
+    expect(res.statusCode).toBe(400);
+    expect(res.json().error).toBe("embeddings must be true or false");
+  });
+});
+
+describe("imported embeddings", () => {
+  it("stores a memory with a given embedding without embedding it", async () => {
+    const embedding = createEmbedding();
+    const app = createApp(embedding);
+    const vector = Buffer.alloc(4 + 4096 * 4);
+    vector.writeInt16BE(4096, 0);
+
+    const res = await app.inject({
+      method: "POST",
+      url: "/api/memories",
+      payload: { content: "Imported", embedding: vector.toString("base64") },
+    });
+
+    expect(res.statusCode).toBe(201);
+    expect(embedding.embed).not.toHaveBeenCalled();
+  });
+
+  it("returns 400 for a malformed embedding", async () => {
+    const app = createApp(createEmbedding());
+    const res = await app.inject({
+      method: "POST",
+      url: "/api/memories",
+      payload: { content: "Imported", embedding: "bm90IGEgdmVjdG9y" },
+    });
+    expect(res.statusCode).toBe(400);
+    expect(res.json().error).toBe(
+      "embedding must be null or a base64-encoded vector of 4096 dimensions",
+    );
+  });
+});
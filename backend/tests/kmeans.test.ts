@@ -1,5 +1,11 @@
 import { describe, it, expect } from "vitest";
-import { kMeans, cosineSimilarity } from "../src/utils/kmeans.js";
+import {
+  kMeans,
+  kMeansAsync,
+  cosineSimilarity,
+  nearestCentroid,
+  onlineKMeansUpdate,
+} from "../src/utils/kmeans.js";
 
 describe("cosineSimilarity", () => {
   it("returns 1 for identical vectors", () => {
@@ -101,3 +107,174 @@ describe("kMeans", () => {
     expect(result).toHaveLength(2);
   });
 });
+
+describe("kMeans options", () => {
+  it("stops after one update when the tolerance is never beaten", () => {
+    const vectors = [[0, 0], [1, 0], [10, 0], [11, 0], [4, 0]];
+    // Max-min init picks [0,0] and [11,0]; [4,0] joins the first cluster.
+    const result = kMeans(vectors, 2, { tolerance: Infinity });
+    expect(result[0][0]).toBeCloseTo(5 / 3);
+    expect(result[1][0]).toBeCloseTo(10.5);
+  });
+
+  it("honours maxIterations", () => {
+    const vectors = [[0], [1], [2], [3], [4], [5], [6], [7]];
+    expect(kMeans(vectors, 2, { maxIterations: 1 })).toEqual([[1.5], [5.5]]);
+  });
+
+  it("accepts Float32Array input", () => {
+    const vectors = [[0, 0], [1, 1], [10, 10], [11, 11]].map((v) => Float32Array.from(v));
+    const result = kMeans(vectors, 2);
+    result.sort((a, b) => a[0] - b[0]);
+    expect(result).toEqual([[0.5, 0.5], [10.5, 10.5]]);
+  });
+});
+
+describe("kMeansAsync", () => {
+  it("returns the same centroids as kMeans when offloaded", async () => {
+    const vectors = randomClusters(60, 16, 3, 7);
+    const result = await kMeansAsync(vectors, 3, { workerThreshold: 0 });
+    expect(result).toEqual(kMeans(vectors, 3));
+  });
+
+  it("returns copies when n <= k", async () => {
+    expect(await kMeansAsync([[1, 2]], 3, { workerThreshold: 0 })).toEqual([[1, 2]]);
+  });
+});
+
+/** Deterministic PRNG (mulberry32) so benchmark inputs are reproducible. */
+function seededRandom(seed: number): () => number {
+  let a = seed;
+  return () => {
+    a = (a + 0x6d2b79f5) | 0;
+    let t = Math.imul(a ^ (a >>> 15), 1 | a);
+    t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+function randomClusters(n: number, dim: number, clusters: number, seed: number): Float32Array[] {
+  const random = seededRandom(seed);
+  const centers = Array.from({ length: clusters }, () =>
+    Array.from({ length: dim }, () => random() * 2 - 1),
+  );
+  return Array.from({ length: n }, (_, i) => {
+    const center = centers[i % clusters];
+    return Float32Array.from(center, (x) => x + (random() - 0.5) * 0.8);
+  });
+}
+
+/** Straightforward Lloyd's algorithm with the same initialization, as a reference. */
+function naiveKMeans(vectors: ArrayLike<number>[], k: number, maxIterations = 50): number[][] {
+  const dist = (a: ArrayLike<number>, b: ArrayLike<number>) => {
+    let sum = 0;
+    for (let d = 0; d < a.length; d++) sum += (a[d] - b[d]) ** 2;
+    return sum;
+  };
+  const centroids = [Array.from(vectors[0])];
+  const minDist = vectors.map(() => Infinity);
+  for (let c = 1; c < k; c++) {
+    let farthest = 0;
+    vectors.forEach((v, i) => {
+      minDist[i] = Math.min(minDist[i], dist(v, centroids[c - 1]));
+      if (minDist[i] > minDist[farthest]) farthest = i;
+    });
+    centroids.push(Array.from(vectors[farthest]));
+  }
+
+  const assignments = vectors.map(() => -1);
+  for (let iter = 0; iter < maxIterations; iter++) {
+    let changed = false;
+    vectors.forEach((v, i) => {
+      let best = 0;
+      for (let c = 1; c < k; c++) {
+        if (dist(v, centroids[c]) < dist(v, centroids[best])) best = c;
+      }
+      if (best !== assignments[i]) changed = true;
+      assignments[i] = best;
+    });
+    if (!changed) break;
+    for (let c = 0; c < k; c++) {
+      const members = vectors.filter((_, i) => assignments[i] === c);
+      if (members.length === 0) continue;
+      centroids[c] = centroids[c].map(
+        (_, d) => members.reduce((sum, m) => sum + m[d], 0) / members.length,
+      );
+    }
+  }
+  return centroids;
+}
+
+function timeMs(fn: () => void): number {
+  const start = performance.now();
+  fn();
+  return performance.now() - start;
+}
+
+describe("kMeans benchmark", () => {
+  // Roughly one long conversation: a few hundred 4096-dim message embeddings.
+  const vectors = randomClusters(300, 4096, 3, 42);
+
+  it("matches naive Lloyd's algorithm", () => {
+    const expected = naiveKMeans(vectors, 3);
+    const result = kMeans(vectors, 3);
+    expect(result).toHaveLength(3);
+    for (let c = 0; c < 3; c++) {
+      for (let d = 0; d < 4096; d += 256) {
+        expect(result[c][d]).toBeCloseTo(expected[c][d], 5);
+      }
+    }
+  });
+
+  // Wall-clock budgets flake on slow machines; run with BENCH=1.
+  it.skipIf(!process.env.BENCH)("clusters 300×4096 vectors within budget", () => {
+    kMeans(vectors, 3); // warm up
+    expect(timeMs(() => kMeans(vectors, 3))).toBeLessThan(500);
+  });
+});
+
+describe("nearestCentroid", () => {
+  it("returns the index of the closest centroid", () => {
+    expect(nearestCentroid([0.9, 1], [[0, 0], [1, 1], [5, 5]])).toBe(1);
+  });
+});
+
+describe("onlineKMeansUpdate", () => {
+  it("adds new vectors as centroids until k is reached", () => {
+    const result = onlineKMeansUpdate([{ vector: [0, 0], weight: 1 }], [[1, 1], [2, 2]], 2);
+    expect(result).toEqual([
+      { vector: [0, 0], weight: 1 },
+      { vector: [1.5, 1.5], weight: 2 },
+    ]);
+  });
+
+  it("moves the nearest centroid towards the running mean", () => {
+    const result = onlineKMeansUpdate(
+      [
+        { vector: [0, 0], weight: 1 },
+        { vector: [10, 10], weight: 3 },
+      ],
+      [[12, 10]],
+      2,
+    );
+    expect(result[0]).toEqual({ vector: [0, 0], weight: 1 });
+    expect(result[1]).toEqual({ vector: [10.5, 10], weight: 4 });
+  });
+
+  it("matches the cluster mean when folding points one at a time", () => {
+    const points = [[1, 0], [3, 0], [2, 3]];
+    let centroids = onlineKMeansUpdate([], points.slice(0, 1), 1);
+    for (const p of points.slice(1)) {
+      centroids = onlineKMeansUpdate(centroids, [p], 1);
+    }
+    expect(centroids[0].weight).toBe(3);
+    expect(centroids[0].vector[0]).toBeCloseTo(2);
+    expect(centroids[0].vector[1]).toBeCloseTo(1);
+  });
+
+  it("does not modify its input", () => {
+    const input = [{ vector: [0, 0], weight: 1 }];
+    onlineKMeansUpdate(input, [[2, 2]], 1);
+    expect(input).toEqual([{ vector: [0, 0], weight: 1 }]);
+  });
+});
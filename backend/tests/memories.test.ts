@@ -91,12 +91,89 @@ describe("POST /api/memories", () => {
   });
 });
 
+describe("POST /api/memories/batch", () => {
+  it("stores valid items and reports invalid ones per item", async () => {
+    const app = createApp();
+    const res = await app.inject({
+      method: "POST",
+      url: "/api/memories/batch",
+      payload: {
+        memories: [
+          { content: "First", tags: ["a"] },
+          { content: "  " },
+          { content: "Second" },
+        ],
+      },
+    });
+    expect(res.statusCode).toBe(200);
+    const body = res.json();
+    expect(body.total).toBe(3);
+    expect(body.succeeded).toBe(2);
+    expect(body.failed).toBe(1);
+    expect(body.results[0].id).toBeDefined();
+    expect(body.results[1].error).toBe("content is required and must be a non-empty string");
+    expect(body.results[2].id).toBeDefined();
+
+    const list = (await app.inject({ method: "GET", url: "/api/memories" })).json();
+    expect(list.memories.map((m: { content: string }) => m.content).sort()).toEqual([
+      "First",
+      "Second",
+    ]);
+  });
+
+  it("embeds the batch in one call", async () => {
+    const embedding = new NoopEmbeddingService();
+    const embedBatch = vi.spyOn(embedding, "embedBatch");
+    const app = createApp(new MemoryService(new InMemoryRepository(), embedding));
+    await app.inject({
+      method: "POST",
+      url: "/api/memories/batch",
+      payload: { memories: [{ content: "One" }, { content: "Two" }] },
+    });
+    expect(embedBatch).toHaveBeenCalledTimes(1);
+    expect(embedBatch).toHaveBeenCalledWith(["One", "Two"]);
+  });
+
+  it("restores ids and timestamps and skips ids already stored", async () => {
+    const app = createApp();
+    const item = {
+      id: "0b0b0b0b-0000-4000-8000-000000000001",
+      content: "Restored",
+      createdAt: "2025-01-02T03:04:05.000Z",
+    };
+
+    for (let run = 0; run < 2; run++) {
+      const res = await app.inject({
+        method: "POST",
+        url: "/api/memories/batch",
+        payload: { memories: [item, { ...item, id: "not-a-uuid" }] },
+      });
+      expect(res.json().results).toEqual([{ id: item.id }, { error: "id must be a UUID" }]);
+    }
+
+    const list = (await app.inject({ method: "GET", url: "/api/memories" })).json();
+    expect(list.total).toBe(1);
+    expect(list.memories[0]).toMatchObject({ id: item.id, createdAt: item.createdAt });
+  });
+
+  it("returns 400 for an empty batch", async () => {
+    const app = createApp();
+    const res = await app.inject({
+      method: "POST",
+      url: "/api/memories/batch",
+      payload: { memories: [] },
+    });
+    expect(res.statusCode).toBe(400);
+    expect(res.json().error).toBe("memories must be a non-empty array");
+  });
+});
+
 describe("GET /api/memories", () => {
   it("returns empty list initially", async () => {
     const app = createApp();
     const res = await app.inject({ method: "GET", url: "/api/memories" });
     expect(res.statusCode).toBe(200);
-    expect(res.json()).toEqual({ memories: [], total: 0 });
+    expect(res.json()).toEqual({ memories: [], total: 0, nextCursor: null });
   });
 
   it("returns stored memories", async () => {
@@ -188,4 +265,84 @@ describe("GET /api/memories", () => {
     expect(body.total).toBe(1);
     expect(body.memories[0].content).toBe("Work meeting notes");
   });
+
+  it("accepts a search mode", async () => {
+    const app = createApp();
+    await app.inject({
+      method: "POST",
+      url: "/api/memories",
+      payload: { content: "Acme Corp renewal is due in March" },
+    });
+
+    const res = await app.inject({ method: "GET", url: "/api/memories?query=Acme&mode=hybrid" });
+    expect(res.statusCode).toBe(200);
+    expect(res.json().total).toBe(1);
+  });
+
+  it("matches partial words and identifiers in text mode", async () => {
+    const app = createApp();
+    for (const content of ["Mnemosyne backup schedule", "Rename foo_bar to baz"]) {
+      await app.inject({ method: "POST", url: "/api/memories", payload: { content } });
+    }
+
+    for (const query of ["mnemo", "foo_bar"]) {
+      const res = await app.inject({ method: "GET", url: `/api/memories?query=${query}&mode=text` });
+      expect(res.statusCode).toBe(200);
+      expect(res.json().total).toBe(1);
+    }
+  });
+
+  it("returns 400 for an unknown search mode", async () => {
+    const app = createApp();
+    const res = await app.inject({ method: "GET", url: "/api/memories?query=x&mode=fuzzy" });
+    expect(res.statusCode).toBe(400);
+    expect(res.json().error).toBe("mode must be one of: vector, text, hybrid");
+  });
+
+  it("pages through a listing by cursor", async () => {
+    const app = createApp();
+    for (let i = 0; i < 5; i++) {
+      await app.inject({
+        method: "POST",
+        url: "/api/memories",
+        payload: { content: `Memory ${i}` },
+      });
+    }
+
+    const seen: string[] = [];
+    let cursor: string | null = null;
+    let pages = 0;
+    do {
+      const url: string = cursor
+        ? `/api/memories?limit=2&cursor=${cursor}`
+        : "/api/memories?limit=2";
+      const res = await app.inject({ method: "GET", url });
+      expect(res.statusCode).toBe(200);
+      const body = res.json();
+      seen.push(...body.memories.map((m: { content: string }) => m.content));
+      cursor = body.nextCursor;
+      pages++;
+    } while (cursor);
+
+    expect(pages).toBe(3);
+    expect(seen.sort()).toEqual([0, 1, 2, 3, 4].map((i) => `Memory ${i}`));
+  });
+
+  it("returns 400 for a cursor on a ranked search", async () => {
+    const app = createApp();
+    const res = await app.inject({ method: "GET", url: "/api/memories?query=x&cursor=abc" });
+    expect(res.statusCode).toBe(400);
+    expect(res.json().error).toBe("cursor requires mode=text when a query is given");
+  });
+
+  it("returns 400 for a malformed cursor or limit", async () => {
+    const app = createApp();
+    const badCursor = await app.inject({ method: "GET", url: "/api/memories?cursor=abc" });
+    expect(badCursor.statusCode).toBe(400);
+    expect(badCursor.json().error).toBe("invalid cursor");
+
+    const badLimit = await app.inject({ method: "GET", url: "/api/memories?limit=0" });
+    expect(badLimit.statusCode).toBe(400);
+    expect(badLimit.json().error).toBe("limit must be a positive integer");
+  });
 });
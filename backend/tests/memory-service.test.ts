@@ -25,6 +25,7 @@ function createMockRepo(): MemoryRepository {
 function createMockEmbedding(vector: number[] | null = null): EmbeddingService {
   return {
     embed: vi.fn().mockResolvedValue(vector),
+    embedBatch: vi.fn().mockImplementation(async (texts: string[]) => texts.map(() => vector)),
     healthCheck: vi.fn().mockResolvedValue(vector !== null),
   };
 }
@@ -103,6 +104,28 @@ describe("MemoryService", () => {
       });
     });
 
+    it("forwards hybrid mode with the query embedding", async () => {
+      await service.fetch("Acme Corp", undefined, "hybrid");
+
+      expect(repo.fetch).toHaveBeenCalledWith({
+        query: "Acme Corp",
+        tags: undefined,
+        queryEmbedding: fakeVector,
+        mode: "hybrid",
+      });
+    });
+
+    it("does not embed the query in text mode", async () => {
+      await service.fetch("Acme Corp", undefined, "text");
+
+      expect(embedding.embed).not.toHaveBeenCalled();
+      expect(repo.fetch).toHaveBeenCalledWith({
+        query: "Acme Corp",
+        tags: undefined,
+        mode: "text",
+      });
+    });
+
     it("fetches all memories when no query or tags", async () => {
       await service.fetch();
 
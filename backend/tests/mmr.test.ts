@@ -0,0 +1,49 @@
+import { describe, it, expect } from "vitest";
+import { mmrSelect } from "../src/utils/mmr.js";
+
+describe("mmrSelect", () => {
+  const near = [1, 0, 0];
+  const nearDuplicate = [0.99, 0.01, 0];
+  const other = [0, 1, 0];
+
+  it("keeps relevance order with zero diversity", () => {
+    const candidates = [
+      { score: 0.9, embedding: near },
+      { score: 0.8, embedding: nearDuplicate },
+      { score: 0.7, embedding: other },
+    ];
+    expect(mmrSelect(candidates, 3, 0)).toEqual([0, 1, 2]);
+  });
+
+  it("skips near-duplicates of earlier picks", () => {
+    const candidates = [
+      { score: 0.9, embedding: near },
+      { score: 0.8, embedding: nearDuplicate },
+      { score: 0.7, embedding: other },
+    ];
+    expect(mmrSelect(candidates, 2, 0.5)).toEqual([0, 2]);
+  });
+
+  it("normalises scores so small RRF scores still trade off", () => {
+    const candidates = [
+      { score: 0.0328, embedding: near },
+      { score: 0.0323, embedding: nearDuplicate },
+      { score: 0.0318, embedding: other },
+    ];
+    expect(mmrSelect(candidates, 2, 0.5)).toEqual([0, 2]);
+  });
+
+  it("never penalises candidates without an embedding", () => {
+    const candidates = [
+      { score: 0.9, embedding: near },
+      { score: 0.8, embedding: null },
+      { score: 0.7, embedding: nearDuplicate },
+    ];
+    expect(mmrSelect(candidates, 3, 0.5)).toEqual([0, 1, 2]);
+  });
+
+  it("returns at most the number of candidates", () => {
+    expect(mmrSelect([{ score: 1, embedding: near }], 5, 0.5)).toEqual([0]);
+    expect(mmrSelect([], 5, 0.5)).toEqual([]);
+  });
+});
@@ -0,0 +1,81 @@
+import { describe, it, expect, vi, beforeEach, afterEach } from "vitest";
+import { OllamaEmbeddingService } from "../src/embedding/ollama.js";
+
+function embedResponse(input: string[]): Response {
+  return new Response(
+    JSON.stringify({ embeddings: input.map((text) => [text.length]) }),
+    { status: 200, headers: { "Content-Type": "application/json" } },
+  );
+}
+
+function requestInput(call: unknown[]): string[] {
+  return JSON.parse((call[1] as RequestInit).body as string).input;
+}
+
+describe("OllamaEmbeddingService", () => {
+  let fetchMock: ReturnType<typeof vi.fn>;
+
+  beforeEach(() => {
+    fetchMock = vi.spyOn(globalThis, "fetch") as unknown as ReturnType<typeof vi.fn>;
+    fetchMock.mockImplementation(async (_url: string, init: RequestInit) =>
+      embedResponse(JSON.parse(init.body as string).input),
+    );
+  });
+
+  afterEach(() => {
+    vi.restoreAllMocks();
+  });
+
+  it("embed sends a single-item batch", async () => {
+    const service = new OllamaEmbeddingService("http://ollama:11434/", "model");
+    const vector = await service.embed("hello");
+
+    expect(vector).toEqual([5]);
+    expect(fetchMock).toHaveBeenCalledTimes(1);
+    expect(fetchMock.mock.calls[0][0]).toBe("http://ollama:11434/api/embed");
+    expect(requestInput(fetchMock.mock.calls[0])).toEqual(["hello"]);
+  });
+
+  it("splits embedBatch into requests of at most maxBatchSize", async () => {
+    const service = new OllamaEmbeddingService("http://ollama", "model", { maxBatchSize: 2 });
+    const vectors = await service.embedBatch(["a", "bb", "ccc", "dddd", "eeeee"]);
+
+    expect(vectors).toEqual([[1], [2], [3], [4], [5]]);
+    expect(fetchMock).toHaveBeenCalledTimes(3);
+    expect(fetchMock.mock.calls.map(requestInput)).toEqual([["a", "bb"], ["ccc", "dddd"], ["eeeee"]]);
+  });
+
+  it("limits concurrent requests to maxInFlight", async () => {
+    let active = 0;
+    let peak = 0;
+    fetchMock.mockImplementation(async (_url: string, init: RequestInit) => {
+      active++;
+      peak = Math.max(peak, active);
+      await new Promise((resolve) => setTimeout(resolve, 5));
+      active--;
+      return embedResponse(JSON.parse(init.body as string).input);
+    });
+
+    const service = new OllamaEmbeddingService("http://ollama", "model", {
+      maxBatchSize: 1,
+      maxInFlight: 2,
+    });
+    const texts = Array.from({ length: 8 }, (_, i) => `text-${i}`);
+    const [batch, single] = await Promise.all([service.embedBatch(texts), service.embed("extra")]);
+
+    expect(batch).toHaveLength(8);
+    expect(single).toEqual([5]);
+    expect(fetchMock).toHaveBeenCalledTimes(9);
+    expect(peak).toBe(2);
+  });
+
+  it("returns nulls for a failed batch without failing the others", async () => {
+    fetchMock.mockResolvedValueOnce(new Response("overloaded", { status: 503 }));
+    vi.spyOn(console, "warn").mockImplementation(() => {});
+
+    const service = new OllamaEmbeddingService("http://ollama", "model", { maxBatchSize: 2 });
+    const vectors = await service.embedBatch(["a", "bb", "ccc"]);
+
+    expect(vectors).toEqual([null, null, [3]]);
+  });
+});
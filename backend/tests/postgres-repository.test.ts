@@ -0,0 +1,74 @@
+import { describe, it, expect, vi } from "vitest";
+import type pg from "pg";
+import { PostgresRepository } from "../src/repository/postgres.js";
+import { encodeVectorArray } from "../src/utils/vector-codec.js";
+
+const VECTOR_OID = 16385;
+
+function createRepository() {
+  const query = vi.fn(async (sql: string, params?: unknown[]) => {
+    if (sql.includes("'vector'::regtype::oid")) {
+      return { rows: [{ oid: VECTOR_OID }] };
+    }
+    const rows = JSON.parse(params![0] as string) as { id: string; content: string; tags: string[] }[];
+    const now = new Date();
+    return {
+      rows: rows.map((r) => ({ ...r, created_at: now, updated_at: now })).reverse(),
+    };
+  });
+  const repo = new PostgresRepository("postgres://unused");
+  (repo as unknown as { pool: pg.Pool }).pool = { query } as unknown as pg.Pool;
+  return { repo, query };
+}
+
+describe("PostgresRepository.storeBatch", () => {
+  it("sends embeddings as one binary vector[] parameter", async () => {
+    const { repo, query } = createRepository();
+
+    await repo.storeBatch([
+      { content: "a", tags: [], embedding: [1, 2] },
+      { content: "b", tags: ["x"] },
+      { content: "c", tags: [], embedding: [3, 4] },
+    ]);
+
+    const [sql, params] = query.mock.calls.at(-1)!;
+    expect(sql).toContain("unnest($2::vector[])");
+    expect(params![1]).toEqual(encodeVectorArray([[1, 2], null, [3, 4]], VECTOR_OID));
+  });
+
+  it("returns memories in input order", async () => {
+    const { repo } = createRepository();
+
+    const memories = await repo.storeBatch([
+      { content: "first", tags: [] },
+      { content: "second", tags: [] },
+    ]);
+
+    expect(memories.map((m) => m.content)).toEqual(["first", "second"]);
+  });
+
+  it("keeps restored ids and reads back ones that already exist", async () => {
+    const { repo, query } = createRepository();
+    const id = "0b0b0b0b-0000-4000-8000-000000000001";
+    const createdAt = new Date("2025-01-02T03:04:05Z");
+    query.mockImplementation(async (sql: string) => {
+      if (sql.includes("'vector'::regtype::oid")) return { rows: [{ oid: VECTOR_OID }] };
+      if (sql.startsWith("INSERT")) return { rows: [] };
+      return {
+        rows: [{ id, content: "kept", tags: [], created_at: createdAt, updated_at: createdAt }],
+      };
+    });
+
+    const [memory] = await repo.storeBatch([
+      { id: id.toUpperCase(), content: "again", tags: [], createdAt: createdAt.toISOString() },
+    ]);
+
+    const insert = query.mock.calls.find(([sql]) => sql.startsWith("INSERT"))!;
+    expect(insert[0]).toContain("ON CONFLICT (id) DO NOTHING");
+    expect(JSON.parse(insert[1]![0] as string)[0]).toMatchObject({
+      id,
+      created_at: createdAt.toISOString(),
+    });
+    expect(memory).toMatchObject({ id, content: "kept", createdAt: createdAt.toISOString() });
+  });
+});
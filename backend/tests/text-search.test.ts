@@ -0,0 +1,67 @@
+import { describe, it, expect, vi } from "vitest";
+import type pg from "pg";
+import { reciprocalRankFusion, withLatencyBudget } from "../src/repository/text-search.js";
+
+function createMockPool(query: (sql: string) => unknown) {
+  const client = {
+    query: vi.fn(async (sql: string) => query(sql)),
+    release: vi.fn(),
+  };
+  const pool = { connect: vi.fn(async () => client) } as unknown as pg.Pool;
+  return { pool, client };
+}
+
+describe("withLatencyBudget", () => {
+  it("runs the query under a local statement timeout", async () => {
+    const { pool, client } = createMockPool(() => ({ rows: [] }));
+
+    const result = await withLatencyBudget(pool, 250, (c) => c.query("SELECT 1"));
+
+    expect(result).toEqual({ rows: [] });
+    expect(client.query.mock.calls.map((c) => c[0])).toEqual([
+      "BEGIN",
+      "SELECT set_config('statement_timeout', $1, true)",
+      "SELECT 1",
+      "COMMIT",
+    ]);
+    expect(client.query).toHaveBeenCalledWith(expect.any(String), ["250"]);
+    expect(client.release).toHaveBeenCalledOnce();
+  });
+
+  it("returns null when the budget runs out", async () => {
+    const { pool, client } = createMockPool((sql) => {
+      if (sql === "SELECT slow") {
+        throw Object.assign(new Error("canceling statement due to statement timeout"), {
+          code: "57014",
+        });
+      }
+      return { rows: [] };
+    });
+
+    const result = await withLatencyBudget(pool, 250, (c) => c.query("SELECT slow"));
+
+    expect(result).toBeNull();
+    expect(client.query).toHaveBeenCalledWith("ROLLBACK");
+    expect(client.release).toHaveBeenCalledOnce();
+  });
+
+  it("rethrows other errors", async () => {
+    const { pool, client } = createMockPool((sql) => {
+      if (sql === "SELECT broken") throw Object.assign(new Error("syntax error"), { code: "42601" });
+      return { rows: [] };
+    });
+
+    await expect(withLatencyBudget(pool, 250, (c) => c.query("SELECT broken"))).rejects.toThrow(
+      "syntax error",
+    );
+    expect(client.release).toHaveBeenCalledOnce();
+  });
+});
+
+describe("reciprocalRankFusion", () => {
+  it("sums 1 / (60 + rank) over every ranking", () => {
+    const sql = reciprocalRankFusion("id", ["a", "b"]);
+    expect(sql).toContain("SUM(1.0 / (60 + rank))");
+    expect(sql).toContain("SELECT id, rank FROM a UNION ALL SELECT id, rank FROM b");
+  });
+});
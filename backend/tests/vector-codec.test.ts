@@ -0,0 +1,75 @@
+import { describe, it, expect } from "vitest";
+import {
+  decodeVector,
+  encodeVector,
+  encodeVectorArray,
+  importedEmbedding,
+} from "../src/utils/vector-codec.js";
+
+describe("encodeVector / decodeVector", () => {
+  it("writes pgvector's binary layout", () => {
+    const buf = encodeVector([1, -2.5]);
+
+    expect(buf.length).toBe(4 + 2 * 4);
+    expect(buf.readInt16BE(0)).toBe(2);
+    expect(buf.readInt16BE(2)).toBe(0);
+    expect(buf.readFloatBE(4)).toBe(1);
+    expect(buf.readFloatBE(8)).toBe(-2.5);
+  });
+
+  it("round-trips to float32 precision", () => {
+    const vector = Array.from({ length: 4096 }, (_, i) => Math.sin(i) / 3);
+    const decoded = decodeVector(encodeVector(vector));
+
+    expect(decoded).toBeInstanceOf(Float32Array);
+    expect(decoded.length).toBe(4096);
+    expect(Array.from(decoded)).toEqual(vector.map(Math.fround));
+  });
+
+  it("accepts Float32Array input", () => {
+    const vector = new Float32Array([0.25, 0.5, 0.75]);
+    expect(decodeVector(encodeVector(vector))).toEqual(vector);
+  });
+});
+
+describe("encodeVectorArray", () => {
+  it("writes a one-dimensional binary array with null elements", () => {
+    const buf = encodeVectorArray([[1, 2], null, [3]], 16385);
+
+    expect(buf.readInt32BE(0)).toBe(1); // ndim
+    expect(buf.readInt32BE(4)).toBe(1); // has nulls
+    expect(buf.readUInt32BE(8)).toBe(16385);
+    expect(buf.readInt32BE(12)).toBe(3); // length
+    expect(buf.readInt32BE(16)).toBe(1); // lower bound
+
+    expect(buf.readInt32BE(20)).toBe(12);
+    expect(Array.from(decodeVector(buf.subarray(24, 36)))).toEqual([1, 2]);
+    expect(buf.readInt32BE(36)).toBe(-1);
+    expect(buf.readInt32BE(40)).toBe(8);
+    expect(Array.from(decodeVector(buf.subarray(44, 52)))).toEqual([3]);
+    expect(buf.length).toBe(52);
+  });
+
+  it("clears the null flag when every element is present", () => {
+    const buf = encodeVectorArray([[1]], 1);
+    expect(buf.readInt32BE(4)).toBe(0);
+  });
+});
+
+describe("importedEmbedding", () => {
+  it("decodes base64 vectors of the expected dimension", () => {
+    const encoded = encodeVector([0.5, -1, 2]).toString("base64");
+    expect(importedEmbedding(encoded, 3)).toEqual([0.5, -1, 2]);
+  });
+
+  it("passes through absent and null embeddings", () => {
+    expect(importedEmbedding(undefined, 3)).toBeUndefined();
+    expect(importedEmbedding(null, 3)).toBeNull();
+  });
+
+  it("rejects malformed values and wrong dimensions", () => {
+    expect(importedEmbedding([0.5, -1, 2], 3)).toBe(false);
+    expect(importedEmbedding("bm90IGEgdmVjdG9y", 3)).toBe(false);
+    expect(importedEmbedding(encodeVector([1, 2]).toString("base64"), 3)).toBe(false);
+  });
+});
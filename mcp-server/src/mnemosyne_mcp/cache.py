@@ -0,0 +1,94 @@
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import httpx
+
+
+@dataclass
+class _Entry:
+    response: httpx.Response
+    size: int
+    expires_at: float
+    scopes: tuple[str, ...]
+
+
+def cache_key(method: str, url: str, params: dict | None = None, body: dict | None = None) -> str:
+    """Key a backend request by method, path and its (normalized) arguments."""
+    return json.dumps([method, url, params or {}, body or {}], sort_keys=True)
+
+
+class ResultCache:
+    """LRU cache of successful backend read responses, bounded by TTL and bytes.
+
+    Entries are tagged with scopes (e.g. "memories", "conversation:<id>") so
+    that writes can drop whatever they may have made stale. Each scope also
+    has a generation, bumped on invalidation: a read captures it before
+    going to the backend and passes it to put(), so a response fetched
+    across a write is not cached.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._generations: dict[str, int] = {}
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    def get(self, key: str) -> httpx.Response | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._counters["misses"] += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self._counters["expirations"] += 1
+            self._counters["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._counters["hits"] += 1
+        return entry.response
+
+    def generation(self, scopes: tuple[str, ...]) -> tuple[int, ...]:
+        """Current generation of `scopes`, to pass to put()."""
+        return tuple(self._generations.get(scope, 0) for scope in scopes)
+
+    def put(
+        self,
+        key: str,
+        response: httpx.Response,
+        scopes: tuple[str, ...],
+        generation: tuple[int, ...] | None = None,
+    ):
+        """Cache `response`, unless `scopes` were invalidated since `generation`."""
+        if generation is not None and generation != self.generation(scopes):
+            return
+        size = len(key) + len(response.content)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(response, size, time.monotonic() + self.ttl, scopes)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._counters["evictions"] += 1
+
+    def invalidate(self, *scopes: str):
+        """Drop every entry tagged with any of `scopes`."""
+        for scope in scopes:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+        stale = [key for key, entry in self._entries.items() if not set(scopes).isdisjoint(entry.scopes)]
+        for key in stale:
+            self._remove(key)
+        self._counters["invalidations"] += len(stale)
+
+    def stats(self) -> dict:
+        return {**self._counters, "size": len(self._entries), "bytes": self._bytes, "maxBytes": self.max_bytes}
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
@@ -0,0 +1,39 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one.
+
+    The first caller starts the call; callers arriving while it is in flight
+    await the same task and share its result or exception.
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._counters = {"calls": 0, "coalesced": 0}
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        self._counters["calls"] += 1
+        task = self._inflight.get(key)
+        if task is not None:
+            self._counters["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        # A cancelled caller must not cancel the call for the others.
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {**self._counters, "inFlight": len(self._inflight)}
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved in case every caller went away.
+            task.exception()
@@ -2,3 +2,51 @@ import os
 
 BACKEND_URL = os.environ.get("BACKEND_URL", "http://localhost:3000")
 MCP_PORT = int(os.environ.get("MCP_PORT", "8080"))
+
+# Read-through cache of backend lookups, shared by all sessions; 0 bytes disables it.
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+RESULT_CACHE_TTL_SECONDS = float(os.environ.get("RESULT_CACHE_TTL_SECONDS", "300"))
+
+
+def _tool_timeouts(spec: str) -> dict[str, float]:
+    """Parse "tool=seconds,tool=seconds" overrides."""
+    timeouts = {}
+    for item in spec.split(","):
+        if item.strip():
+            tool, _, seconds = item.partition("=")
+            timeouts[tool.strip()] = float(seconds)
+    return timeouts
+
+
+# Backend HTTP transport. The client is shared by all sessions.
+BACKEND_MAX_CONNECTIONS = int(os.environ.get("BACKEND_MAX_CONNECTIONS", "100"))
+BACKEND_MAX_KEEPALIVE = int(os.environ.get("BACKEND_MAX_KEEPALIVE", "20"))
+BACKEND_KEEPALIVE_EXPIRY = float(os.environ.get("BACKEND_KEEPALIVE_EXPIRY", "30"))
+# Needs the h2 package (the "http2" extra).
+BACKEND_HTTP2 = os.environ.get("BACKEND_HTTP2", "").lower() in ("1", "true", "yes")
+BACKEND_CONNECT_TIMEOUT = float(os.environ.get("BACKEND_CONNECT_TIMEOUT", "5"))
+# How long a request may wait for a free pooled connection.
+BACKEND_POOL_TIMEOUT = float(os.environ.get("BACKEND_POOL_TIMEOUT", "5"))
+BACKEND_TIMEOUT = float(os.environ.get("BACKEND_TIMEOUT", "10"))
+# Tools that embed text wait longer; BACKEND_TOOL_TIMEOUTS overrides per tool.
+BACKEND_TOOL_TIMEOUTS = {
+    "store_memory": 30.0,
+    "store_memories": 120.0,
+    "store_conversation": 60.0,
+    "fetch_memories": 30.0,
+    "search_conversations": 30.0,
+    "multi_search_conversations": 30.0,
+    **_tool_timeouts(os.environ.get("BACKEND_TOOL_TIMEOUTS", "")),
+}
+# Retries of idempotent reads after connection errors, timeouts and 502-504.
+BACKEND_RETRIES = int(os.environ.get("BACKEND_RETRIES", "2"))
+BACKEND_RETRY_BACKOFF = float(os.environ.get("BACKEND_RETRY_BACKOFF", "0.2"))
+# Consecutive failures that open the circuit, and how long it stays open.
+BACKEND_BREAKER_THRESHOLD = int(os.environ.get("BACKEND_BREAKER_THRESHOLD", "5"))
+BACKEND_BREAKER_RESET = float(os.environ.get("BACKEND_BREAKER_RESET", "30"))
+
+# Prometheus metrics on /metrics (streamable-http mode only).
+METRICS_ENABLED = os.environ.get("MCP_METRICS", "true").lower() not in ("0", "false", "no")
+# OTLP/HTTP trace export (needs the "otlp" extra); off unless set.
+OTLP_ENDPOINT = os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT")
+OTEL_SERVICE_NAME = os.environ.get("OTEL_SERVICE_NAME", "mnemosyne-mcp")
@@ -1,26 +1,328 @@
+import functools
+import time
 from contextlib import asynccontextmanager
 from collections.abc import AsyncIterator
+from typing import Literal
 
 import httpx
 from mcp.server.fastmcp import FastMCP, Context
+from mcp.server.fastmcp.exceptions import ToolError
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
 
-from .config import BACKEND_URL, MCP_PORT
+from .cache import ResultCache, cache_key
+from .coalesce import SingleFlight
+from .config import (
+    BACKEND_BREAKER_RESET,
+    BACKEND_BREAKER_THRESHOLD,
+    BACKEND_CONNECT_TIMEOUT,
+    BACKEND_HTTP2,
+    BACKEND_KEEPALIVE_EXPIRY,
+    BACKEND_MAX_CONNECTIONS,
+    BACKEND_MAX_KEEPALIVE,
+    BACKEND_POOL_TIMEOUT,
+    BACKEND_RETRIES,
+    BACKEND_RETRY_BACKOFF,
+    BACKEND_TIMEOUT,
+    BACKEND_TOOL_TIMEOUTS,
+    BACKEND_URL,
+    MCP_PORT,
+    METRICS_ENABLED,
+    OTEL_SERVICE_NAME,
+    OTLP_ENDPOINT,
+    RESULT_CACHE_MAX_BYTES,
+    RESULT_CACHE_TTL_SECONDS,
+)
+from .metrics import SIZE_BUCKETS, Registry
+from .tracing import setup_tracing, span, trace_headers
+from .transport import CircuitBreaker, CircuitOpenError, SharedClient, Transport
+
+# Shared by all sessions: the lifespan runs once per session in
+# streamable-http mode.
+_cache = (
+    ResultCache(RESULT_CACHE_MAX_BYTES, RESULT_CACHE_TTL_SECONDS)
+    if RESULT_CACHE_MAX_BYTES > 0
+    else None
+)
+_flights = SingleFlight()
+_transport = Transport(
+    CircuitBreaker(BACKEND_BREAKER_THRESHOLD, BACKEND_BREAKER_RESET),
+    timeout=BACKEND_TIMEOUT,
+    tool_timeouts=BACKEND_TOOL_TIMEOUTS,
+    connect_timeout=BACKEND_CONNECT_TIMEOUT,
+    pool_timeout=BACKEND_POOL_TIMEOUT,
+    retries=BACKEND_RETRIES,
+    backoff=BACKEND_RETRY_BACKOFF,
+)
+_client = SharedClient(
+    lambda: httpx.AsyncClient(
+        base_url=BACKEND_URL,
+        http2=BACKEND_HTTP2,
+        limits=httpx.Limits(
+            max_connections=BACKEND_MAX_CONNECTIONS,
+            max_keepalive_connections=BACKEND_MAX_KEEPALIVE,
+            keepalive_expiry=BACKEND_KEEPALIVE_EXPIRY,
+        ),
+        timeout=_transport.timeout_for(""),
+    )
+)
 
 
 @asynccontextmanager
 async def lifespan(server: FastMCP) -> AsyncIterator[dict]:
-    async with httpx.AsyncClient(base_url=BACKEND_URL) as client:
-        yield {"client": client}
+    async with _client.acquire() as client:
+        yield {"client": client, "cache": _cache, "flights": _flights, "transport": _transport}
 
 
 mcp = FastMCP("mnemosyne", lifespan=lifespan, host="0.0.0.0", port=MCP_PORT)
 
+_registry = Registry()
+_tool_calls = _registry.counter(
+    "mnemosyne_mcp_tool_calls_total", "MCP tool calls by outcome.", ("tool", "outcome")
+)
+_tool_duration = _registry.histogram(
+    "mnemosyne_mcp_tool_duration_seconds",
+    "Tool call latency, backend round trips and rendering included.",
+    ("tool",),
+)
+_tool_in_flight = _registry.gauge(
+    "mnemosyne_mcp_tool_calls_in_flight", "Tool calls in progress.", ("tool",)
+)
+_response_bytes = _registry.histogram(
+    "mnemosyne_mcp_tool_response_bytes", "Size of tool results.", ("tool",), SIZE_BUCKETS
+)
+_backend_requests = _registry.counter(
+    "mnemosyne_mcp_backend_requests_total",
+    "Backend requests by final status code, or 'error' when none was received.",
+    ("tool", "status"),
+)
+_backend_duration = _registry.histogram(
+    "mnemosyne_mcp_backend_request_duration_seconds",
+    "Backend round trip latency, retries included.",
+    ("tool",),
+)
+_backend_in_flight = _registry.gauge(
+    "mnemosyne_mcp_backend_requests_in_flight",
+    "Backend requests in progress; near the pool size, requests queue for connections.",
+)
+_registry.collect(
+    "mnemosyne_mcp_backend_pool_max_connections",
+    "Connection pool size (BACKEND_MAX_CONNECTIONS).",
+    "gauge",
+    lambda: [({}, BACKEND_MAX_CONNECTIONS)],
+)
+_registry.collect(
+    "mnemosyne_mcp_backend_retries_total",
+    "Retried backend requests.",
+    "counter",
+    lambda: [({}, _transport.stats()["retries"])],
+)
+_registry.collect(
+    "mnemosyne_mcp_circuit_open",
+    "Whether the backend circuit breaker refuses calls (1) or not (0).",
+    "gauge",
+    lambda: [({}, 1 if _transport.breaker.state == "open" else 0)],
+)
+_registry.collect(
+    "mnemosyne_mcp_coalesced_calls_total",
+    "Reads that joined an identical request already in flight.",
+    "counter",
+    lambda: [({}, _flights.stats()["coalesced"])],
+)
+_registry.collect(
+    "mnemosyne_mcp_cache_lookups_total",
+    "Result cache lookups by result.",
+    "counter",
+    lambda: [({"result": "hit"}, _cache.stats()["hits"]), ({"result": "miss"}, _cache.stats()["misses"])]
+    if _cache is not None
+    else [],
+)
+_registry.collect(
+    "mnemosyne_mcp_cache_bytes",
+    "Bytes held by the result cache.",
+    "gauge",
+    lambda: [({}, _cache.stats()["bytes"])] if _cache is not None else [],
+)
+
+SearchMode = Literal["vector", "text", "hybrid"]
+
 
 def _get_client(ctx: Context) -> httpx.AsyncClient:
     return ctx.request_context.lifespan_context["client"]
 
 
+def _get_cache(ctx: Context) -> ResultCache | None:
+    return ctx.request_context.lifespan_context.get("cache")
+
+
+def _get_flights(ctx: Context) -> SingleFlight | None:
+    return ctx.request_context.lifespan_context.get("flights")
+
+
+def _observed(fn):
+    """Record calls, latency, in-flight count and result size of a tool."""
+    tool = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        _tool_in_flight.inc(tool=tool)
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            with span(f"tool {tool}", **{"mcp.tool": tool}):
+                result = await fn(*args, **kwargs)
+            outcome = "ok"
+            _response_bytes.observe(len(result.encode()), tool=tool)
+            return result
+        finally:
+            _tool_in_flight.dec(tool=tool)
+            _tool_duration.observe(time.perf_counter() - start, tool=tool)
+            _tool_calls.inc(tool=tool, outcome=outcome)
+
+    return wrapper
+
+
+async def _request(
+    ctx: Context, tool: str, method: str, url: str, idempotent: bool = False, **kwargs
+) -> httpx.Response:
+    """Send a backend request through the transport, if one is configured.
+
+    Backend outages surface as tool errors: immediately while the circuit
+    is open, otherwise once the retries are used up.
+    """
+    _backend_in_flight.inc()
+    start = time.perf_counter()
+    status = "error"
+    try:
+        with span(f"backend {method}", **{"http.request.method": method, "url.path": url}):
+            # Taken inside the span so the backend's spans parent on it.
+            if headers := trace_headers():
+                kwargs["headers"] = {**(kwargs.get("headers") or {}), **headers}
+            response = await _send(ctx, tool, method, url, idempotent, **kwargs)
+        status = str(response.status_code)
+        return response
+    finally:
+        _backend_in_flight.dec()
+        _backend_duration.observe(time.perf_counter() - start, tool=tool)
+        _backend_requests.inc(tool=tool, status=status)
+
+
+async def _send(
+    ctx: Context, tool: str, method: str, url: str, idempotent: bool, **kwargs
+) -> httpx.Response:
+    client = _get_client(ctx)
+    transport: Transport | None = ctx.request_context.lifespan_context.get("transport")
+    if transport is None:
+        return await getattr(client, method.lower())(url, **kwargs)
+    try:
+        return await transport.request(client, tool, method, url, idempotent, **kwargs)
+    except CircuitOpenError as err:
+        raise ToolError(f"Mnemosyne {err}") from err
+    except httpx.TimeoutException as err:
+        raise ToolError(f"Mnemosyne backend timed out ({type(err).__name__})") from err
+    except httpx.TransportError as err:
+        raise ToolError(f"Mnemosyne backend unreachable: {err}") from err
+
+
+async def _cached_read(
+    ctx: Context,
+    tool: str,
+    scopes: tuple[str, ...],
+    url: str,
+    params: dict | None = None,
+    json: dict | None = None,
+) -> httpx.Response:
+    """Read from the backend through the result cache.
+
+    Sends a POST when `json` is given (search bodies), a GET otherwise.
+    Only 200 responses are cached, tagged with `scopes` for invalidation.
+    Identical reads already in flight share one backend request, unless
+    their scopes were invalidated since it started.
+    """
+    cache = _get_cache(ctx)
+    key = cache_key("POST" if json is not None else "GET", url, params, json)
+    if cache is not None and (cached := cache.get(key)) is not None:
+        return cached
+    # Taken before the request: a write landing while it is in flight must
+    # keep the (possibly pre-write) response out of the cache.
+    generation = cache.generation(scopes) if cache is not None else None
+
+    async def fetch() -> httpx.Response:
+        # Reads (searches included) are idempotent, so they may be retried.
+        if json is not None:
+            response = await _request(ctx, tool, "POST", url, idempotent=True, json=json)
+        else:
+            response = await _request(ctx, tool, "GET", url, idempotent=True, params=params)
+        if cache is not None and response.status_code == 200:
+            cache.put(key, response, scopes, generation)
+        return response
+
+    flights = _get_flights(ctx)
+    if flights is None:
+        return await fetch()
+    # A read issued after a write must not join a flight started before it.
+    flight_key = key if generation is None else f"{key}@{generation}"
+    return await flights.run(flight_key, fetch)
+
+
+@mcp.custom_route("/cache/stats", methods=["GET"])
+async def cache_stats(request: Request) -> JSONResponse:
+    return JSONResponse(_cache.stats() if _cache is not None else {"enabled": False})
+
+
+@mcp.custom_route("/coalescing/stats", methods=["GET"])
+async def coalescing_stats(request: Request) -> JSONResponse:
+    return JSONResponse(_flights.stats())
+
+
+@mcp.custom_route("/transport/stats", methods=["GET"])
+async def transport_stats(request: Request) -> JSONResponse:
+    return JSONResponse(_transport.stats())
+
+
+if METRICS_ENABLED:
+
+    @mcp.custom_route("/metrics", methods=["GET"])
+    async def metrics(request: Request) -> PlainTextResponse:
+        return PlainTextResponse(_registry.render(), media_type="text/plain; version=0.0.4")
+
+
+def _format_conversations(data: dict) -> str:
+    conversations = data["conversations"]
+    if not conversations:
+        return "No conversations found."
+    lines = []
+    for c in conversations:
+        tag_str = f" [{', '.join(c['tags'])}]" if c.get("tags") else ""
+        score_str = f" (score: {c['score']:.3f})" if c.get("score") is not None else ""
+        count_str = f", {c['messageCount']} messages" if c.get("messageCount") is not None else ""
+        lines.append(f"- {c.get('title', 'Untitled')}{tag_str}{score_str} (id: {c['id']}{count_str})")
+        if c.get("bestMatch"):
+            match = c["bestMatch"]
+            lines.append(f"  best match (#{match['position']}, {match['role']}): {match['snippet']}")
+    return f"Found {data['total']} conversations:\n" + "\n".join(lines) + _next_page(data)
+
+
+def _format_conversation(data: dict, next_cursor: str | None) -> str:
+    tag_str = f" [{', '.join(data['tags'])}]" if data.get("tags") else ""
+    header = f"# {data.get('title', 'Untitled')}{tag_str}\n"
+    messages = data.get("messages", [])
+    if not messages:
+        return header + "No messages."
+    lines = [header]
+    for msg in messages:
+        lines.append(f"**{msg['role']}**: {msg['content']}")
+    return "\n".join(lines) + _next_page({"nextCursor": next_cursor})
+
+
+def _next_page(data: dict) -> str:
+    if not data.get("nextCursor"):
+        return ""
+    return f"\n\nMore results: call again with cursor=\"{data['nextCursor']}\"."
+
+
 @mcp.tool()
+@_observed
 async def store_memory(
     content: str, tags: list[str] | None = None, ctx: Context = None
 ) -> str:
@@ -30,12 +332,13 @@ async def store_memory(
         content: The text content of the memory to store.
         tags: Optional list of tags to categorize the memory.
     """
-    client = _get_client(ctx)
     payload: dict = {"content": content}
     if tags is not None:
         payload["tags"] = tags
-    response = await client.post("/api/memories", json=payload)
+    response = await _request(ctx, "store_memory", "POST", "/api/memories", json=payload)
     if response.status_code == 201:
+        if (cache := _get_cache(ctx)) is not None:
+            cache.invalidate("memories")
         data = response.json()
         return f"Memory stored (id: {data['id']})"
     else:
@@ -43,9 +346,39 @@ async def store_memory(
 
 
 @mcp.tool()
+@_observed
+async def store_memories(items: list[dict], ctx: Context = None) -> str:
+    """Store several memories in one call.
+
+    Prefer this over calling store_memory once per fact.
+
+    Args:
+        items: Up to 1000 dicts with a 'content' string and an optional
+            'tags' list.
+    """
+    response = await _request(
+        ctx, "store_memories", "POST", "/api/memories/batch", json={"memories": items}
+    )
+    if response.status_code != 200:
+        return f"Error storing memories: {response.text}"
+    data = response.json()
+    if data["succeeded"] > 0 and (cache := _get_cache(ctx)) is not None:
+        cache.invalidate("memories")
+    lines = [
+        f"{i}. Error: {result['error']}" if result.get("error") else f"{i}. Stored (id: {result['id']})"
+        for i, result in enumerate(data["results"], start=1)
+    ]
+    return f"Stored {data['succeeded']} of {data['total']} memories:\n" + "\n".join(lines)
+
+
+@mcp.tool()
+@_observed
 async def fetch_memories(
     query: str | None = None,
     tags: list[str] | None = None,
+    mode: SearchMode | None = None,
+    page_size: int | None = None,
+    cursor: str | None = None,
     ctx: Context = None,
 ) -> str:
     """Fetch memories from long-term storage.
@@ -53,14 +386,27 @@ async def fetch_memories(
     Args:
         query: Optional text to search for in memory content.
         tags: Optional list of tags to filter memories by.
+        mode: Optional search mode: 'vector' (semantic, the default), 'text'
+            (keyword match) or 'hybrid' (both combined; best for exact names
+            such as products or companies).
+        page_size: Optional number of memories per page (default 50).
+        cursor: Optional cursor from a previous call, to fetch the next page.
+            Only listings (no query) and mode='text' searches have pages.
     """
-    client = _get_client(ctx)
     params: dict = {}
     if query is not None:
         params["query"] = query
     if tags is not None:
         params["tags"] = ",".join(tags)
-    response = await client.get("/api/memories", params=params)
+    if mode is not None:
+        params["mode"] = mode
+    if page_size is not None:
+        params["limit"] = str(page_size)
+    if cursor is not None:
+        params["cursor"] = cursor
+    response = await _cached_read(
+        ctx, "fetch_memories", ("memories",), "/api/memories", params=params
+    )
     if response.status_code == 200:
         data = response.json()
         memories = data["memories"]
@@ -70,12 +416,13 @@ async def fetch_memories(
         for m in memories:
             tag_str = f" [{', '.join(m['tags'])}]" if m["tags"] else ""
             lines.append(f"- {m['content']}{tag_str} (id: {m['id']})")
-        return f"Found {data['total']} memories:\n" + "\n".join(lines)
+        return f"Found {data['total']} memories:\n" + "\n".join(lines) + _next_page(data)
     else:
         return f"Error fetching memories: {response.text}"
 
 
 @mcp.tool()
+@_observed
 async def store_conversation(
     source_id: str,
     messages: list[dict] | None = None,
@@ -96,7 +443,6 @@ async def store_conversation(
         tags: Optional list of tags to categorize the conversation.
         source: Optional source identifier (e.g. 'open-webui', 'n8n').
     """
-    client = _get_client(ctx)
     payload: dict = {"sourceId": source_id}
     if messages is not None:
         payload["messages"] = messages
@@ -106,9 +452,11 @@ async def store_conversation(
         payload["tags"] = tags
     if source is not None:
         payload["source"] = source
-    response = await client.post("/api/conversations", json=payload)
+    response = await _request(ctx, "store_conversation", "POST", "/api/conversations", json=payload)
     if response.status_code == 200:
         data = response.json()
+        if (cache := _get_cache(ctx)) is not None:
+            cache.invalidate("conversations", f"conversation:{data['id']}")
         msg_count = len(data.get("messages", []))
         return f"Conversation stored (id: {data['id']}, messages: {msg_count})"
     else:
@@ -116,10 +464,14 @@ async def store_conversation(
 
 
 @mcp.tool()
+@_observed
 async def search_conversations(
     query: str | None = None,
     tags: list[str] | None = None,
     limit: int | None = None,
+    mode: SearchMode | None = None,
+    diversity: float | None = None,
+    cursor: str | None = None,
     ctx: Context = None,
 ) -> str:
     """Search conversations by text query and/or tags.
@@ -128,64 +480,154 @@ async def search_conversations(
         query: Optional text to search for in conversation messages and titles.
         tags: Optional list of tags to filter conversations by.
         limit: Optional maximum number of results to return.
+        mode: Optional search mode: 'vector' (semantic, the default), 'text'
+            (keyword match) or 'hybrid' (both combined; best for exact names
+            such as products or companies).
+        diversity: Optional 0-1 trade-off between relevance and variety. Above
+            0, near-duplicate conversations are skipped in favour of distinct
+            ones, so `limit` results cover more ground; 0.5 is a good start.
+        cursor: Optional cursor from a previous call, to fetch the next page
+            of `limit` results. Only listings (no query) and mode='text'
+            searches have pages.
     """
-    client = _get_client(ctx)
-    params: dict = {}
+    # Summaries carry the best-matching snippet instead of full transcripts;
+    # use get_conversation to read one in full.
+    params: dict = {"view": "summary"}
     if query is not None:
         params["query"] = query
     if tags is not None:
         params["tags"] = ",".join(tags)
     if limit is not None:
         params["limit"] = str(limit)
-    response = await client.get("/api/conversations", params=params)
+    if mode is not None:
+        params["mode"] = mode
+    if diversity is not None:
+        params["diversity"] = str(diversity)
+    if cursor is not None:
+        params["cursor"] = cursor
+    response = await _cached_read(
+        ctx, "search_conversations", ("conversations",), "/api/conversations", params=params
+    )
     if response.status_code == 200:
-        data = response.json()
-        conversations = data["conversations"]
-        if not conversations:
-            return "No conversations found."
-        lines = []
-        for c in conversations:
-            tag_str = f" [{', '.join(c['tags'])}]" if c.get("tags") else ""
-            score_str = f" (score: {c['score']:.3f})" if c.get("score") is not None else ""
-            lines.append(f"- {c.get('title', 'Untitled')}{tag_str}{score_str} (id: {c['id']})")
-        return f"Found {data['total']} conversations:\n" + "\n".join(lines)
+        return _format_conversations(response.json())
     else:
         return f"Error searching conversations: {response.text}"
 
 
 @mcp.tool()
+@_observed
+async def multi_search_conversations(
+    queries: list[str],
+    tags: list[str] | None = None,
+    limit: int | None = None,
+    mode: SearchMode | None = None,
+    ctx: Context = None,
+) -> str:
+    """Search conversations with several phrasings of a question at once.
+
+    Results for all queries are merged into one deduplicated ranking, in a
+    single request; prefer this over calling search_conversations per query.
+
+    Args:
+        queries: Up to 10 search queries, e.g. rephrasings of one question.
+        tags: Optional list of tags to filter conversations by.
+        limit: Optional maximum number of results to return.
+        mode: Optional search mode: 'vector' (semantic, the default), 'text'
+            (keyword match) or 'hybrid' (both combined).
+    """
+    payload: dict = {"queries": queries, "view": "summary"}
+    if tags is not None:
+        payload["tags"] = tags
+    if limit is not None:
+        payload["limit"] = limit
+    if mode is not None:
+        payload["mode"] = mode
+    response = await _cached_read(
+        ctx,
+        "multi_search_conversations",
+        ("conversations",),
+        "/api/conversations/search",
+        json=payload,
+    )
+    if response.status_code == 200:
+        return _format_conversations(response.json())
+    else:
+        return f"Error searching conversations: {response.text}"
+
+
+@mcp.tool()
+@_observed
 async def get_conversation(
     id: str,
+    page_size: int = 100,
+    cursor: str | None = None,
     ctx: Context = None,
 ) -> str:
-    """Get a conversation by its internal ID, including all messages.
+    """Get a conversation by its internal ID, with one page of its messages.
 
     Args:
         id: The internal UUID of the conversation.
+        page_size: Number of messages per page (default 100).
+        cursor: Optional cursor from a previous call, to read the next page
+            of messages.
     """
-    client = _get_client(ctx)
-    response = await client.get(f"/api/conversations/{id}")
+    params: dict = {"limit": str(page_size)}
+    if cursor is not None:
+        params["cursor"] = cursor
+    response = await _cached_read(
+        ctx, "get_conversation", (f"conversation:{id}",), f"/api/conversations/{id}", params=params
+    )
     if response.status_code == 200:
         data = response.json()
-        tag_str = f" [{', '.join(data['tags'])}]" if data.get("tags") else ""
-        header = f"# {data.get('title', 'Untitled')}{tag_str}\n"
-        messages = data.get("messages", [])
-        if not messages:
-            return header + "No messages."
-        lines = [header]
-        for msg in messages:
-            lines.append(f"**{msg['role']}**: {msg['content']}")
-        return "\n".join(lines)
+        return _format_conversation(data, data.get("nextCursor"))
     elif response.status_code == 404:
         return "Conversation not found."
     else:
         return f"Error fetching conversation: {response.text}"
 
 
+@mcp.tool()
+@_observed
+async def get_conversations(
+    ids: list[str],
+    page_size: int = 100,
+    ctx: Context = None,
+) -> str:
+    """Get several conversations by internal ID in one call.
+
+    Prefer this over calling get_conversation once per search result.
+
+    Args:
+        ids: Up to 100 internal conversation UUIDs.
+        page_size: Number of messages per conversation (default 100). Use
+            get_conversation with the returned cursor to read further.
+    """
+    payload = {"ids": ids, "limit": page_size}
+    response = await _cached_read(
+        ctx,
+        "get_conversations",
+        tuple(f"conversation:{id}" for id in ids),
+        "/api/conversations/by-ids",
+        json=payload,
+    )
+    if response.status_code != 200:
+        return f"Error fetching conversations: {response.text}"
+    sections = []
+    for result in response.json()["results"]:
+        if result.get("error"):
+            sections.append(f"## {result['id']}\nError: {result['error']}")
+        else:
+            text = _format_conversation(result["conversation"], result.get("nextCursor"))
+            sections.append(f"## {result['id']}\n{text}")
+    return "\n\n".join(sections)
+
+
 def main():
     import os
     import sys
 
+    setup_tracing(OTLP_ENDPOINT, OTEL_SERVICE_NAME)
+
     transport = os.environ.get("MCP_TRANSPORT", "").lower()
     if transport == "stdio" or "--stdio" in sys.argv:
         mcp.run(transport="stdio")
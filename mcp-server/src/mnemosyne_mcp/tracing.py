@@ -0,0 +1,50 @@
+import logging
+from contextlib import AbstractContextManager, nullcontext
+
+logger = logging.getLogger(__name__)
+
+_tracer = None
+
+
+def setup_tracing(endpoint: str | None, service_name: str):
+    """Export spans over OTLP/HTTP to `endpoint`; a no-op when it is unset.
+
+    Needs the "otlp" extra; without it tracing stays off with a warning.
+    """
+    global _tracer
+    if not endpoint:
+        return
+    try:
+        from opentelemetry import trace
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        logger.warning("OTLP endpoint set but the otlp extra is not installed; tracing disabled")
+        return
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(
+        BatchSpanProcessor(OTLPSpanExporter(endpoint=f"{endpoint.rstrip('/')}/v1/traces"))
+    )
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer("mnemosyne_mcp")
+
+
+def span(name: str, **attributes) -> AbstractContextManager:
+    """A span that is current for the block, when tracing is on."""
+    if _tracer is None:
+        return nullcontext()
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+def trace_headers() -> dict[str, str]:
+    """W3C `traceparent` (and `tracestate`) headers for the current span."""
+    if _tracer is None:
+        return {}
+    from opentelemetry import propagate
+
+    headers: dict[str, str] = {}
+    propagate.inject(headers)
+    return headers
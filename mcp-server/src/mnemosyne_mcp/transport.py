@@ -0,0 +1,174 @@
+import asyncio
+import random
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+
+import httpx
+
+RETRY_STATUSES = {502, 503, 504}
+MAX_BACKOFF = 5.0
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the backend while the circuit is open."""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"backend unavailable; retry in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Fail fast after `threshold` consecutive backend failures.
+
+    Once open, calls are refused for `reset_timeout` seconds; then a single
+    trial call is let through, which closes the circuit on success and
+    reopens it on failure.
+    """
+
+    def __init__(self, threshold: int, reset_timeout: float):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial = False
+        self._counters = {"opened": 0, "rejected": 0}
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._trial or time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def check(self):
+        if self._opened_at is None:
+            return
+        remaining = self._opened_at + self.reset_timeout - time.monotonic()
+        if remaining > 0 or self._trial:
+            self._counters["rejected"] += 1
+            raise CircuitOpenError(max(remaining, 0))
+        self._trial = True
+
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    def record_failure(self):
+        self._failures += 1
+        if self._trial or (self._opened_at is None and self._failures >= self.threshold):
+            self._opened_at = time.monotonic()
+            self._counters["opened"] += 1
+        self._trial = False
+
+    def abandon(self):
+        """Forget a call that ended without an outcome (e.g. cancelled)."""
+        self._trial = False
+
+    def stats(self) -> dict:
+        return {**self._counters, "state": self.state, "failures": self._failures}
+
+
+class Transport:
+    """Sends backend requests with per-tool timeouts, retries and a breaker.
+
+    Only idempotent requests are retried: after connection errors, timeouts
+    and 502-504 responses, with jittered exponential backoff. Responses
+    below 500 count as successes for the breaker.
+    """
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        timeout: float,
+        tool_timeouts: dict[str, float],
+        connect_timeout: float,
+        pool_timeout: float,
+        retries: int,
+        backoff: float,
+    ):
+        self.breaker = breaker
+        self.timeout = timeout
+        self.tool_timeouts = tool_timeouts
+        self.connect_timeout = connect_timeout
+        self.pool_timeout = pool_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._counters = {"requests": 0, "retries": 0, "failures": 0}
+
+    def timeout_for(self, tool: str) -> httpx.Timeout:
+        return httpx.Timeout(
+            self.tool_timeouts.get(tool, self.timeout),
+            connect=self.connect_timeout,
+            pool=self.pool_timeout,
+        )
+
+    async def request(
+        self,
+        client: httpx.AsyncClient,
+        tool: str,
+        method: str,
+        url: str,
+        idempotent: bool,
+        **kwargs,
+    ) -> httpx.Response:
+        send = getattr(client, method.lower())
+        timeout = self.timeout_for(tool)
+        attempts = 1 + (self.retries if idempotent else 0)
+        for attempt in range(attempts):
+            if attempt > 0:
+                self._counters["retries"] += 1
+                delay = min(MAX_BACKOFF, self.backoff * 2 ** (attempt - 1))
+                await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+            self.breaker.check()
+            self._counters["requests"] += 1
+            try:
+                response = await send(url, timeout=timeout, **kwargs)
+            except httpx.TransportError:
+                self._counters["failures"] += 1
+                self.breaker.record_failure()
+                if attempt == attempts - 1:
+                    raise
+                continue
+            except BaseException:
+                self.breaker.abandon()
+                raise
+            if response.status_code < 500:
+                self.breaker.record_success()
+                return response
+            self._counters["failures"] += 1
+            self.breaker.record_failure()
+            if response.status_code not in RETRY_STATUSES or attempt == attempts - 1:
+                return response
+        raise AssertionError("unreachable")
+
+    def stats(self) -> dict:
+        return {**self._counters, "breaker": self.breaker.stats()}
+
+
+class SharedClient:
+    """One AsyncClient for all sessions, closed when the last one ends.
+
+    The MCP lifespan runs once per session in streamable-http mode, so a
+    client per lifespan would give every session its own connection pool.
+    """
+
+    def __init__(self, factory: Callable[[], httpx.AsyncClient]):
+        self._factory = factory
+        self._client: httpx.AsyncClient | None = None
+        self._users = 0
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[httpx.AsyncClient]:
+        if self._client is None:
+            self._client = self._factory()
+        self._users += 1
+        try:
+            yield self._client
+        finally:
+            self._users -= 1
+            if self._users == 0:
+                client, self._client = self._client, None
+                await client.aclose()
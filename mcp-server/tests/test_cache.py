@@ -0,0 +1,87 @@
+import httpx
+
+from mnemosyne_mcp import cache as cache_module
+from mnemosyne_mcp.cache import ResultCache, cache_key
+
+
+def make_response(body: str) -> httpx.Response:
+    return httpx.Response(200, text=body, request=httpx.Request("GET", "http://test"))
+
+
+def test_cache_key_ignores_argument_order():
+    assert cache_key("GET", "/api/memories", {"query": "a", "tags": "x"}) == cache_key(
+        "GET", "/api/memories", {"tags": "x", "query": "a"}
+    )
+    assert cache_key("GET", "/api/memories", {"query": "a"}) != cache_key(
+        "GET", "/api/memories", {"query": "b"}
+    )
+
+
+def test_get_returns_put_response_and_counts():
+    cache = ResultCache(max_bytes=1024, ttl=60)
+    response = make_response("hello")
+    assert cache.get("k") is None
+    cache.put("k", response, ("memories",))
+    assert cache.get("k") is response
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+    assert stats["bytes"] == len("k") + len("hello")
+
+
+def test_expired_entries_are_dropped(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = ResultCache(max_bytes=1024, ttl=10)
+    cache.put("k", make_response("hello"), ())
+    now[0] += 11
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["bytes"] == 0
+
+
+def test_evicts_least_recently_used_to_stay_within_bytes():
+    cache = ResultCache(max_bytes=25, ttl=60)
+    cache.put("a", make_response("x" * 9), ())
+    cache.put("b", make_response("x" * 9), ())
+    cache.get("a")
+    cache.put("c", make_response("x" * 9), ())
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 25
+
+
+def test_skips_entries_larger_than_the_cache():
+    cache = ResultCache(max_bytes=10, ttl=60)
+    cache.put("k", make_response("x" * 20), ())
+    assert cache.stats()["size"] == 0
+
+
+def test_invalidate_drops_entries_in_any_given_scope():
+    cache = ResultCache(max_bytes=1024, ttl=60)
+    cache.put("m", make_response("m"), ("memories",))
+    cache.put("s", make_response("s"), ("conversations",))
+    cache.put("c1", make_response("c1"), ("conversation:1",))
+    cache.put("c2", make_response("c2"), ("conversation:2",))
+    cache.invalidate("conversations", "conversation:1")
+    assert cache.get("m") is not None
+    assert cache.get("s") is None
+    assert cache.get("c1") is None
+    assert cache.get("c2") is not None
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_put_skips_responses_fetched_across_an_invalidation():
+    cache = ResultCache(max_bytes=1024, ttl=60)
+    generation = cache.generation(("memories",))
+    cache.invalidate("memories")
+    cache.put("m", make_response("stale"), ("memories",), generation)
+    assert cache.get("m") is None
+
+    generation = cache.generation(("memories",))
+    cache.invalidate("conversations")
+    cache.put("m", make_response("fresh"), ("memories",), generation)
+    assert cache.get("m") is not None
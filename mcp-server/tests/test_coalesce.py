@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from mnemosyne_mcp.coalesce import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_with_the_same_key_share_one_call():
+    flights = SingleFlight()
+    release = asyncio.Event()
+    calls = 0
+
+    async def fn():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "result"
+
+    waiters = [asyncio.create_task(flights.run("k", fn)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert flights.stats()["inFlight"] == 1
+    release.set()
+    assert await asyncio.gather(*waiters) == ["result"] * 3
+    assert calls == 1
+    assert flights.stats() == {"calls": 3, "coalesced": 2, "inFlight": 0}
+
+
+@pytest.mark.asyncio
+async def test_different_keys_and_later_calls_are_not_coalesced():
+    flights = SingleFlight()
+    calls = []
+
+    async def fn(key):
+        calls.append(key)
+        return key
+
+    assert await asyncio.gather(flights.run("a", lambda: fn("a")), flights.run("b", lambda: fn("b"))) == ["a", "b"]
+    assert await flights.run("a", lambda: fn("a")) == "a"
+    assert calls == ["a", "b", "a"]
+    assert flights.stats()["coalesced"] == 0
+
+
+@pytest.mark.asyncio
+async def test_exceptions_reach_every_caller():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def fn():
+        await release.wait()
+        raise RuntimeError("backend down")
+
+    waiters = [asyncio.create_task(flights.run("k", fn)) for _ in range(2)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flights.stats()["inFlight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_shared_call():
+    flights = SingleFlight()
+    release = asyncio.Event()
+
+    async def fn():
+        await release.wait()
+        return "result"
+
+    first = asyncio.create_task(flights.run("k", fn))
+    second = asyncio.create_task(flights.run("k", fn))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+    assert await second == "result"
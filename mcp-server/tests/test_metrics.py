@@ -0,0 +1,48 @@
+from mnemosyne_mcp.metrics import Registry
+
+
+def test_renders_counters_and_gauges_with_labels():
+    registry = Registry()
+    calls = registry.counter("calls_total", "Calls.", ("tool",))
+    in_flight = registry.gauge("in_flight", "In flight.")
+    calls.inc(tool="fetch")
+    calls.inc(2, tool="fetch")
+    calls.inc(tool='say "hi"')
+    in_flight.inc()
+    in_flight.dec()
+
+    assert registry.render() == (
+        "# HELP calls_total Calls.\n"
+        "# TYPE calls_total counter\n"
+        'calls_total{tool="fetch"} 3\n'
+        'calls_total{tool="say \\"hi\\""} 1\n'
+        "# HELP in_flight In flight.\n"
+        "# TYPE in_flight gauge\n"
+        "in_flight 0\n"
+    )
+
+
+def test_renders_cumulative_histogram_buckets():
+    registry = Registry()
+    latency = registry.histogram("latency_seconds", "Latency.", ("tool",), buckets=(0.1, 1))
+    latency.observe(0.05, tool="t")
+    latency.observe(0.5, tool="t")
+    latency.observe(3, tool="t")
+
+    lines = registry.render().splitlines()
+    assert lines[2:] == [
+        'latency_seconds_bucket{tool="t",le="0.1"} 1',
+        'latency_seconds_bucket{tool="t",le="1"} 2',
+        'latency_seconds_bucket{tool="t",le="+Inf"} 3',
+        'latency_seconds_sum{tool="t"} 3.55',
+        'latency_seconds_count{tool="t"} 3',
+    ]
+    assert latency.count(tool="t") == 3
+
+
+def test_collected_metrics_are_read_at_render_time():
+    registry = Registry()
+    value = [1]
+    registry.collect("size", "Size.", "gauge", lambda: [({}, value[0])])
+    value[0] = 5
+    assert "size 5" in registry.render().splitlines()
@@ -1,3 +1,6 @@
+import asyncio
+from contextlib import contextmanager
+
 import pytest
 import httpx
 from unittest.mock import AsyncMock, MagicMock
@@ -7,8 +10,16 @@ from mnemosyne_mcp.server import (
     fetch_memories,
     store_conversation,
     search_conversations,
+    multi_search_conversations,
     get_conversation,
+    get_conversations,
+    store_memories,
 )
+from mnemosyne_mcp import server
+from mnemosyne_mcp.cache import ResultCache
+from mnemosyne_mcp.coalesce import SingleFlight
+from mnemosyne_mcp.transport import CircuitBreaker, Transport
+from mcp.server.fastmcp.exceptions import ToolError
 
 
 def make_response(status_code: int, json_data: dict) -> httpx.Response:
@@ -37,6 +48,13 @@ def ctx(client):
     return make_ctx(client)
 
 
+@pytest.fixture
+def cached_ctx(client):
+    ctx = make_ctx(client)
+    ctx.request_context.lifespan_context["cache"] = ResultCache(max_bytes=1024 * 1024, ttl=60)
+    return ctx
+
+
 @pytest.mark.asyncio
 async def test_store_memory_success(client, ctx):
     client.post.return_value = make_response(
@@ -127,6 +145,37 @@ async def test_fetch_memories_with_tags(client, ctx):
     )
 
 
+@pytest.mark.asyncio
+async def test_fetch_memories_paged(client, ctx):
+    client.get.return_value = make_response(
+        200,
+        {
+            "memories": [{"id": "m1", "content": "Older memory", "tags": []}],
+            "total": 1,
+            "nextCursor": "next-page",
+        },
+    )
+
+    result = await fetch_memories(page_size=1, cursor="this-page", ctx=ctx)
+    assert 'cursor="next-page"' in result
+    client.get.assert_called_once_with(
+        "/api/memories", params={"limit": "1", "cursor": "this-page"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_fetch_memories_with_mode(client, ctx):
+    client.get.return_value = make_response(
+        200,
+        {"memories": [], "total": 0},
+    )
+
+    await fetch_memories(query="Acme Corp", mode="hybrid", ctx=ctx)
+    client.get.assert_called_once_with(
+        "/api/memories", params={"query": "Acme Corp", "mode": "hybrid"}
+    )
+
+
 @pytest.mark.asyncio
 async def test_fetch_memories_no_params(client, ctx):
     client.get.return_value = make_response(
@@ -261,9 +310,37 @@ async def test_search_conversations_success(client, ctx):
     assert "0.850" in result
     assert "conv-1" in result
     client.get.assert_called_once_with(
-        "/api/conversations", params={"query": "programming"}
+        "/api/conversations", params={"view": "summary", "query": "programming"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_conversations_shows_best_match(client, ctx):
+    client.get.return_value = make_response(
+        200,
+        {
+            "conversations": [
+                {
+                    "id": "conv-1",
+                    "title": "Key rotation",
+                    "tags": [],
+                    "score": 0.91,
+                    "messageCount": 240,
+                    "bestMatch": {
+                        "position": 17,
+                        "role": "user",
+                        "snippet": "How do I rotate the signing keys?",
+                    },
+                },
+            ],
+            "total": 1,
+        },
     )
 
+    result = await search_conversations(query="rotate keys", ctx=ctx)
+    assert "240 messages" in result
+    assert "best match (#17, user): How do I rotate the signing keys?" in result
+
 
 @pytest.mark.asyncio
 async def test_search_conversations_empty(client, ctx):
@@ -284,10 +361,76 @@ async def test_search_conversations_with_tags(client, ctx):
     result = await search_conversations(tags=["work", "project"], ctx=ctx)
     assert "no conversations found" in result.lower()
     client.get.assert_called_once_with(
-        "/api/conversations", params={"tags": "work,project"}
+        "/api/conversations", params={"view": "summary", "tags": "work,project"}
     )
 
 
+@pytest.mark.asyncio
+async def test_search_conversations_with_mode(client, ctx):
+    client.get.return_value = make_response(
+        200, {"conversations": [], "total": 0}
+    )
+
+    await search_conversations(query="Acme Corp", mode="text", ctx=ctx)
+    client.get.assert_called_once_with(
+        "/api/conversations", params={"view": "summary", "query": "Acme Corp", "mode": "text"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_conversations_with_diversity(client, ctx):
+    client.get.return_value = make_response(
+        200, {"conversations": [], "total": 0}
+    )
+
+    await search_conversations(query="deploys", limit=5, diversity=0.5, ctx=ctx)
+    client.get.assert_called_once_with(
+        "/api/conversations",
+        params={
+            "view": "summary",
+            "query": "deploys",
+            "limit": "5",
+            "diversity": "0.5",
+        },
+    )
+
+
+# --- multi_search_conversations tests ---
+
+
+@pytest.mark.asyncio
+async def test_multi_search_conversations_success(client, ctx):
+    client.post.return_value = make_response(
+        200,
+        {
+            "conversations": [
+                {"id": "c1", "title": "Rollback plan", "tags": [], "score": 0.0325},
+            ],
+            "total": 1,
+        },
+    )
+
+    result = await multi_search_conversations(
+        queries=["deploy", "rollback"], limit=5, ctx=ctx
+    )
+
+    assert "Found 1 conversations" in result
+    assert "Rollback plan" in result
+    client.post.assert_called_once_with(
+        "/api/conversations/search",
+        json={"queries": ["deploy", "rollback"], "view": "summary", "limit": 5},
+    )
+
+
+@pytest.mark.asyncio
+async def test_multi_search_conversations_error(client, ctx):
+    client.post.return_value = make_response(400, {"error": "bad"})
+
+    result = await multi_search_conversations(queries=[], ctx=ctx)
+
+    assert "Error searching conversations" in result
+
+
 # --- get_conversation tests ---
 
 
@@ -310,7 +453,33 @@ async def test_get_conversation_success(client, ctx):
     assert "Test Chat" in result
     assert "**user**: What is Python?" in result
     assert "**assistant**: Python is a programming language." in result
-    client.get.assert_called_once_with("/api/conversations/conv-1")
+    client.get.assert_called_once_with(
+        "/api/conversations/conv-1", params={"limit": "100"}
+    )
+    assert "cursor=" not in result
+
+
+@pytest.mark.asyncio
+async def test_get_conversation_next_page(client, ctx):
+    client.get.return_value = make_response(
+        200,
+        {
+            "id": "conv-1",
+            "title": "Long Chat",
+            "tags": [],
+            "messages": [{"role": "user", "content": "Message 20"}],
+            "nextCursor": "eyJwb3NpdGlvbiI6MjB9",
+        },
+    )
+
+    result = await get_conversation(
+        id="conv-1", page_size=1, cursor="eyJwb3NpdGlvbiI6MTl9", ctx=ctx
+    )
+    assert 'cursor="eyJwb3NpdGlvbiI6MjB9"' in result
+    client.get.assert_called_once_with(
+        "/api/conversations/conv-1",
+        params={"limit": "1", "cursor": "eyJwb3NpdGlvbiI6MTl9"},
+    )
 
 
 @pytest.mark.asyncio
@@ -321,3 +490,266 @@ async def test_get_conversation_not_found(client, ctx):
 
     result = await get_conversation(id="nonexistent", ctx=ctx)
     assert "not found" in result.lower()
+
+
+MEMORIES = {
+    "memories": [{"id": "m1", "content": "Likes tea", "tags": []}],
+    "total": 1,
+    "nextCursor": None,
+}
+CONVERSATION = {
+    "id": "conv-1",
+    "title": "Test Chat",
+    "tags": [],
+    "messages": [{"role": "user", "content": "Hi"}],
+}
+
+
+@pytest.mark.asyncio
+async def test_repeated_lookups_are_served_from_cache(client, cached_ctx):
+    client.get.return_value = make_response(200, MEMORIES)
+
+    first = await fetch_memories(query="tea", ctx=cached_ctx)
+    second = await fetch_memories(query="tea", ctx=cached_ctx)
+    assert first == second
+    client.get.assert_called_once()
+
+    await fetch_memories(query="coffee", ctx=cached_ctx)
+    assert client.get.call_count == 2
+    stats = cached_ctx.request_context.lifespan_context["cache"].stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached(client, cached_ctx):
+    client.get.return_value = make_response(404, {"error": "conversation not found"})
+
+    await get_conversation(id="conv-1", ctx=cached_ctx)
+    await get_conversation(id="conv-1", ctx=cached_ctx)
+    assert client.get.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_store_memory_invalidates_cached_memories(client, cached_ctx):
+    client.get.return_value = make_response(200, MEMORIES)
+    client.post.return_value = make_response(201, {"id": "m2", "content": "x", "tags": []})
+
+    await fetch_memories(ctx=cached_ctx)
+    await store_memory(content="Likes coffee", ctx=cached_ctx)
+    await fetch_memories(ctx=cached_ctx)
+    assert client.get.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_read_in_flight_during_a_write_is_not_cached(client, cached_ctx):
+    release = asyncio.Event()
+
+    async def slow_get(url, params):
+        await release.wait()
+        return make_response(200, MEMORIES)
+
+    client.get.side_effect = slow_get
+    client.post.return_value = make_response(201, {"id": "m2", "content": "x", "tags": []})
+
+    read = asyncio.create_task(fetch_memories(ctx=cached_ctx))
+    await asyncio.sleep(0)
+    await store_memory(content="Likes coffee", ctx=cached_ctx)
+    release.set()
+    await read
+
+    await fetch_memories(ctx=cached_ctx)
+    assert client.get.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_store_conversation_invalidates_searches_and_that_conversation(client, cached_ctx):
+    client.get.side_effect = lambda url, params: make_response(
+        200,
+        CONVERSATION
+        if url.startswith("/api/conversations/")
+        else {"conversations": [], "total": 0, "nextCursor": None},
+    )
+    client.post.return_value = make_response(200, {**CONVERSATION, "id": "conv-2"})
+
+    await search_conversations(query="hi", ctx=cached_ctx)
+    await get_conversation(id="conv-1", ctx=cached_ctx)
+    await store_conversation(source_id="src-2", ctx=cached_ctx)
+
+    await get_conversation(id="conv-1", ctx=cached_ctx)
+    assert client.get.call_count == 2
+    await search_conversations(query="hi", ctx=cached_ctx)
+    assert client.get.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_searches_share_one_backend_request(client, ctx):
+    flights = SingleFlight()
+    ctx.request_context.lifespan_context["flights"] = flights
+    release = asyncio.Event()
+
+    async def slow_get(url, params):
+        await release.wait()
+        return make_response(200, {"conversations": [], "total": 0, "nextCursor": None})
+
+    client.get.side_effect = slow_get
+    searches = [asyncio.create_task(search_conversations(query="hi", ctx=ctx)) for _ in range(3)]
+    other = asyncio.create_task(search_conversations(query="bye", ctx=ctx))
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(*searches, other)
+    assert results == ["No conversations found."] * 4
+    assert client.get.call_count == 2
+    assert flights.stats()["coalesced"] == 2
+
+
+@pytest.mark.asyncio
+async def test_reads_after_a_write_do_not_join_an_earlier_flight(client, cached_ctx):
+    cached_ctx.request_context.lifespan_context["flights"] = SingleFlight()
+    releases = [asyncio.Event(), asyncio.Event()]
+
+    async def slow_get(url, params):
+        await releases[client.get.call_count - 1].wait()
+        return make_response(200, MEMORIES)
+
+    client.get.side_effect = slow_get
+    client.post.return_value = make_response(201, {"id": "m2", "content": "x", "tags": []})
+
+    before = asyncio.create_task(fetch_memories(ctx=cached_ctx))
+    await asyncio.sleep(0)
+    await store_memory(content="Likes coffee", ctx=cached_ctx)
+    after = asyncio.create_task(fetch_memories(ctx=cached_ctx))
+    await asyncio.sleep(0)
+    for release in releases:
+        release.set()
+    await asyncio.gather(before, after)
+
+    assert client.get.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_store_memories_reports_each_item(client, ctx):
+    client.post.return_value = make_response(
+        200,
+        {
+            "results": [{"id": "m1"}, {"error": "content is required and must be a non-empty string"}],
+            "total": 2,
+            "succeeded": 1,
+            "failed": 1,
+        },
+    )
+
+    items = [{"content": "Likes tea", "tags": ["prefs"]}, {"content": ""}]
+    result = await store_memories(items=items, ctx=ctx)
+    assert "Stored 1 of 2 memories" in result
+    assert "1. Stored (id: m1)" in result
+    assert "2. Error: content is required" in result
+    client.post.assert_called_once_with("/api/memories/batch", json={"memories": items})
+
+
+@pytest.mark.asyncio
+async def test_store_memories_invalidates_cached_memories(client, cached_ctx):
+    client.get.return_value = make_response(200, MEMORIES)
+    client.post.return_value = make_response(
+        200, {"results": [{"id": "m2"}], "total": 1, "succeeded": 1, "failed": 0}
+    )
+
+    await fetch_memories(ctx=cached_ctx)
+    await store_memories(items=[{"content": "Likes coffee"}], ctx=cached_ctx)
+    await fetch_memories(ctx=cached_ctx)
+    assert client.get.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_get_conversations_renders_each_result(client, ctx):
+    client.post.return_value = make_response(
+        200,
+        {
+            "results": [
+                {"id": "conv-1", "conversation": CONVERSATION, "nextCursor": "eyJwb3NpdGlvbiI6MH0"},
+                {"id": "conv-2", "error": "conversation not found"},
+            ],
+            "total": 2,
+            "succeeded": 1,
+            "failed": 1,
+        },
+    )
+
+    result = await get_conversations(ids=["conv-1", "conv-2"], page_size=1, ctx=ctx)
+    assert "## conv-1\n# Test Chat" in result
+    assert "**user**: Hi" in result
+    assert 'cursor="eyJwb3NpdGlvbiI6MH0"' in result
+    assert "## conv-2\nError: conversation not found" in result
+    client.post.assert_called_once_with(
+        "/api/conversations/by-ids", json={"ids": ["conv-1", "conv-2"], "limit": 1}
+    )
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_fails_tools_fast(client, ctx):
+    breaker = CircuitBreaker(threshold=1, reset_timeout=30)
+    ctx.request_context.lifespan_context["transport"] = Transport(
+        breaker,
+        timeout=10,
+        tool_timeouts={},
+        connect_timeout=5,
+        pool_timeout=5,
+        retries=0,
+        backoff=0,
+    )
+    client.post.side_effect = httpx.ConnectError("refused")
+
+    with pytest.raises(ToolError, match="unreachable"):
+        await store_memory(content="x", ctx=ctx)
+    with pytest.raises(ToolError, match="unavailable"):
+        await fetch_memories(ctx=ctx)
+    client.get.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_are_measured(client, ctx):
+    client.get.return_value = make_response(200, MEMORIES)
+    calls = server._tool_calls.value(tool="fetch_memories", outcome="ok")
+    requests = server._backend_requests.value(tool="fetch_memories", status="200")
+
+    result = await fetch_memories(ctx=ctx)
+    assert server._tool_calls.value(tool="fetch_memories", outcome="ok") == calls + 1
+    assert server._backend_requests.value(tool="fetch_memories", status="200") == requests + 1
+    assert server._tool_in_flight.value(tool="fetch_memories") == 0
+    assert server._response_bytes.count(tool="fetch_memories") >= 1
+    assert len(result) > 0
+
+
+@pytest.mark.asyncio
+async def test_trace_context_is_propagated_to_the_backend(client, ctx, monkeypatch):
+    traceparent = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+    monkeypatch.setattr(server, "trace_headers", lambda: {"traceparent": traceparent})
+    client.get.return_value = make_response(200, MEMORIES)
+
+    await fetch_memories(query="tea", ctx=ctx)
+    client.get.assert_called_once_with(
+        "/api/memories", params={"query": "tea"}, headers={"traceparent": traceparent}
+    )
+
+
+@pytest.mark.asyncio
+async def test_trace_context_names_the_backend_span(client, ctx, monkeypatch):
+    current = []
+
+    @contextmanager
+    def fake_span(name, **attributes):
+        current.append(name)
+        try:
+            yield
+        finally:
+            current.pop()
+
+    monkeypatch.setattr(server, "span", fake_span)
+    monkeypatch.setattr(server, "trace_headers", lambda: {"traceparent": current[-1]})
+    client.post.return_value = make_response(201, {})
+
+    await server._request(ctx, "store_memory", "POST", "/api/memories", headers={"X-Test": "1"})
+    client.post.assert_called_once_with(
+        "/api/memories", headers={"X-Test": "1", "traceparent": "backend POST"}
+    )
@@ -0,0 +1,134 @@
+import httpx
+import pytest
+from unittest.mock import AsyncMock
+
+from mnemosyne_mcp import transport as transport_module
+from mnemosyne_mcp.transport import CircuitBreaker, CircuitOpenError, SharedClient, Transport
+
+
+def make_response(status_code: int) -> httpx.Response:
+    return httpx.Response(status_code, json={}, request=httpx.Request("GET", "http://test"))
+
+
+def make_transport(breaker: CircuitBreaker | None = None, retries: int = 2) -> Transport:
+    return Transport(
+        breaker or CircuitBreaker(threshold=5, reset_timeout=30),
+        timeout=10,
+        tool_timeouts={"search_conversations": 30},
+        connect_timeout=5,
+        pool_timeout=5,
+        retries=retries,
+        backoff=0.2,
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(transport_module.asyncio, "sleep", AsyncMock())
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(transport_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def client():
+    return AsyncMock(spec=httpx.AsyncClient)
+
+
+def test_breaker_opens_after_threshold_and_lets_one_trial_through(clock):
+    breaker = CircuitBreaker(threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    breaker.check()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+
+    clock[0] += 30
+    breaker.check()
+    assert breaker.state == "half-open"
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.stats() == {"opened": 1, "rejected": 2, "state": "closed", "failures": 0}
+
+
+def test_breaker_reopens_when_the_trial_fails(clock):
+    breaker = CircuitBreaker(threshold=1, reset_timeout=30)
+    breaker.record_failure()
+    clock[0] += 30
+    breaker.check()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+@pytest.mark.asyncio
+async def test_uses_the_tool_timeout(client):
+    client.get.return_value = make_response(200)
+    await make_transport().request(client, "search_conversations", "GET", "/api/conversations", True, params={})
+    client.get.assert_called_once_with(
+        "/api/conversations", timeout=httpx.Timeout(30, connect=5, pool=5), params={}
+    )
+
+
+@pytest.mark.asyncio
+async def test_retries_idempotent_requests_on_transient_failures(client):
+    client.get.side_effect = [httpx.ConnectError("refused"), make_response(503), make_response(200)]
+    transport = make_transport()
+    response = await transport.request(client, "fetch_memories", "GET", "/api/memories", True)
+    assert response.status_code == 200
+    assert client.get.call_count == 3
+    assert transport.stats()["retries"] == 2
+    assert transport.breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_does_not_retry_writes_or_500s(client):
+    transport = make_transport()
+    client.post.side_effect = httpx.ReadTimeout("slow")
+    with pytest.raises(httpx.ReadTimeout):
+        await transport.request(client, "store_memory", "POST", "/api/memories", False, json={})
+    assert client.post.call_count == 1
+
+    client.get.return_value = make_response(500)
+    response = await transport.request(client, "fetch_memories", "GET", "/api/memories", True)
+    assert response.status_code == 500
+    assert client.get.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_fails_fast_while_the_circuit_is_open(client):
+    transport = make_transport(CircuitBreaker(threshold=2, reset_timeout=30), retries=0)
+    client.get.side_effect = httpx.ConnectError("refused")
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectError):
+            await transport.request(client, "fetch_memories", "GET", "/api/memories", True)
+    with pytest.raises(CircuitOpenError):
+        await transport.request(client, "fetch_memories", "GET", "/api/memories", True)
+    assert client.get.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_shared_client_is_closed_by_the_last_user():
+    created = []
+
+    def factory():
+        client = AsyncMock(spec=httpx.AsyncClient)
+        created.append(client)
+        return client
+
+    shared = SharedClient(factory)
+    async with shared.acquire() as first:
+        async with shared.acquire() as second:
+            assert first is second
+        first.aclose.assert_not_called()
+    first.aclose.assert_called_once()
+
+    async with shared.acquire() as third:
+        assert third is not first
+    assert len(created) == 2
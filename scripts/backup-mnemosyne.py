@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""Export a Mnemosyne store to NDJSON and import it into another instance.
+
+The export streams GET /api/export to a file, embeddings included, so the
+import can restore conversations (through the bulk endpoint) and memories
+(through the batch endpoint, under their original ids and timestamps)
+without re-embedding anything. Conversations without a sourceId are
+imported under their original id as sourceId.
+
+Usage:
+  uv run backup-mnemosyne.py export --backend-url http://localhost:3100 --output backup.ndjson
+  uv run backup-mnemosyne.py import --backend-url http://localhost:3200 --input backup.ndjson
+  uv run backup-mnemosyne.py export --backend-url http://old:3100 --output - \\
+    | uv run backup-mnemosyne.py import --backend-url http://new:3100 --input -
+"""
+import argparse
+import contextlib
+import json
+import random
+import sys
+import time
+from collections.abc import Iterable, Iterator
+
+import httpx
+
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+RETRYABLE_STATUS = {502, 503}  # the backend did not process the request
+MAX_BATCH_SIZE = 1000  # backend limit for /api/conversations/bulk and /api/memories/batch
+MAX_BATCH_BYTES = 32 * 1024 * 1024  # well under the backend's 64 MB batch body limit
+
+
+def log(message: str):
+    # stdout may carry the export stream
+    print(message, file=sys.stderr)
+
+
+@contextlib.contextmanager
+def open_stream(path: str, mode: str):
+    if path == "-":
+        yield sys.stdout if "w" in mode else sys.stdin
+    else:
+        with open(path, mode, encoding="utf-8") as f:
+            yield f
+
+
+def export(backend_url: str, output: str, embeddings: bool):
+    """Stream the backend's export to `output` line by line."""
+    counts: dict[str, int] = {}
+    params = {"embeddings": "true" if embeddings else "false"}
+    with httpx.Client(base_url=backend_url, timeout=httpx.Timeout(60.0, read=None)) as client:
+        with client.stream("GET", "/api/export", params=params) as resp:
+            if resp.status_code != 200:
+                resp.read()
+                log(f"Export failed: {resp.status_code} {resp.text}")
+                sys.exit(1)
+            with open_stream(output, "w") as out:
+                for line in resp.iter_lines():
+                    if not line:
+                        continue
+                    out.write(line + "\n")
+                    kind = json.loads(line)["type"]
+                    counts[kind] = counts.get(kind, 0) + 1
+    log("Exported " + ", ".join(f"{n} {kind}s" for kind, n in counts.items()))
+
+
+def read_records(path: str) -> Iterator[dict]:
+    with open_stream(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def group_records(records: Iterable[dict]) -> Iterator[tuple[str, dict]]:
+    """Yield ("conversation", bulk payload) and ("memory", record) items.
+
+    Relies on the export order: each conversation is followed by its messages.
+    """
+    current: dict | None = None
+    for record in records:
+        kind = record["type"]
+        if kind == "message":
+            if current is None or record["conversationId"] != current["id"]:
+                raise ValueError(f"message {record['id']} does not follow its conversation")
+            message = {"role": record["role"], "content": record["content"]}
+            if "embedding" in record:
+                message["embedding"] = record["embedding"]
+            current["messages"].append(message)
+            continue
+        if current is not None:
+            yield "conversation", build_payload(current)
+            current = None
+        if kind == "conversation":
+            current = {**record, "messages": []}
+        elif kind == "memory":
+            yield "memory", record
+    if current is not None:
+        yield "conversation", build_payload(current)
+
+
+def build_payload(conv: dict) -> dict:
+    payload = {
+        "sourceId": conv.get("sourceId") or conv["id"],
+        "title": conv.get("title", ""),
+        "source": conv.get("source", ""),
+        "tags": conv.get("tags", []),
+    }
+    if conv.get("userId"):
+        payload["userId"] = conv["userId"]
+    if conv["messages"]:
+        payload["messages"] = conv["messages"]
+    return payload
+
+
+def post_with_backoff(client: httpx.Client, url: str, **kwargs) -> httpx.Response:
+    """POST, retrying only failures where the backend cannot have processed
+    the request (connection errors, 502/503).
+
+    Imports are not idempotent, so other errors such as read timeouts are
+    raised rather than retried: the request may already have been stored.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt > 0:
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1))
+            time.sleep(delay * random.uniform(0.5, 1.5))
+        try:
+            resp = client.post(url, **kwargs)
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            if attempt == MAX_RETRIES:
+                raise
+            continue
+        if resp.status_code not in RETRYABLE_STATUS or attempt == MAX_RETRIES:
+            return resp
+    raise AssertionError("unreachable")
+
+
+class RequestBatch:
+    """Encoded items for one batch request, bounded by count and by bytes."""
+
+    def __init__(self, max_items: int, max_bytes: int = MAX_BATCH_BYTES):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.lines: list[str] = []
+        self.bytes = 0
+
+    def fits(self, line: str) -> bool:
+        # An item larger than max_bytes on its own is still sent, alone.
+        if not self.lines:
+            return True
+        return len(self.lines) < self.max_items and self.bytes + len(line) + 1 <= self.max_bytes
+
+    def add(self, line: str):
+        self.lines.append(line)
+        self.bytes += len(line) + 1
+
+    def take(self) -> list[str]:
+        lines, self.lines, self.bytes = self.lines, [], 0
+        return lines
+
+
+def memory_payload(record: dict) -> dict:
+    """Batch item restoring an exported memory under its id and timestamps."""
+    payload = {
+        "id": record["id"],
+        "content": record["content"],
+        "tags": record.get("tags", []),
+        "createdAt": record["createdAt"],
+        "updatedAt": record["updatedAt"],
+    }
+    if "embedding" in record:
+        payload["embedding"] = record["embedding"]
+    return payload
+
+
+def import_records(backend_url: str, input_path: str, batch_size: int):
+    """Send conversations to the bulk endpoint and memories to the batch
+    endpoint, in batches of at most batch_size items and MAX_BATCH_BYTES.
+
+    Memories keep their ids, so memories already restored by an earlier,
+    interrupted run are skipped by the backend rather than duplicated.
+    """
+    conversations = memories = failed = 0
+    conversation_batch = RequestBatch(batch_size)
+    memory_batch = RequestBatch(batch_size)
+
+    # What the request in flight would store, for the abort message.
+    sending = ""
+
+    with httpx.Client(base_url=backend_url, timeout=300.0) as client:
+
+        def send_conversations(lines: list[str]):
+            nonlocal conversations, failed, sending
+            sending = f"a batch of {len(lines)} conversations"
+            resp = post_with_backoff(
+                client,
+                "/api/conversations/bulk",
+                content="".join(line + "\n" for line in lines).encode(),
+                headers={"Content-Type": "application/x-ndjson"},
+            )
+            if resp.status_code != 200:
+                log(f"  Batch failed: {resp.status_code} {resp.text}")
+                failed += len(lines)
+                return
+            data = resp.json()
+            conversations += data["succeeded"]
+            failed += data["failed"]
+            for result in data["results"]:
+                if result.get("error"):
+                    log(f"  FAIL {result['sourceId']}: {result['error']}")
+
+        def send_memories(lines: list[str]):
+            nonlocal memories, failed, sending
+            sending = f"a batch of {len(lines)} memories"
+            resp = post_with_backoff(
+                client,
+                "/api/memories/batch",
+                content=('{"memories":[' + ",".join(lines) + "]}").encode(),
+                headers={"Content-Type": "application/json"},
+            )
+            if resp.status_code != 200:
+                log(f"  Memory batch failed: {resp.status_code} {resp.text}")
+                failed += len(lines)
+                return
+            data = resp.json()
+            memories += data["succeeded"]
+            failed += data["failed"]
+            for line, result in zip(lines, data["results"]):
+                if result.get("error"):
+                    log(f"  FAIL memory {json.loads(line)['id']}: {result['error']}")
+
+        try:
+            for kind, item in group_records(read_records(input_path)):
+                if kind == "conversation":
+                    batch, send, line = conversation_batch, send_conversations, json.dumps(item)
+                else:
+                    batch, send, line = memory_batch, send_memories, json.dumps(memory_payload(item))
+                if not batch.fits(line):
+                    send(batch.take())
+                batch.add(line)
+            for batch, send in ((conversation_batch, send_conversations), (memory_batch, send_memories)):
+                if batch.lines:
+                    send(batch.take())
+        except httpx.TransportError as e:
+            log(f"Imported {conversations} conversations and {memories} memories ({failed} failed)")
+            log(
+                f"Import aborted: sending {sending} failed with {type(e).__name__}. "
+                "It may have been stored. Memories can be imported again safely; "
+                "conversations already stored would be appended again, so check "
+                "the target before re-importing them."
+            )
+            sys.exit(1)
+
+    log(f"Imported {conversations} conversations and {memories} memories ({failed} failed)")
+    if failed:
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import a Mnemosyne store as NDJSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Stream the store to an NDJSON file")
+    export_parser.add_argument("--backend-url", required=True, help="Mnemosyne backend URL (e.g. http://localhost:3100)")
+    export_parser.add_argument("--output", required=True, help="Output file, or - for stdout")
+    export_parser.add_argument("--no-embeddings", action="store_true", help="Leave out embeddings; the import then re-embeds")
+
+    import_parser = commands.add_parser("import", help="Load an NDJSON export into a backend")
+    import_parser.add_argument("--backend-url", required=True, help="Mnemosyne backend URL (e.g. http://localhost:3100)")
+    import_parser.add_argument("--input", required=True, help="Export file, or - for stdin")
+    import_parser.add_argument("--batch-size", type=int, default=100, help="Conversations or memories per batch request (default: 100)")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export(args.backend_url, args.output, embeddings=not args.no_embeddings)
+    else:
+        if not 1 <= args.batch_size <= MAX_BATCH_SIZE:
+            parser.error(f"--batch-size must be between 1 and {MAX_BATCH_SIZE}")
+        import_records(args.backend_url, args.input, args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
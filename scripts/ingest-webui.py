@@ -4,15 +4,34 @@
 Usage:
   uv run ingest-webui.py --db ../webui.db --backend-url http://localhost:3100
   uv run ingest-webui.py --db ../webui.db --backend-url http://localhost:3100 --dry-run
+  uv run ingest-webui.py --db ../webui.db --backend-url http://localhost:3100 --concurrency 8
+  uv run ingest-webui.py --db ../webui.db --backend-url http://localhost:3100 --batch-size 100 --concurrency 4
+  uv run ingest-webui.py --db ../webui.db --backend-url http://localhost:3100 --since-checkpoint
 """
 import argparse
+import asyncio
+import hashlib
+import itertools
 import json
+import random
 import sqlite3
 import sys
 import time
+from collections.abc import Callable, Iterable, Iterator
 
 import httpx
 
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+RETRYABLE_STATUS = {502, 503}  # the backend did not process the request
+FETCH_BATCH_SIZE = 200
+MAX_BATCH_SIZE = 1000  # backend limit for /api/conversations/bulk
+REQUEST_TIMEOUT = 120.0
+# Bulk requests embed every message before committing, so their read
+# timeout grows with the batch; a timed-out batch is not retried.
+BULK_TIMEOUT_PER_CONVERSATION = 2.0
+
 
 def extract_messages(chat_json: dict) -> list[dict]:
     """Walk the message tree from root to leaf, following first child."""
@@ -56,58 +75,455 @@ def extract_tags(meta_json: dict) -> list[str]:
     return []
 
 
-def load_conversations(
-    db_path: str,
+def chat_filters(
     filter_user_id: str | None = None,
     include_shared: bool = False,
-) -> list[dict]:
-    """Load conversations from webui.db with optional user filtering."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT user_id, id, title, chat, meta, created_at FROM chat ORDER BY created_at"
-    )
-
-    conversations = []
-    skipped_shared = 0
-    for row in cursor.fetchall():
-        user_id, row_id, title, chat_str, meta_str, created_at = row
-
+) -> tuple[str, list]:
+    """Build the SQL WHERE clause for the user filters."""
+    clauses = []
+    params: list = []
+    if not include_shared:
         # Skip shared users by default
-        if not include_shared and user_id and str(user_id).startswith("shared-"):
-            skipped_shared += 1
-            continue
+        clauses.append("(user_id IS NULL OR substr(user_id, 1, 7) != 'shared-')")
+    if filter_user_id:
+        clauses.append("user_id = ?")
+        params.append(filter_user_id)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
 
-        # Filter to specific user if requested
-        if filter_user_id and user_id != filter_user_id:
-            continue
 
-        try:
-            chat = json.loads(chat_str) if chat_str else {}
-            meta = json.loads(meta_str) if meta_str else {}
-        except json.JSONDecodeError:
-            print(f"  Skipping {row_id}: invalid JSON")
-            continue
+def count_chats(
+    db_path: str,
+    filter_user_id: str | None = None,
+    include_shared: bool = False,
+    skip: Callable[[str, int | None], bool] | None = None,
+) -> tuple[int, int]:
+    """Return (matching chats, skipped shared-user chats) without loading them.
 
-        messages = extract_messages(chat)
-        if not messages:
-            continue
+    Chats for which skip(id, updated_at) is true are not counted as matching,
+    so the count is the number of chats load_conversations will fetch.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        where, params = chat_filters(filter_user_id, include_shared)
+        if skip is None:
+            matching = conn.execute(f"SELECT COUNT(*) FROM chat {where}", params).fetchone()[0]
+        else:
+            keys = conn.execute(f"SELECT id, updated_at FROM chat {where}", params)
+            matching = sum(1 for row_id, updated_at in keys if not skip(row_id, updated_at))
+        skipped_shared = 0
+        if not include_shared:
+            shared_where, shared_params = chat_filters(filter_user_id, include_shared=True)
+            shared_where += " AND " if shared_where else "WHERE "
+            shared_where += "substr(user_id, 1, 7) = 'shared-'"
+            skipped_shared = conn.execute(
+                f"SELECT COUNT(*) FROM chat {shared_where}", shared_params
+            ).fetchone()[0]
+        return matching, skipped_shared
+    finally:
+        conn.close()
 
-        tags = extract_tags(meta)
 
-        conversations.append({
-            "source_id": row_id,
-            "user_id": user_id,
-            "title": title or "Untitled",
-            "source": "open-webui",
-            "tags": tags,
-            "messages": messages,
-        })
+def load_conversations(
+    db_path: str,
+    filter_user_id: str | None = None,
+    include_shared: bool = False,
+    batch_size: int = FETCH_BATCH_SIZE,
+    skip: Callable[[str, int | None], bool] | None = None,
+) -> Iterator[dict]:
+    """Stream conversations from webui.db in created_at order.
+
+    Only the narrow (created_at, rowid) keys are sorted; the large chat
+    blobs are fetched batch_size rows at a time and parsed lazily, so
+    memory stays flat regardless of database size. Rows for which
+    skip(id, updated_at) is true are never fetched.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        where, params = chat_filters(filter_user_id, include_shared)
+        keys = conn.execute(
+            f"SELECT rowid, id, updated_at FROM chat {where} ORDER BY created_at, rowid",
+            params,
+        )
+        while batch := keys.fetchmany(batch_size):
+            rowids = [
+                rowid for rowid, row_id, updated_at in batch
+                if skip is None or not skip(row_id, updated_at)
+            ]
+            if not rowids:
+                continue
+            placeholders = ",".join("?" * len(rowids))
+            rows = conn.execute(
+                f"""SELECT user_id, id, title, chat, meta, updated_at FROM chat
+                    WHERE rowid IN ({placeholders}) ORDER BY created_at, rowid""",
+                rowids,
+            )
+            for user_id, row_id, title, chat_str, meta_str, updated_at in rows:
+                try:
+                    chat = json.loads(chat_str) if chat_str else {}
+                    meta = json.loads(meta_str) if meta_str else {}
+                except json.JSONDecodeError:
+                    print(f"  Skipping {row_id}: invalid JSON")
+                    continue
+
+                messages = extract_messages(chat)
+                if not messages:
+                    continue
+
+                yield {
+                    "source_id": row_id,
+                    "user_id": user_id,
+                    "title": title or "Untitled",
+                    "source": "open-webui",
+                    "tags": extract_tags(meta),
+                    "messages": messages,
+                    "updated_at": updated_at,
+                }
+    finally:
+        conn.close()
+
+
+def messages_hash(messages: list[dict]) -> str:
+    """Stable content hash of a message list."""
+    h = hashlib.sha256()
+    for m in messages:
+        for part in (m["role"], m["content"]):
+            data = part.encode()
+            h.update(len(data).to_bytes(8, "big"))
+            h.update(data)
+    return h.hexdigest()
+
+
+class Checkpoint:
+    """SQLite sidecar recording what has been sent for each source_id.
+
+    For every successfully ingested chat it stores the webui updated_at,
+    the number of messages sent and a hash of those messages. An
+    incremental run uses it to skip unchanged chats and to send only the
+    new message suffix of chats that grew. Each record is committed as
+    soon as its POST succeeds, so a crashed run resumes where it stopped.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS synced_chats (
+                 source_id TEXT PRIMARY KEY,
+                 updated_at INTEGER,
+                 message_count INTEGER NOT NULL,
+                 content_hash TEXT NOT NULL
+               )"""
+        )
+        self.conn.commit()
+        self.unchanged = 0
+        self.diverged = 0
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM synced_chats").fetchone()[0]
+
+    def _get(self, source_id: str) -> tuple[int | None, int, str] | None:
+        return self.conn.execute(
+            "SELECT updated_at, message_count, content_hash FROM synced_chats WHERE source_id = ?",
+            (source_id,),
+        ).fetchone()
+
+    def is_recorded(self, source_id: str, updated_at: int | None) -> bool:
+        """Whether this version of the chat was already sent."""
+        row = self._get(source_id)
+        return row is not None and updated_at is not None and row[0] == updated_at
+
+    def is_unchanged(self, source_id: str, updated_at: int | None) -> bool:
+        """is_recorded, counting the chats skipped as unchanged."""
+        if self.is_recorded(source_id, updated_at):
+            self.unchanged += 1
+            return True
+        return False
+
+    def plan(self, conversations: Iterable[dict]) -> Iterator[dict]:
+        """Trim each conversation to the messages not yet sent."""
+        for conv in conversations:
+            messages = conv["messages"]
+            row = self._get(conv["source_id"])
+            new_messages = messages
+            if row is not None:
+                _, sent_count, sent_hash = row
+                if sent_count <= len(messages) and messages_hash(messages[:sent_count]) == sent_hash:
+                    new_messages = messages[sent_count:]
+                else:
+                    # History was edited or regenerated. The backend can only
+                    # append, so sync metadata and start tracking from here.
+                    self.diverged += 1
+                    print(f"  {conv['source_id']}: history diverged from checkpoint, syncing metadata only")
+                    new_messages = []
+            yield {**conv, "messages": new_messages, "checkpoint": self.state(conv)}
+
+    @staticmethod
+    def state(conv: dict) -> tuple[int | None, int, str]:
+        messages = conv["messages"]
+        return conv["updated_at"], len(messages), messages_hash(messages)
+
+    def record(self, conv: dict):
+        """Record a sent conversation (full messages, or trimmed by plan())."""
+        updated_at, message_count, content_hash = conv.get("checkpoint") or self.state(conv)
+        self.conn.execute(
+            """INSERT INTO synced_chats (source_id, updated_at, message_count, content_hash)
+               VALUES (?, ?, ?, ?)
+               ON CONFLICT (source_id) DO UPDATE SET
+                 updated_at = excluded.updated_at,
+                 message_count = excluded.message_count,
+                 content_hash = excluded.content_hash""",
+            (conv["source_id"], updated_at, message_count, content_hash),
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class ConversationStats:
+    """Message statistics accumulated while conversations stream past."""
+
+    def __init__(self):
+        self.conversations = 0
+        self.total_messages = 0
+        self.user_messages = 0
+        self.embeddable = 0
+
+    def tally(self, conversations: Iterable[dict]) -> Iterator[dict]:
+        for conv in conversations:
+            self.conversations += 1
+            for m in conv["messages"]:
+                self.total_messages += 1
+                if m["role"] == "user":
+                    self.user_messages += 1
+                    if len(m["content"]) >= 50:
+                        self.embeddable += 1
+            yield conv
+
+    def print_summary(self):
+        print(f"Conversations: {self.conversations}")
+        print(f"Total messages: {self.total_messages}")
+        print(f"User messages: {self.user_messages}")
+        print(f"Embeddable (user, >= 50 chars): {self.embeddable}")
+
+
+def build_payload(conv: dict) -> dict:
+    payload = {
+        "title": conv["title"],
+        "source": conv["source"],
+        "sourceId": conv["source_id"],
+        "tags": conv["tags"],
+    }
+    if conv["messages"]:
+        payload["messages"] = conv["messages"]
+    if conv.get("user_id"):
+        payload["userId"] = conv["user_id"]
+    return payload
+
+
+class AdaptiveLimiter:
+    """Concurrency window bounded by max_concurrency that adapts to the backend.
+
+    The window shrinks multiplicatively when the backend signals overload
+    (5xx or timeouts) and grows by one after a full window of successes,
+    so throughput tracks backend capacity instead of hammering it.
+
+    Requests already in flight when the window shrinks report the same
+    overload, so the window is halved at most once per generation: only
+    overloads from requests started after the last decrease count.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.limit = max_concurrency
+        self.in_flight = 0
+        self._successes = 0
+        self._generation = 0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self) -> int:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+            return self._generation
+
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.max_concurrency:
+            self.limit += 1
+            self._successes = 0
+
+    def on_overload(self, generation: int):
+        """Record an overload seen by a request started in `generation`."""
+        self._successes = 0
+        if generation == self._generation and self.limit > 1:
+            self.limit = max(1, self.limit // 2)
+            self._generation += 1
+            print(f"  Backend overloaded, concurrency window -> {self.limit}")
+
+
+class ProgressReporter:
+    """Report results in input order even though requests complete out of order."""
+
+    def __init__(self, total: int | None = None, every: int = 50):
+        self.total = total
+        self.every = every
+        self.succeeded = 0
+        self.failed = 0
+        self.start = time.time()
+        self._next = 0
+        self._pending: dict[int, tuple[str, str | None]] = {}
+
+    def record(self, index: int, title: str, error: str | None):
+        self._pending[index] = (title, error)
+        while self._next in self._pending:
+            title, error = self._pending.pop(self._next)
+            self._next += 1
+            if error is None:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+                print(f"  [{self._next}] {error}: {title[:60]}")
+            if self._next % self.every == 0:
+                elapsed = time.time() - self.start
+                rate = self._next / elapsed
+                of_total = f"/{self.total}" if self.total is not None else ""
+                print(f"  Progress: {self._next}{of_total} ({rate:.1f}/s)")
+
+
+async def post_with_backoff(
+    client: httpx.AsyncClient,
+    limiter: AdaptiveLimiter,
+    url: str,
+    **kwargs,
+) -> tuple[httpx.Response | None, str | None]:
+    """POST, retrying only failures where the backend cannot have processed
+    the request. Returns (response, error).
+
+    Appends to an existing conversation are not idempotent, so read timeouts
+    and other 5xx responses are reported rather than retried: the backend may
+    already have stored the messages.
+    """
+    error = None
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt > 0:
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1))
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+        async with limiter as generation:
+            try:
+                resp = await client.post(url, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+                limiter.on_overload(generation)
+                error = f"ERROR {type(e).__name__}"
+                continue
+            except httpx.TimeoutException as e:
+                limiter.on_overload(generation)
+                return None, f"ERROR {type(e).__name__} (not retried, may have been stored)"
+        if resp.status_code in RETRYABLE_STATUS:
+            limiter.on_overload(generation)
+            error = f"FAIL {resp.status_code}"
+            continue
+        if resp.status_code >= 500:
+            limiter.on_overload(generation)
+        else:
+            limiter.on_success()
+        return resp, None
+    return None, error
+
+
+async def ingest(
+    conversations: Iterable[dict],
+    backend_url: str,
+    concurrency: int,
+    total: int | None = None,
+    on_success: Callable[[dict], None] | None = None,
+    batch_size: int = 1,
+) -> ProgressReporter:
+    """POST conversations with up to `concurrency` requests in flight.
+
+    With batch_size > 1, conversations are sent batch_size at a time as
+    NDJSON to the bulk endpoint; a batch is written in one transaction, so
+    a batch that fails without a response (which may have been stored) is
+    reported as failed for every conversation and not retried. on_success
+    is called with each conversation the backend accepted.
+    """
+    limits = httpx.Limits(
+        max_connections=concurrency,
+        max_keepalive_connections=concurrency,
+    )
+    async with httpx.AsyncClient(base_url=backend_url, timeout=REQUEST_TIMEOUT, limits=limits) as client:
+        # Health check
+        try:
+            resp = await client.get("/health")
+            if resp.status_code != 200:
+                print(f"Backend unhealthy: {resp.status_code}")
+                sys.exit(1)
+        except httpx.ConnectError:
+            print(f"Cannot connect to {backend_url}")
+            sys.exit(1)
 
-    conn.close()
-    if skipped_shared:
-        print(f"Skipped {skipped_shared} shared-user conversations")
-    return conversations
+        limiter = AdaptiveLimiter(concurrency)
+        reporter = ProgressReporter(total=total)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+        async def send_one(conv: dict) -> list[str | None]:
+            resp, error = await post_with_backoff(
+                client, limiter, "/api/conversations", json=build_payload(conv)
+            )
+            if resp is not None and resp.status_code != 200:
+                error = f"FAIL {resp.status_code}"
+            return [error]
+
+        async def send_batch(batch: list[dict]) -> list[str | None]:
+            body = "".join(json.dumps(build_payload(conv)) + "\n" for conv in batch)
+            resp, error = await post_with_backoff(
+                client,
+                limiter,
+                "/api/conversations/bulk",
+                content=body.encode(),
+                headers={"Content-Type": "application/x-ndjson"},
+                timeout=max(REQUEST_TIMEOUT, len(batch) * BULK_TIMEOUT_PER_CONVERSATION),
+            )
+            if resp is not None and resp.status_code != 200:
+                error = f"FAIL {resp.status_code}"
+            if error is not None:
+                return [error] * len(batch)
+            return [
+                f"FAIL {r['error']}" if r.get("error") else None
+                for r in resp.json()["results"]
+            ]
+
+        async def worker():
+            while (batch := await queue.get()) is not None:
+                convs = [conv for _, conv in batch]
+                try:
+                    if batch_size == 1:
+                        errors = await send_one(convs[0])
+                    else:
+                        errors = await send_batch(convs)
+                except Exception as e:
+                    errors = [f"ERROR {e}"] * len(batch)
+                for (i, conv), error in zip(batch, errors):
+                    if error is None and on_success is not None:
+                        on_success(conv)
+                    reporter.record(i, conv["title"], error)
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        for batch in itertools.batched(enumerate(conversations), batch_size):
+            await queue.put(batch)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+    return reporter
 
 
 def main():
@@ -117,88 +533,86 @@ def main():
     parser.add_argument("--dry-run", action="store_true", help="Parse and validate only, don't POST")
     parser.add_argument("--user-id", default=None, help="Only ingest conversations for this user ID")
     parser.add_argument("--include-shared", action="store_true", help="Include shared-* user conversations (skipped by default)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Maximum concurrent POSTs (default: 1)")
+    parser.add_argument("--batch-size", type=int, default=1, help="Conversations per bulk request (default: 1, one POST per conversation)")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file recording what was sent (default with --since-checkpoint: <db>.checkpoint)")
+    parser.add_argument("--since-checkpoint", action="store_true", help="Only send chats and messages that are new since the checkpoint")
     args = parser.parse_args()
 
+    if args.concurrency < 1:
+        parser.error("--concurrency must be >= 1")
+    if not 1 <= args.batch_size <= MAX_BATCH_SIZE:
+        parser.error(f"--batch-size must be between 1 and {MAX_BATCH_SIZE}")
+    if args.since_checkpoint and args.checkpoint is None:
+        args.checkpoint = f"{args.db}.checkpoint"
+
+    # A dry run must not create or write the checkpoint sidecar.
+    checkpoint = None
+    if args.checkpoint and args.dry_run:
+        print(f"Dry run: not using checkpoint {args.checkpoint}")
+    elif args.checkpoint:
+        checkpoint = Checkpoint(args.checkpoint)
+        print(f"Using checkpoint {args.checkpoint} ({len(checkpoint)} chats recorded)")
+    incremental = checkpoint is not None and args.since_checkpoint
+
     print(f"Loading conversations from {args.db}...")
-    conversations = load_conversations(
+    planned, skipped_shared = count_chats(
         args.db,
         filter_user_id=args.user_id,
         include_shared=args.include_shared,
+        skip=checkpoint.is_recorded if incremental else None,
     )
-    print(f"Found {len(conversations)} conversations with messages")
+    if skipped_shared:
+        print(f"Skipping {skipped_shared} shared-user conversations")
+    print(f"Found {planned} chats to scan")
 
-    total_messages = sum(len(c["messages"]) for c in conversations)
-    user_messages = sum(
-        1 for c in conversations for m in c["messages"] if m["role"] == "user"
-    )
-    embeddable = sum(
-        1 for c in conversations for m in c["messages"]
-        if m["role"] == "user" and len(m["content"]) >= 50
+    stats = ConversationStats()
+    conversations = load_conversations(
+        args.db,
+        filter_user_id=args.user_id,
+        include_shared=args.include_shared,
+        skip=checkpoint.is_unchanged if incremental else None,
     )
-    print(f"Total messages: {total_messages}")
-    print(f"User messages: {user_messages}")
-    print(f"Embeddable (user, >= 50 chars): {embeddable}")
+    if incremental:
+        conversations = checkpoint.plan(conversations)
+    conversations = stats.tally(conversations)
 
     if args.dry_run:
         print("\n--- Dry run summary ---")
-        for i, conv in enumerate(conversations[:5]):
-            print(f"  [{i+1}] {conv['title']} (user: {conv.get('user_id', 'N/A')}, {len(conv['messages'])} msgs, tags: {conv['tags']})")
-        if len(conversations) > 5:
-            print(f"  ... and {len(conversations) - 5} more")
+        for i, conv in enumerate(conversations):
+            if i < 5:
+                print(f"  [{i+1}] {conv['title']} (user: {conv.get('user_id', 'N/A')}, {len(conv['messages'])} msgs, tags: {conv['tags']})")
+        if stats.conversations > 5:
+            print(f"  ... and {stats.conversations - 5} more")
+        print()
+        stats.print_summary()
+        if incremental:
+            print(f"Unchanged since checkpoint: {checkpoint.unchanged}")
         print("\nDry run complete. No data was sent.")
         return
 
-    print(f"\nIngesting into {args.backend_url}...")
-    client = httpx.Client(base_url=args.backend_url, timeout=120.0)
-
-    # Health check
+    print(f"\nIngesting into {args.backend_url} (concurrency: {args.concurrency}, batch size: {args.batch_size})...")
     try:
-        resp = client.get("/health")
-        if resp.status_code != 200:
-            print(f"Backend unhealthy: {resp.status_code}")
-            sys.exit(1)
-    except httpx.ConnectError:
-        print(f"Cannot connect to {args.backend_url}")
-        sys.exit(1)
-
-    succeeded = 0
-    failed = 0
-    start = time.time()
-
-    for i, conv in enumerate(conversations):
-        payload = {
-            "title": conv["title"],
-            "source": conv["source"],
-            "sourceId": conv["source_id"],
-            "tags": conv["tags"],
-            "messages": conv["messages"],
-        }
-        if conv.get("user_id"):
-            payload["userId"] = conv["user_id"]
-
-        try:
-            resp = client.post("/api/conversations", json=payload)
-            if resp.status_code == 200:
-                succeeded += 1
-            else:
-                failed += 1
-                print(f"  [{i+1}] FAIL {resp.status_code}: {conv['title'][:60]}")
-        except Exception as e:
-            failed += 1
-            print(f"  [{i+1}] ERROR: {e}")
-
-        # Progress every 50
-        if (i + 1) % 50 == 0:
-            elapsed = time.time() - start
-            rate = (i + 1) / elapsed
-            print(f"  Progress: {i+1}/{len(conversations)} ({rate:.1f}/s)")
-
-    elapsed = time.time() - start
+        reporter = asyncio.run(ingest(
+            conversations,
+            args.backend_url,
+            args.concurrency,
+            total=planned,
+            on_success=checkpoint.record if checkpoint is not None else None,
+            batch_size=args.batch_size,
+        ))
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+
+    elapsed = time.time() - reporter.start
     print(f"\nDone in {elapsed:.1f}s")
-    print(f"Succeeded: {succeeded}, Failed: {failed}")
-
-    client.close()
-
+    stats.print_summary()
+    if incremental:
+        print(f"Unchanged since checkpoint: {checkpoint.unchanged}")
+        if checkpoint.diverged:
+            print(f"Diverged histories (metadata only): {checkpoint.diverged}")
+    print(f"Succeeded: {reporter.succeeded}, Failed: {reporter.failed}")
 
 if __name__ == "__main__":
     main()
@@ -2,6 +2,7 @@
 
 These tests run against live Docker services.
 """
+import json
 import uuid
 
 import pytest
@@ -716,3 +717,53 @@ class TestConversationCentroids:
             assert len(conv2["centroids"]) > len(conv1["centroids"]), (
                 f"Expected more centroids after upsert: {len(conv1['centroids'])} -> {len(conv2['centroids'])}"
             )
+
+
+class TestConversationBulk:
+    @pytest.mark.asyncio
+    async def test_bulk_ndjson_upsert(self, backend_client):
+        existing = unique("bulk-existing")
+        await backend_client.post(
+            "/api/conversations",
+            json={
+                "sourceId": existing,
+                "messages": [{"role": "user", "content": "Already here"}],
+            },
+        )
+
+        fresh = unique("bulk-fresh")
+        lines = [
+            {
+                "sourceId": fresh,
+                "title": "Bulk created",
+                "tags": ["bulk"],
+                "messages": [
+                    {"role": "user", "content": "Bulk message one"},
+                    {"role": "assistant", "content": "Bulk reply one"},
+                ],
+            },
+            {
+                "sourceId": existing,
+                "messages": [{"role": "user", "content": "Appended in bulk"}],
+            },
+            {"title": "Missing source id"},
+        ]
+        resp = await backend_client.post(
+            "/api/conversations/bulk",
+            content="".join(json.dumps(line) + "\n" for line in lines),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["succeeded"] == 2
+        assert body["failed"] == 1
+        assert "error" in body["results"][2]
+
+        created = await backend_client.get(f"/api/conversations/{body['results'][0]['id']}")
+        assert created.json()["title"] == "Bulk created"
+        assert len(created.json()["messages"]) == 2
+
+        appended = await backend_client.get(f"/api/conversations/{body['results'][1]['id']}")
+        messages = appended.json()["messages"]
+        assert [m["content"] for m in messages] == ["Already here", "Appended in bulk"]
+        assert messages[1]["position"] == 1